@@ -0,0 +1,57 @@
+import math
+import os
+
+# an expense is unusual when its log-amount is this many standard deviations above its category's mean...
+ANOMALY_Z = float(os.environ.get("PFM_ANOMALY_Z", 3.0))
+# ...and the category already has this many expenses to compare with
+ANOMALY_MIN_SAMPLES = int(os.environ.get("PFM_ANOMALY_MIN_SAMPLES", 10))
+
+class RunningStats:
+    """Welford running mean/variance with O(1) add and remove (so edits and deletes keep it exact).
+    Amounts are tracked on a log scale: spending is skewed, and "10x the usual" should weigh the same
+    for coffee and for rent."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared distances from the mean
+
+    def add(self, minor: int):
+        x = math.log(minor)
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, minor: int):
+        x = math.log(minor)
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 = max(0.0, self.m2 - delta * (x - self.mean))
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    @property
+    def typical(self) -> float:
+        """Typical amount in minor units (geometric mean)."""
+        return math.exp(self.mean) if self.n else 0.0
+
+    def unusual(self, minor: int):
+        """Return how many times larger than typical `minor` is if it stands out (see ANOMALY_Z), else None."""
+        if minor <= 0 or self.n < ANOMALY_MIN_SAMPLES:
+            return None
+        x = math.log(minor)
+        std = self.std
+        if x <= self.mean or (std > 0 and (x - self.mean) / std < ANOMALY_Z):
+            return None
+        if std == 0 and x - self.mean < math.log(2): # always the same amount: flag from 2x on
+            return None
+        return minor / self.typical
@@ -0,0 +1,416 @@
+"""Local HTTP/JSON API over the finance engine, built on stdlib asyncio streams.
+
+    python main.py serve --port 8765          (or: python api.py --port 8765)
+
+Reads:
+    GET    /health
+    GET    /users
+    GET    /users/<user_id>/balance?date=dd/mm/YYYY&from=dd/mm/YYYY   (both optional: balance on a date, net flow)
+    GET    /users/<user_id>/transactions?from=dd/mm/YYYY&to=...&category=...&type=...&limit=100&offset=0
+    GET    /users/<user_id>/transactions/<transaction_id>
+    GET    /users/<user_id>/reports/monthly?year=2025&month=3
+    GET    /users/<user_id>/reports/trends
+    GET    /users/<user_id>/reports/categories
+Writes (JSON body with type, amount, category, date, description, payment_method):
+    POST   /users/<user_id>/transactions
+    PATCH  /users/<user_id>/transactions/<transaction_id>
+    DELETE /users/<user_id>/transactions/<transaction_id>
+
+Concurrency model:
+- One writer: every DataManager call (writes, shard loads, refreshes) is queued and run one at a time
+  on a worker thread, so the event loop never blocks on disk and data access stays single-threaded.
+- Many readers: each user has a frozen snapshot (UserIndex.snapshot) published after every write.
+  Reads are served from it on the event loop without waiting for writes in progress.
+- Report results are cached by Reports' ReportCache, keyed on the snapshot generation, so publishing
+  a new snapshot invalidates them.
+Set PFM_API_TOKEN to require "Authorization: Bearer <token>" on every request.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import hmac
+import time
+from urllib.parse import urlsplit, parse_qsl
+
+from data_manager import DataManager
+from transactions import TransactionManager
+from reports import Reports
+from utils import parse_date, to_minor
+
+API_TOKEN_ENV = "PFM_API_TOKEN"
+MAX_BODY = 1 << 20 # 1 MiB request bodies
+MAX_PAGE = 1000 # most transactions returned per request
+REFRESH_SECONDS = 2.0 # how often to look for changes saved by other processes
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """Raised by handlers to answer with an error status and {"error": message}."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SnapshotSource:
+    """Minimal data-manager stand-in that serves Reports from published snapshots."""
+
+    def __init__(self, snapshots: dict, generation: dict):
+        self.snapshots = snapshots
+        self.generation = generation
+
+    def user_index(self, user_id):
+        return self.snapshots[user_id]
+
+    def get_transactions(self, user_id):
+        return self.snapshots[user_id].transactions
+
+    def currency_decimals(self, user_id):
+        return self.snapshots[user_id].decimals
+
+    def data_version(self, user_id):
+        return self.generation.get(user_id, 0) # a new snapshot is a new version for the report cache
+
+
+class FinanceAPI:
+    """Routes HTTP requests to snapshot reads or to the single-writer queue."""
+
+    def __init__(self, data_manager: DataManager = None, refresh_seconds: float = REFRESH_SECONDS):
+        self.data_manager = data_manager or DataManager()
+        self.transaction_manager = TransactionManager(self.data_manager)
+        self.snapshots = {} # user_id -> frozen UserIndex, replaced (never mutated) after each write
+        self.generation = {} # user_id -> number of snapshots published, used to invalidate cached reports
+        self.reports = Reports(SnapshotSource(self.snapshots, self.generation))
+        self.refresh_seconds = refresh_seconds
+        self.token = os.environ.get(API_TOKEN_ENV) or None
+        self.requests_served = 0
+        self._writes = None # asyncio.Queue of (function, future), created on the running loop
+        self._loading = {} # user_id -> future of a snapshot being loaded
+        self.routes = [
+            ("GET", r"/health", self.get_health),
+            ("GET", r"/users", self.get_users),
+            ("GET", r"/users/(?P<user_id>[^/]+)/balance", self.get_balance),
+            ("GET", r"/users/(?P<user_id>[^/]+)/transactions", self.get_transactions),
+            ("POST", r"/users/(?P<user_id>[^/]+)/transactions", self.post_transaction),
+            ("GET", r"/users/(?P<user_id>[^/]+)/transactions/(?P<tid>[^/]+)", self.get_transaction),
+            ("PATCH", r"/users/(?P<user_id>[^/]+)/transactions/(?P<tid>[^/]+)", self.patch_transaction),
+            ("DELETE", r"/users/(?P<user_id>[^/]+)/transactions/(?P<tid>[^/]+)", self.delete_transaction),
+            ("GET", r"/users/(?P<user_id>[^/]+)/reports/(?P<report>monthly|trends|categories)", self.get_report),
+        ]
+        self.routes = [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in self.routes]
+
+    # ---------------- single writer ----------------
+    async def _writer(self):
+        """Run queued DataManager jobs one at a time on a worker thread."""
+        while True:
+            fn, future = await self._writes.get()
+            try:
+                result = await asyncio.to_thread(fn)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def submit(self, fn):
+        """Queue fn() for the writer and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((fn, future))
+        return await future
+
+    def _publish(self, user_id, snapshot):
+        """Make a new snapshot visible to readers (runs on the event loop)."""
+        self.snapshots[user_id] = snapshot
+        self.generation[user_id] = self.generation.get(user_id, 0) + 1
+
+    async def write(self, user_id, fn):
+        """Queue a write for user_id, then publish the user's new snapshot. Returns fn()'s result."""
+        def job():
+            result = fn()
+            return result, self.data_manager.user_index(user_id).snapshot()
+        result, snapshot = await self.submit(job)
+        self._publish(user_id, snapshot)
+        return result
+
+    async def _refresher(self):
+        """Drop snapshots of users whose shard another process saved, so they reload on the next read."""
+        def job():
+            manifest = self.data_manager.manifest['users']
+            before = {uid: entry.get('revision') for uid, entry in manifest.items()}
+            self.data_manager.refresh()
+            return [uid for uid, entry in manifest.items() if before.get(uid) != entry.get('revision')]
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            for user_id in await self.submit(job):
+                if self.snapshots.pop(user_id, None) is not None:
+                    self.generation[user_id] = self.generation.get(user_id, 0) + 1
+
+    async def snapshot(self, user_id):
+        """Return the user's snapshot, loading their shard through the writer on first use."""
+        snap = self.snapshots.get(user_id)
+        if snap is not None:
+            return snap
+        if user_id not in self.data_manager.manifest['users']: # users without transactions have no shard yet
+            if user_id not in await self.submit(self.data_manager.load_users):
+                raise HTTPError(404, f"unknown user: {user_id}")
+        loading = self._loading.get(user_id)
+        if loading is None: # concurrent first reads share one load
+            loading = self._loading[user_id] = asyncio.ensure_future(
+                self.submit(lambda: self.data_manager.user_index(user_id).snapshot()))
+            loading.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        snap = await loading
+        if user_id not in self.snapshots:
+            self._publish(user_id, snap)
+        return self.snapshots[user_id]
+
+    # ---------------- reads ----------------
+    async def get_health(self, query):
+        return {"status": "ok", "users": len(self.data_manager.manifest['users']),
+                "loaded_users": len(self.snapshots), "requests_served": self.requests_served,
+                "report_cache": self.reports.cache.stats()}
+
+    async def get_users(self, query):
+        users = await self.submit(self.data_manager.load_users)
+        return [{"user_id": uid, "name": u.get("name"), "currency": u.get("currency", "USD")}
+                for uid, u in users.items()]
+
+    async def get_balance(self, query, user_id):
+        await self.snapshot(user_id)
+        if not query.get("date"):
+            return {"user_id": user_id, **self.reports.summary_totals(user_id)}
+        try:
+            day = parse_date(query["date"])
+            start = parse_date(query["from"]) if query.get("from") else None
+        except ValueError:
+            raise HTTPError(400, "date/from must be dd/mm/YYYY")
+        return {"user_id": user_id, **self.reports.balance_at(user_id, day, start)}
+
+    async def get_transactions(self, query, user_id):
+        snap = await self.snapshot(user_id)
+        try:
+            start = parse_date(query["from"]) if query.get("from") else None
+            end = parse_date(query["to"]) if query.get("to") else None
+            limit = min(int(query.get("limit", 100)), MAX_PAGE)
+            offset = max(int(query.get("offset", 0)), 0)
+        except ValueError:
+            raise HTTPError(400, "from/to must be dd/mm/YYYY, limit/offset integers")
+        category = (query.get("category") or "").casefold() or None
+        t_type = query.get("type") or None
+
+        def scan(): # the snapshot is immutable, so the scan can run off the event loop
+            from indexes import day_of
+            matched, page = 0, []
+            for t in snap.transactions:
+                if t_type and t.type != t_type:
+                    continue
+                if category and t.category.casefold() != category:
+                    continue
+                if start or end:
+                    d = day_of(t.date)
+                    if d is None or (start and d < start) or (end and d > end):
+                        continue
+                if offset <= matched < offset + limit:
+                    page.append(t.to_dict())
+                matched += 1
+            return matched, page
+
+        total, page = await asyncio.to_thread(scan) if len(snap) > 10_000 else scan()
+        return {"user_id": user_id, "total": total, "offset": offset, "limit": limit, "transactions": page}
+
+    async def get_transaction(self, query, user_id, tid):
+        t = (await self.snapshot(user_id)).by_id.get(tid)
+        if t is None:
+            raise HTTPError(404, f"unknown transaction: {tid}")
+        return t.to_dict()
+
+    async def get_report(self, query, user_id, report):
+        await self.snapshot(user_id)
+        if report == "monthly":
+            try:
+                year, month = int(query["year"]), int(query["month"])
+            except (KeyError, ValueError):
+                raise HTTPError(400, "year and month are required integers")
+            return {"user_id": user_id, "year": year, "month": month,
+                    "totals": self.reports.monthly_totals(user_id, year, month)}
+        if report == "trends":
+            return {"user_id": user_id, "monthly_expenses": self.reports.monthly_expenses(user_id)}
+        return {"user_id": user_id, "categories": self.reports.category_totals(user_id)}
+
+    # ---------------- writes ----------------
+    @staticmethod
+    def _validate(body: dict, partial: bool) -> dict:
+        """Check a transaction body; returns only the known fields (amount kept as given)."""
+        fields = ("type", "amount", "category", "date", "description", "payment_method")
+        data = {k: body[k] for k in fields if body.get(k) not in (None, "")}
+        if not partial:
+            missing = [k for k in ("type", "amount", "category", "date") if k not in data]
+            if missing:
+                raise HTTPError(400, f"missing fields: {', '.join(missing)}")
+        if "type" in data and data["type"] not in ("income", "expense"):
+            raise HTTPError(400, "type must be income or expense")
+        if "amount" in data:
+            try:
+                if to_minor(str(data["amount"])) <= 0:
+                    raise ValueError
+            except (ValueError, ArithmeticError):
+                raise HTTPError(400, "amount must be a positive number")
+        if "date" in data:
+            try:
+                parse_date(str(data["date"]))
+            except ValueError:
+                raise HTTPError(400, "date must be dd/mm/YYYY")
+        return {k: str(v) for k, v in data.items()}
+
+    async def post_transaction(self, query, body, user_id):
+        await self.snapshot(user_id) # 404 for unknown users
+        data = self._validate(body, partial=False)
+        t = await self.write(user_id, lambda: self.transaction_manager.add_transaction(
+            user_id, data["type"], data["amount"], data["category"], data["date"],
+            data.get("description", ""), data.get("payment_method", ""), interactive=False))
+        return 201, t.to_dict()
+
+    async def patch_transaction(self, query, body, user_id, tid):
+        await self.snapshot(user_id)
+        changes = self._validate(body, partial=True)
+
+        def job():
+            dm = self.data_manager
+            old = dm.user_index(user_id).by_id.get(tid)
+            if old is None:
+                return None
+            new = old.copy() # copy-on-write: readers may still hold `old` in a snapshot
+            new.update({k: v for k, v in changes.items() if k != "amount"})
+            if "amount" in changes:
+                new.amount = changes["amount"]
+            dm.transaction_replaced(old, new)
+            dm.save_user_transactions(user_id)
+            return new
+
+        t = await self.write(user_id, job)
+        if t is None:
+            raise HTTPError(404, f"unknown transaction: {tid}")
+        return t.to_dict()
+
+    async def delete_transaction(self, query, body, user_id, tid):
+        await self.snapshot(user_id)
+        deleted = await self.write(user_id, lambda: self.transaction_manager.delete_transaction(tid, user_id))
+        if not deleted:
+            raise HTTPError(404, f"unknown transaction: {tid}")
+        return {"deleted": tid}
+
+    # ---------------- HTTP plumbing ----------------
+    async def dispatch(self, method, target, headers, body):
+        """Return (status, response body bytes) for one request."""
+        if self.token and not hmac.compare_digest(headers.get("authorization", "").encode("latin-1", "replace"),
+                                                  f"Bearer {self.token}".encode("latin-1", "replace")):
+            raise HTTPError(401, "missing or wrong bearer token")
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            params = match.groupdict()
+            if method == "GET":
+                return 200, self._encode(await handler(query, **params))
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                raise HTTPError(400, "body must be JSON")
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "body must be a JSON object")
+            result = await handler(query, payload, **params)
+            status, result = result if isinstance(result, tuple) else (200, result)
+            return status, self._encode(result)
+        raise HTTPError(405 if allowed else 404, f"no route for {method} {url.path}")
+
+    @staticmethod
+    def _encode(result) -> bytes:
+        return json.dumps(result, ensure_ascii=False, default=str).encode("utf-8") # Decimals become strings
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection (keep-alive) until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close") \
+                    or headers.get("connection", "").lower() == "keep-alive"
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method.upper(), target, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, self._encode({"error": str(e)})
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    status, payload = 500, self._encode({"error": f"{type(e).__name__}: {e}"})
+                self.requests_served += 1
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """Run the server until cancelled. `ready` (an asyncio.Event) is set once it is listening."""
+        self._writes = asyncio.Queue()
+        tasks = [asyncio.create_task(self._writer()), asyncio.create_task(self._refresher())]
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=64 * 1024)
+        print(f"🌐 Serving on http://{host}:{port} (Ctrl+C to stop)")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def serve(host="127.0.0.1", port=8765, data_manager=None):
+    """Blocking entry point used by `python main.py serve` and `python api.py`."""
+    started = time.perf_counter()
+    api = FinanceAPI(data_manager)
+    try:
+        asyncio.run(api.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    return {"requests_served": api.requests_served, "uptime_s": round(time.perf_counter() - started, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API for the Personal Finance Manager.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,121 @@
+import gzip # built in library for reading/writing .gz files
+import json
+import os
+from indexes import day_of
+from models import Transaction
+
+class YearArchive:
+    """Cold storage for one user's closed years, in data/shards/<user_id>/archive/.
+    Each archiving run writes immutable gzip NDJSON segments (one per year, rows sorted by date)
+    and records them in summary.json together with precomputed per-year totals:
+        {"format": 1,
+         "segments": [{"file": "2019.1.ndjson.gz", "year": 2019, "count": 1234}, ...],
+         "years": {"2019": {"count": n, "income": minor, "expense": minor,
+                            "months": {"1": bucket, ...}, "categories": {"rent": bucket, ...},
+                            "days": {"737425": net minor, ...},
+                            "category_months": {"rent": {"1": bucket, ...}, ...}}}}
+    where bucket = {"income": minor, "expense": minor, "count": n} like UserIndex's aggregates
+    and days maps date ordinals to income - expense (for point-in-time balances).
+    Reports read the summary; rows are only streamed back when a filter needs them."""
+
+    SUMMARY = "summary.json"
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.summary_path = os.path.join(folder, self.SUMMARY)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.summary_path)
+
+    def load_summary(self):
+        """Return the parsed summary.json, or None when the user has no archive."""
+        try:
+            with open(self.summary_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def years(self) -> list:
+        """Archived years, oldest first."""
+        summary = self.load_summary()
+        return sorted(int(y) for y in summary["years"]) if summary else []
+
+    def _write_summary(self, summary):
+        tmp_path = self.summary_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.summary_path)
+
+    # ---------------- writing ----------------
+    def add_year(self, year: int, rows: list) -> str:
+        """Write rows (all dated in `year`) as a new immutable segment and add them to the summary.
+        Returns the segment's file name."""
+        os.makedirs(self.folder, exist_ok=True)
+        summary = self.load_summary() or {"format": 1, "segments": [], "years": {}}
+        number = 1 + sum(1 for s in summary["segments"] if s["year"] == year)
+        name = f"{year}.{number}.ndjson.gz"
+        path = os.path.join(self.folder, name)
+
+        rows = sorted(rows, key=lambda t: day_of(t.date))
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for t in rows:
+                f.write(t.to_json() + "\n")
+        os.replace(tmp_path, path)
+
+        totals = summary["years"].setdefault(str(year), {"count": 0, "income": 0, "expense": 0,
+                                                          "months": {}, "categories": {}, "days": {},
+                                                          "category_months": {}})
+        days = totals.setdefault("days", {})
+        category_months = totals.setdefault("category_months", {})
+        for t in rows:
+            totals["count"] += 1
+            if t.type not in ("income", "expense"):
+                continue
+            totals[t.type] += t.minor
+            ordinal = str(day_of(t.date).toordinal())
+            days[ordinal] = days.get(ordinal, 0) + (t.minor if t.type == "income" else -t.minor)
+            month = str(day_of(t.date).month)
+            for bucket in (totals["months"].setdefault(month, {"income": 0, "expense": 0, "count": 0}),
+                           totals["categories"].setdefault(t.category, {"income": 0, "expense": 0, "count": 0}),
+                           category_months.setdefault(t.category, {}).setdefault(month, {"income": 0, "expense": 0, "count": 0})):
+                bucket[t.type] += t.minor
+                bucket["count"] += 1
+        summary["segments"].append({"file": name, "year": year, "count": len(rows)})
+        self._write_summary(summary)
+        return name
+
+    def remove_year(self, year: int):
+        """Forget a year (its rows must have been moved back into the hot shard first) and delete its segments."""
+        summary = self.load_summary()
+        if not summary:
+            return
+        files = [s["file"] for s in summary["segments"] if s["year"] == year]
+        summary["segments"] = [s for s in summary["segments"] if s["year"] != year]
+        summary["years"].pop(str(year), None)
+        self._write_summary(summary)
+        for name in files:
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                pass
+
+    # ---------------- reading ----------------
+    def segment_files(self) -> list:
+        summary = self.load_summary()
+        return [s["file"] for s in summary["segments"]] if summary else []
+
+    def iter_rows(self, decimals: int = 2, first_year: int = None, last_year: int = None):
+        """Stream archived Transaction records (oldest year first), one segment line at a time.
+        Only segments whose year lies in [first_year, last_year] are opened."""
+        summary = self.load_summary()
+        if not summary:
+            return
+        for segment in sorted(summary["segments"], key=lambda s: (s["year"], s["file"])):
+            year = segment["year"]
+            if (first_year is not None and year < first_year) or (last_year is not None and year > last_year):
+                continue
+            with gzip.open(os.path.join(self.folder, segment["file"]), "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield Transaction.from_dict(json.loads(line), decimals)
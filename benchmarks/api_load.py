@@ -0,0 +1,107 @@
+"""Load-test the local HTTP/JSON API (api.py) on synthetic data.
+
+Usage (from the project root):
+    python benchmarks/api_load.py --rows 100000 --clients 50 --requests 200
+    python benchmarks/api_load.py --write-ratio 0.05        # mix in POST requests
+
+The server and the clients share one event loop in this process, over keep-alive
+connections on 127.0.0.1, so the numbers are a floor for a dedicated server process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_dataset
+
+
+async def request(reader, writer, method, path, body=None):
+    """Send one HTTP/1.1 request on an open connection and return (status, parsed JSON)."""
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = next(int(l.split(":")[1]) for l in lines if l.lower().startswith("content-length"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(port, user_ids, n_requests, write_ratio, rng, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    reads = ["/users/{u}/balance", "/users/{u}/reports/trends", "/users/{u}/reports/categories",
+             "/users/{u}/reports/monthly?year=2020&month=6", "/users/{u}/transactions?limit=20&category=coffee"]
+    try:
+        for _ in range(n_requests):
+            user_id = rng.choice(user_ids)
+            start = time.perf_counter()
+            if rng.random() < write_ratio:
+                status, _ = await request(reader, writer, "POST", f"/users/{user_id}/transactions", {
+                    "type": "expense", "amount": "4.20", "category": "coffee", "date": "01/06/2020"})
+            else:
+                status, _ = await request(reader, writer, "GET", rng.choice(reads).format(u=user_id))
+            latencies.append(time.perf_counter() - start)
+            errors += status >= 400
+    finally:
+        writer.close()
+    return errors
+
+
+async def run(args, user_ids):
+    from api import FinanceAPI
+    api = FinanceAPI()
+    ready = asyncio.Event()
+    server = asyncio.create_task(api.serve("127.0.0.1", args.port, ready))
+    await ready.wait()
+
+    rng = random.Random(args.seed)
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(client(args.port, user_ids, args.requests, args.write_ratio,
+                                           random.Random(rng.random()), latencies, 0)
+                                    for _ in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    server.cancel()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies), "errors": sum(errors), "seconds": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "latency_ms": {"median": round(statistics.median(latencies) * 1000, 2),
+                       "p99": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the local HTTP/JSON API.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="share of POST requests")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="pfm_api_")
+    cwd = os.getcwd()
+    try:
+        user_ids = generate_dataset(root, args.users, args.rows, args.seed)
+        os.chdir(root)
+        result = asyncio.run(run(args, user_ids))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
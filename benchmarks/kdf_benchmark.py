@@ -0,0 +1,41 @@
+"""Pick a PBKDF2 iteration count for password hashing on this machine.
+
+Usage (from the project root):
+    python benchmarks/kdf_benchmark.py --target-ms 250
+    python benchmarks/kdf_benchmark.py --target-ms 250 --save   # writes data/security.json
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import benchmark_kdf_iterations, hash_password, save_kdf_iterations, verify_password, KDF_CONFIG_FILE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PBKDF2 and choose an iteration count for a login latency budget.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="target time for one password hash, in milliseconds")
+    parser.add_argument("--save", action="store_true", help=f"store the chosen iteration count in {KDF_CONFIG_FILE}")
+    args = parser.parse_args()
+
+    iterations = benchmark_kdf_iterations(target_seconds=args.target_ms / 1000)
+
+    # Verify the choice end-to-end the same way login does
+    stored = hash_password("Benchmark@123", iterations=iterations)
+    start = time.perf_counter()
+    verify_password("Benchmark@123", stored)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Target:     {args.target_ms:.0f} ms")
+    print(f"Iterations: {iterations}")
+    print(f"Measured:   {elapsed_ms:.1f} ms per login")
+
+    if args.save:
+        save_kdf_iterations(iterations)
+        print(f"✅ Saved to {KDF_CONFIG_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Time the app's hot paths on seeded synthetic data and write the results as JSON.
+
+Usage (from the project root):
+    python benchmarks/run_benchmarks.py                          # 1k, 100k and 1M rows
+    python benchmarks/run_benchmarks.py --sizes 1000,100000 --output bench.json
+    python benchmarks/run_benchmarks.py --sizes 1000 --compare bench.json
+
+Every size runs in its own temporary folder (the app uses relative data/ paths),
+so the project's real data/ folder is never touched.
+"""
+import argparse
+import builtins
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from transactions import TransactionManager
+from reports import Reports
+from synthetic import generate_dataset, write_import_csv
+
+DEFAULT_SIZES = "1000,100000,1000000"
+REGRESSION_RATIO = 1.20 # flag anything 20% slower than the baseline file
+
+
+@contextlib.contextmanager
+def scripted(answers=()):
+    """Answer input() prompts from `answers` (then with Enter) and silence stdout."""
+    queue = list(answers)
+    real_input = builtins.input
+    builtins.input = lambda prompt="": queue.pop(0) if queue else ""
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        builtins.input = real_input
+
+
+def measure(fn, repeat=3, answers=(), setup=None):
+    """Run fn() `repeat` times and return its min/median wall time in seconds."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with scripted(answers):
+            start = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - start)
+    return {"min_s": min(runs), "median_s": statistics.median(runs), "runs": len(runs)}
+
+
+def bench_size(n_rows: int, n_users: int, repeat: int, import_rows: int, seed: int) -> dict:
+    """Generate a dataset of n_rows transactions and time every benchmarked operation on it."""
+    root = tempfile.mkdtemp(prefix=f"pfm_bench_{n_rows}_")
+    cwd = os.getcwd()
+    try:
+        start = time.perf_counter()
+        user_ids = generate_dataset(root, n_users, n_rows, seed)
+        generate_s = time.perf_counter() - start
+        os.chdir(root)
+
+        # repeat the heavy per-size steps less on large data, so 1M rows finishes in minutes
+        heavy = 1 if n_rows >= 1_000_000 else repeat
+        user_id = user_ids[0]
+        timings = {}
+        print(f"⏱️ {n_rows} rows, {n_users} users (generated in {generate_s:.1f}s)")
+
+        timings["startup"] = measure(DataManager, repeat)
+        dm = DataManager()
+        tm = TransactionManager(dm)
+        reports = Reports(dm)
+
+        # cold load of one user's shard (parse + index build), then everything below runs warm
+        timings["load_user"] = measure(lambda: dm.user_index(user_id), heavy,
+                                       setup=lambda: dm.sessions.discard_index(user_id))
+        dm.user_index(user_id)
+
+        timings["add_transaction"] = measure(
+            lambda: tm.add_transaction(user_id, "expense", "12.34", "groceries", "15/06/2020", "bench", "visa"),
+            heavy)
+        timings["recurring_transaction"] = measure(
+            lambda: tm.recurring_transaction(user_id), heavy,
+            answers=["expense", "99.99", "rent", "bench", "bank transfer", "monthly", "3", "1"])
+
+        import_path = os.path.join(root, "import.csv")
+        write_import_csv(import_path, user_id, import_rows, seed)
+        timings["import_transactions_csv"] = measure(lambda: dm.import_transactions_csv(user_id, import_path), 1)
+
+        timings["save_user_transactions"] = measure(lambda: dm.save_user_transactions(user_id), heavy)
+        all_rows = dm.load_transactions()
+        timings["save_transactions"] = measure(lambda: dm.save_transactions(all_rows), 1)
+        del all_rows
+
+        report_calls = {
+            "show_dashboard_summary": (lambda: reports.show_dashboard_summary(user_id), ()),
+            "show_monthly_report": (lambda: reports.show_monthly_report(user_id, 2020, 6), ()),
+            "show_category_breakdown": (lambda: reports.show_category_breakdown(user_id), ()),
+            "show_spending_trends": (lambda: reports.show_spending_trends(user_id), ()),
+            "filter_by_category": (lambda: reports.filter_by_category(user_id), ["groceries"]),
+            "filter_by_date_range": (lambda: reports.filter_by_date_range(user_id), ["01/01/2018", "31/12/2018"]),
+            "filter_by_amount_range": (lambda: reports.filter_by_amount_range(user_id), ["10", "100"]),
+            "sort_transactions_by_date": (lambda: reports.sort_transactions(user_id), ["1"]),
+            "sort_transactions_by_amount": (lambda: reports.sort_transactions(user_id), ["3"]),
+            "ascii_category_bars": (lambda: reports.ascii_category_bars(user_id), ()),
+            "ascii_last_12_months_vertical": (lambda: reports.ascii_last_12_months_vertical(user_id), ()),
+        }
+        for name, (fn, answers) in report_calls.items():
+            # drop cached results before each run, so every run computes the report
+            timings[f"reports.{name}"] = measure(fn, repeat, answers=answers,
+                                                 setup=lambda: reports.cache.invalidate(user_id))
+
+        timings["create_backup_once"] = measure(dm.create_backup_once, heavy)
+
+        return {"rows": n_rows, "users": n_users, "import_rows": import_rows,
+                "generate_s": generate_s, "timings": timings}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def compare(results: dict, baseline_path: str) -> int:
+    """Print every timing next to the baseline file's and return how many regressed."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for size, current in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if not before:
+            continue
+        print(f"\n=== {size} rows vs {baseline_path} ===")
+        for name, timing in current["timings"].items():
+            old = before["timings"].get(name)
+            if not old or old["min_s"] <= 0:
+                continue
+            ratio = timing["min_s"] / old["min_s"]
+            flag = "  ⚠️ slower" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"{name:<40} {old['min_s'] * 1000:>10.2f} ms -> {timing['min_s'] * 1000:>10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startup, CRUD, import, reports and backups on synthetic data.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated transaction counts")
+    parser.add_argument("--users", type=int, default=5, help="users sharing the transactions")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (minimum is reported)")
+    parser.add_argument("--import-rows", type=int, default=1000, help="rows in the CSV import file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "sizes": {},
+    }
+    for n_rows in sizes:
+        results["sizes"][str(n_rows)] = bench_size(n_rows, args.users, args.repeat, args.import_rows, args.seed)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions:
+            print(f"\n⚠️ {regressions} measurement(s) more than {REGRESSION_RATIO:.2f}x slower than the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
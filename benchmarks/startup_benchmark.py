@@ -0,0 +1,80 @@
+"""Measure how long the app takes to reach its main menu.
+
+Usage (from the project root):
+    python benchmarks/startup_benchmark.py                      # 1k and 100k rows
+    python benchmarks/startup_benchmark.py --sizes 1000000 --runs 20 --output startup.json
+
+Each run is a fresh interpreter (like a user launching main.py) in a temporary folder filled
+with synthetic data. "process_s" is the whole launch including interpreter start-up;
+"app_s" is the part spent importing main and constructing PersonalFinanceApp.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_dataset
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports main and builds the app exactly as `python main.py` does, then stops before the menu
+SNIPPET = f"""
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {PROJECT_DIR!r})
+import main
+app = main.PersonalFinanceApp()
+print(time.perf_counter() - start)
+"""
+
+
+def time_startup(root: str, runs: int) -> dict:
+    """Launch the app `runs` times in root and return min/median timings."""
+    process, app = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", SNIPPET], cwd=root, capture_output=True, text=True, check=True)
+        process.append(time.perf_counter() - start)
+        app.append(float(out.stdout.strip().splitlines()[-1]))
+    return {
+        "process_s": {"min": min(process), "median": statistics.median(process)},
+        "app_s": {"min": min(app), "median": statistics.median(app)},
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time app start-up (import + construction) on synthetic data.")
+    parser.add_argument("--sizes", default="1000,100000", help="comma separated transaction counts")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for n_rows in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        root = tempfile.mkdtemp(prefix=f"pfm_startup_{n_rows}_")
+        try:
+            generate_dataset(root, args.users, n_rows, args.seed)
+            results[str(n_rows)] = r = time_startup(root, args.runs)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        print(f"⏱️ {n_rows:>8} rows: app {r['app_s']['median'] * 1000:7.1f} ms, "
+              f"process {r['process_s']['median'] * 1000:7.1f} ms (median of {r['runs']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Seeded synthetic data generator for benchmarks.
+
+Writes a complete data/ folder in the app's current on-disk formats
+(users.json/.csv, shards/manifest.json, shards/<user_id>/transactions.json/.csv)
+so DataManager can start on it exactly as it would on real data.
+"""
+import csv
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Transaction
+from utils import hash_password, format_date
+
+EXPENSE_CATEGORIES = ["groceries", "rent", "transportation", "coffee", "utilities", "entertainment",
+                      "health", "shopping", "restaurants", "insurance", "savings", "education"]
+INCOME_CATEGORIES = ["salary", "freelance", "gift", "interest"]
+PAYMENT_METHODS = ["cash", "visa", "mastercard", "bank transfer", "wallet"]
+
+
+def generate_users(n_users: int, rng: random.Random) -> dict:
+    """Return {user_id: user} with cheap (low work factor) password hashes."""
+    users = {}
+    for i in range(n_users):
+        user_id = f"{rng.getrandbits(32):08x}"
+        users[user_id] = {
+            "user_id": user_id,
+            "name": f"user{i}",
+            "password": hash_password("Bench@1234", iterations=1000),
+            "currency": "USD",
+        }
+    return users
+
+
+def generate_transactions(user_id: str, n_rows: int, rng: random.Random, first_number: int = 1,
+                          start: date = date(2015, 1, 1), days: int = 3650):
+    """Yield n_rows Transaction records for one user, spread over `days` days from `start`."""
+    for i in range(n_rows):
+        if rng.random() < 0.15:
+            t_type, category = "income", rng.choice(INCOME_CATEGORIES)
+            minor = rng.randint(50_00, 5_000_00)
+        else:
+            t_type, category = "expense", rng.choice(EXPENSE_CATEGORIES)
+            minor = int(rng.lognormvariate(3.5, 1.0) * 100) + 1
+        yield Transaction(
+            transaction_id=f"TXN{first_number + i:03d}",
+            user_id=user_id,
+            type=t_type,
+            minor=minor,
+            category=category,
+            date=format_date(start + timedelta(days=rng.randrange(days))),
+            description=f"{category} #{rng.randrange(1000)}",
+            payment_method=rng.choice(PAYMENT_METHODS),
+        )
+
+
+def write_shard(data_dir: str, user_id: str, rows) -> int:
+    """Write one user's shard files in the same format as DataManager._write_shard."""
+    shard = os.path.join(data_dir, "shards", user_id)
+    os.makedirs(shard, exist_ok=True)
+    count = 0
+    with open(os.path.join(shard, "transactions.json"), "w", encoding="utf-8") as jf, \
+            open(os.path.join(shard, "transactions.csv"), "w", newline="", encoding="utf-8") as cf:
+        writer = csv.writer(cf)
+        writer.writerow(Transaction.FIELDS)
+        jf.write("[")
+        for t in rows:
+            jf.write(",\n    " if count else "\n    ")
+            jf.write(t.to_json())
+            writer.writerow(t.as_row())
+            count += 1
+        jf.write("\n]\n" if count else "]\n")
+    return count
+
+
+def generate_dataset(root: str, n_users: int, n_transactions: int, seed: int = 42) -> list:
+    """Create root/data with n_users users sharing n_transactions rows. Returns the user_ids."""
+    rng = random.Random(seed)
+    data_dir = os.path.join(root, "data")
+    os.makedirs(os.path.join(data_dir, "backup"), exist_ok=True)
+
+    users = generate_users(n_users, rng)
+    with open(os.path.join(data_dir, "users.json"), "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=4)
+    with open(os.path.join(data_dir, "users.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["user_id", "name", "password", "currency"])
+        writer.writeheader()
+        writer.writerows(users.values())
+
+    manifest = {"format": 1, "next_transaction_number": 1, "users": {}}
+    per_user, extra = divmod(n_transactions, n_users)
+    number = 1
+    for i, user_id in enumerate(users):
+        n_rows = per_user + (1 if i < extra else 0)
+        write_shard(data_dir, user_id, generate_transactions(user_id, n_rows, rng, first_number=number))
+        manifest["users"][user_id] = {"count": n_rows, "revision": 1}
+        number += n_rows
+    manifest["next_transaction_number"] = number
+    with open(os.path.join(data_dir, "shards", "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    return list(users)
+
+
+def write_import_csv(path: str, user_id: str, n_rows: int, seed: int = 7) -> None:
+    """Write a CSV file in the import format (same columns as the app's exports)."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(Transaction.FIELDS)
+        for t in generate_transactions(user_id, n_rows, rng, first_number=10_000_000, start=date(2030, 1, 1)):
+            writer.writerow(t.as_row())
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic data/ folder.")
+    parser.add_argument("root", help="folder to create data/ in")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    ids = generate_dataset(args.root, args.users, args.transactions, args.seed)
+    print(f"✅ Generated {args.transactions} transactions for {len(ids)} users in {args.root}/data")
@@ -0,0 +1,160 @@
+import os
+import time
+from collections import OrderedDict
+
+class SessionCache:
+    """In-process cache of logged-in users' sessions.
+    Each entry remembers that the user verified their password and keeps the
+    user's UserIndex warm, so switching back to a recent user is instant.
+    Entries expire after ttl_seconds of inactivity; when more than max_sessions
+    users or max_rows cached transactions are held, least recently used entries are evicted."""
+
+    def __init__(self, ttl_seconds: float = None, max_sessions: int = None, max_rows: int = None):
+        """Limits default to the PFM_SESSION_TTL / PFM_SESSION_MAX_USERS / PFM_SESSION_MAX_ROWS env vars."""
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("PFM_SESSION_TTL", 30 * 60))
+        self.max_sessions = max_sessions if max_sessions is not None else int(os.environ.get("PFM_SESSION_MAX_USERS", 8))
+        self.max_rows = max_rows if max_rows is not None else int(os.environ.get("PFM_SESSION_MAX_ROWS", 1_000_000))
+        self._entries = OrderedDict()  # user_id -> {"verified": bool, "index": UserIndex|None, "expires_at": float}
+
+    def __contains__(self, user_id):
+        return self._get(user_id) is not None
+
+    # ---------------- private helpers ----------------
+    def _get(self, user_id):
+        """Return a live entry (refreshing its LRU position and expiry) or None."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry["expires_at"] < now:
+            del self._entries[user_id]
+            return None
+        entry["expires_at"] = now + self.ttl_seconds
+        self._entries.move_to_end(user_id)
+        return entry
+
+    def _entry(self, user_id):
+        """Return the entry for user_id, creating an empty one if needed."""
+        entry = self._get(user_id)
+        if entry is None:
+            entry = {"verified": False, "index": None, "expires_at": time.monotonic() + self.ttl_seconds}
+            self._entries[user_id] = entry
+        return entry
+
+    def _cached_rows(self):
+        return sum(len(e["index"]) for e in self._entries.values() if e["index"] is not None)
+
+    def _evict(self, keep=None):
+        """Drop least recently used entries until the size limits are respected (never `keep`)."""
+        while len(self._entries) > 1 and (len(self._entries) > self.max_sessions or self._cached_rows() > self.max_rows):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            del self._entries[oldest]
+
+    # ---------------- sessions ----------------
+    def start(self, user_id: str):
+        """Record that user_id has just verified their password."""
+        self._entry(user_id)["verified"] = True
+        self._evict(keep=user_id)
+
+    def is_verified(self, user_id: str) -> bool:
+        """True if user_id verified their password within the TTL."""
+        entry = self._get(user_id)
+        return bool(entry and entry["verified"])
+
+    def end(self, user_id: str):
+        """Forget the password verification but keep the warm index until it expires."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry["verified"] = False
+
+    # ---------------- indexes ----------------
+    def get_index(self, user_id: str):
+        """Return the cached UserIndex for user_id, or None."""
+        entry = self._get(user_id)
+        return entry["index"] if entry else None
+
+    def peek_index(self, user_id: str):
+        """Return the cached UserIndex without refreshing its expiry or LRU position."""
+        entry = self._entries.get(user_id)
+        return entry["index"] if entry else None
+
+    def set_index(self, user_id: str, index):
+        """Cache a freshly built UserIndex for user_id."""
+        self._entry(user_id)["index"] = index
+        self._evict(keep=user_id)
+
+    def discard_index(self, user_id: str):
+        """Drop the cached UserIndex for user_id (e.g. its shard changed on disk); the session stays."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry["index"] = None
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ReportCache:
+    """LRU cache of report results keyed by (user_id, report, params).
+    Each entry remembers the user's data version (DataManager.data_version) it was computed from;
+    a lookup with a different version is a miss and replaces the stale entry, so any add, edit,
+    delete or import invalidates that user's reports without callbacks.
+    Bounded by max_entries and by max_rows (total length of cached result lists)."""
+
+    def __init__(self, max_entries: int = None, max_rows: int = None):
+        """Limits default to the PFM_REPORT_CACHE_SIZE / PFM_REPORT_CACHE_ROWS env vars."""
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get("PFM_REPORT_CACHE_SIZE", 128))
+        self.max_rows = max_rows if max_rows is not None else int(os.environ.get("PFM_REPORT_CACHE_ROWS", 1_000_000))
+        self._entries = OrderedDict()  # (user_id, report, params) -> (version, result, rows)
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # misses caused by a newer data version
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _size(result):
+        return len(result) if isinstance(result, (list, tuple)) else 1
+
+    def _drop(self, key):
+        _, _, rows = self._entries.pop(key)
+        self._rows -= rows
+
+    def get_or_compute(self, user_id: str, report: str, params, version, compute):
+        """Return the cached result for (user_id, report, params) at `version`, or compute() and cache it.
+        Results are shared between callers: treat them as read-only."""
+        key = (user_id, report, params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] == version:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self.stale += 1
+            self._drop(key)
+        self.misses += 1
+
+        result = compute()
+        rows = self._size(result)
+        self._entries[key] = (version, result, rows)
+        self._rows += rows
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._rows > self.max_rows):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        return result
+
+    def invalidate(self, user_id: str = None):
+        """Drop every entry for user_id (or everything)."""
+        for key in [k for k in self._entries if user_id is None or k[0] == user_id]:
+            self._drop(key)
+
+    def stats(self) -> dict:
+        """Counters for diagnostics screens."""
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "rows": self._rows, "hits": self.hits, "misses": self.misses,
+                "stale": self.stale, "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
@@ -0,0 +1,230 @@
+"""Non-interactive batch mode: run imports, exports, reports and maintenance from cron or scripts.
+
+    python main.py import   --user alice --file bank.csv
+    python main.py export   --user alice --output out/alice.csv.gz --from 01/01/2025 --type expense
+    python main.py report monthly --user alice --year 2025 --month 3
+    python main.py report trends  --user alice
+    python main.py report balance --user alice --date 31/12/2024 --from 01/01/2024
+    python main.py report forecast --user alice --months 24
+    python main.py report distribution --user alice --year 2025 (median/p90/p99 expense per category)
+    python main.py backup
+    python main.py compact
+    python main.py archive  --user alice --before-year 2024
+    python main.py detect-recurring --workers 4 (propose recurring rules for every user)
+    python main.py serve --port 8765            (local HTTP/JSON API, see api.py)
+
+Every command prints one JSON object on stdout (including "elapsed_s"); progress messages go to stderr.
+Exit status is 0 on success, 1 on errors (the JSON then has an "error" key).
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+from data_manager import DataManager
+from transactions import TransactionManager
+from reports import Reports
+from exporters import export_ndjson, export_columnar
+from utils import parse_date
+
+
+class BatchError(Exception):
+    """A batch command could not run (bad user, bad arguments...)."""
+
+
+class BatchCLI:
+    """Runs one batch command on top of the same managers the interactive app uses."""
+
+    def __init__(self):
+        self.data_manager = DataManager()
+        self.transaction_manager = TransactionManager(self.data_manager)
+        self.reports = Reports(self.data_manager)
+
+    def resolve_user(self, name_or_id: str) -> str:
+        """Return the user_id for a user name (case-insensitive) or user_id."""
+        users = self.data_manager.load_users()
+        if name_or_id in users:
+            return name_or_id
+        wanted = name_or_id.casefold()
+        for user_id, user in users.items():
+            if str(user.get("name", "")).casefold() == wanted:
+                return user_id
+        raise BatchError(f"unknown user: {name_or_id}")
+
+    # ---------------- commands ----------------
+    def cmd_import(self, args) -> dict:
+        user_id = self.resolve_user(args.user)
+        added = self.data_manager.import_transactions_csv(user_id, args.file)
+        return {"user_id": user_id, "file": args.file, "imported": added,
+                "invalid_amounts": self.data_manager.last_import_invalid}
+
+    def cmd_export(self, args) -> dict:
+        user_id = self.resolve_user(args.user)
+        try:
+            start = parse_date(args.start) if args.start else None
+            end = parse_date(args.end) if args.end else None
+        except ValueError:
+            raise BatchError("dates must be dd/mm/YYYY")
+        fmt = args.format or self._format_from_path(args.output)
+
+        if fmt == "csv":
+            count = self.data_manager.stream_export_csv(user_id, args.output, start=start, end=end,
+                                                        category=args.category, t_type=args.type)
+        else:
+            rows = self.data_manager.iter_transactions(user_id, start, end, args.category, args.type)
+            if fmt == "ndjson":
+                count = export_ndjson(rows, args.output)
+            else:
+                try:
+                    count, fmt, output = export_columnar(rows, args.output, self.data_manager.currency_decimals(user_id))
+                except ValueError as e:
+                    raise BatchError(str(e))
+                if output != args.output:
+                    print(f"pyarrow is not installed: wrote PFMC to {output} instead of Parquet", file=sys.stderr)
+                    args.output = output
+        return {"user_id": user_id, "output": args.output, "format": fmt, "exported": count}
+
+    @staticmethod
+    def _format_from_path(path: str) -> str:
+        name = path.lower().removesuffix(".gz")
+        if name.endswith((".ndjson", ".jsonl")):
+            return "ndjson"
+        if name.endswith((".parquet", ".pfmc")):
+            return "columnar"
+        return "csv"
+
+    def cmd_report(self, args) -> dict:
+        user_id = self.resolve_user(args.user)
+        result = {"user_id": user_id, "report": args.report}
+        if args.report == "monthly":
+            result.update(year=args.year, month=args.month,
+                          totals=self.reports.monthly_totals(user_id, args.year, args.month))
+        elif args.report == "trends":
+            result["monthly_expenses"] = self.reports.monthly_expenses(user_id)
+        elif args.report == "summary":
+            result["totals"] = self.reports.summary_totals(user_id)
+        elif args.report == "categories":
+            result["categories"] = self.reports.category_totals(user_id)
+        elif args.report == "balance":
+            try:
+                day = parse_date(args.date)
+                start = parse_date(args.start) if args.start else None
+            except ValueError:
+                raise BatchError("dates must be dd/mm/YYYY")
+            result.update(self.reports.balance_at(user_id, day, start))
+        elif args.report == "forecast":
+            result.update(months=args.months, forecast=self.reports.forecast(user_id, args.months))
+        elif args.report == "distribution":
+            result.update(year=args.year, month=args.month,
+                          **self.reports.expense_distribution(user_id, args.year, args.month))
+        return result
+
+    def cmd_backup(self, args) -> dict:
+        self.data_manager.create_backup_once()
+        return {"backup_dir": self.data_manager.backup_dir}
+
+    def cmd_compact(self, args) -> dict:
+        return self.data_manager.compact(backup_days=args.backup_days)
+
+    def cmd_archive(self, args) -> dict:
+        user_id = self.resolve_user(args.user)
+        archived = self.data_manager.archive_closed_years(user_id, before_year=args.before_year)
+        return {"user_id": user_id, "archived": archived,
+                "archived_years": self.data_manager.archived_years(user_id)}
+
+    def cmd_detect_recurring(self, args) -> dict:
+        from recurrence import RecurrenceDetector # only imported for this command
+        detector = RecurrenceDetector(self.data_manager)
+        if args.user:
+            user_id = self.resolve_user(args.user)
+            proposals = {user_id: detector.propose(user_id)}
+        else:
+            proposals = detector.propose_all(workers=args.workers)
+        if args.accept:
+            for user_id, rules in proposals.items():
+                if rules:
+                    detector.accept(user_id, rules)
+        return {"proposals": proposals, "accepted": args.accept}
+
+    def cmd_serve(self, args) -> dict:
+        from api import serve # asyncio server, only imported for this command
+        return serve(args.host, args.port, self.data_manager)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="Personal Finance Manager batch commands (JSON output).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="import transactions from a CSV file")
+    p.add_argument("--user", required=True, help="user name or user_id")
+    p.add_argument("--file", required=True, help="CSV file with the export columns")
+
+    p = sub.add_parser("export", help="export transactions (csv, ndjson or columnar)")
+    p.add_argument("--user", required=True, help="user name or user_id")
+    p.add_argument("--output", required=True, help="file to write (.gz compresses csv/ndjson)")
+    p.add_argument("--format", choices=["csv", "ndjson", "columnar"], help="default: guessed from --output")
+    p.add_argument("--from", dest="start", help="first date, dd/mm/YYYY")
+    p.add_argument("--to", dest="end", help="last date, dd/mm/YYYY")
+    p.add_argument("--category")
+    p.add_argument("--type", choices=["income", "expense"])
+
+    p = sub.add_parser("report", help="print a report as JSON")
+    reports = p.add_subparsers(dest="report", required=True)
+    r = reports.add_parser("monthly", help="income, expense and net for one month")
+    r.add_argument("--user", required=True)
+    r.add_argument("--year", type=int, required=True)
+    r.add_argument("--month", type=int, required=True, choices=range(1, 13), metavar="1-12")
+    for name, text in (("trends", "expenses per month"), ("summary", "all-time totals"),
+                       ("categories", "income and expense per category")):
+        reports.add_parser(name, help=text).add_argument("--user", required=True)
+    r = reports.add_parser("balance", help="balance at the end of a date (and net flow since --from)")
+    r.add_argument("--user", required=True)
+    r.add_argument("--date", required=True, help="dd/mm/YYYY")
+    r.add_argument("--from", dest="start", help="dd/mm/YYYY")
+    r = reports.add_parser("forecast", help="projected month-end balances")
+    r.add_argument("--user", required=True)
+    r.add_argument("--months", type=int, default=12)
+    r = reports.add_parser("distribution", help="median, p90 and p99 expense per category, and expense sizes")
+    r.add_argument("--user", required=True)
+    r.add_argument("--year", type=int)
+    r.add_argument("--month", type=int, choices=range(1, 13), metavar="1-12")
+
+    sub.add_parser("backup", help="copy users, manifest and shards into data/backup")
+
+    p = sub.add_parser("compact", help="rewrite shards compactly and clean up temp files and old backups")
+    p.add_argument("--backup-days", type=int, default=10, help="delete backups older than this")
+
+    p = sub.add_parser("archive", help="move closed years into compressed archive segments")
+    p.add_argument("--user", required=True, help="user name or user_id")
+    p.add_argument("--before-year", type=int, help="archive years before this one (default: the current year)")
+
+    p = sub.add_parser("detect-recurring", help="find repeating bills and income in the history")
+    p.add_argument("--user", help="user name or user_id (default: every user)")
+    p.add_argument("--workers", type=int, help="processes for all-user runs (default: PFM_DETECT_WORKERS or 1)")
+    p.add_argument("--accept", action="store_true", help="save every proposal as a recurring rule")
+
+    p = sub.add_parser("serve", help="run the local HTTP/JSON API until Ctrl+C")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    try:
+        # keep stdout clean for the JSON result; the managers' progress messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            cli = BatchCLI()
+            result = getattr(cli, f"cmd_{args.command.replace('-', '_')}")(args)
+        status = 0
+    except (BatchError, OSError) as e:
+        result, status = {"error": str(e)}, 1
+    result = {"command": args.command, **result, "elapsed_s": round(time.perf_counter() - start, 4)}
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str)) # Decimals become strings
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
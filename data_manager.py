@@ -1,10 +1,23 @@
 import json # built in library for handling JSON files
+import gzip # built in library for reading/writing .gz files
 import csv # built in library for handling CSV files
 import os # built in library for handling OS operations (files, folders, paths)
 import shutil # built in library for high-level file operations like copy, move, delete
-from dataclasses import field
+from contextlib import contextmanager
+from itertools import chain
+try:
+    import fcntl # advisory file locks between processes (POSIX only)
+except ImportError: # Windows: run without inter-process locking
+    fcntl = None
 from datetime import datetime, timedelta # built in library for date and time
-from decimal import Decimal
+from cache import SessionCache
+from oplog import OperationLog
+from indexes import UserIndex, day_of
+from models import Transaction
+from archive import YearArchive
+from goals import GoalStore
+from utils import currency_decimals, to_minor, from_minor
+from instrumentation import perf, timed
 
 class DataManager:
     """Handles reading and writing user and transaction data to JSON/CSV files."""
@@ -15,34 +28,79 @@ class DataManager:
         self.users_file = 'data/users.json'
         self.users_csv = 'data/users.csv'
         self.backup_dir = 'data/backup'
-        self.transactions_file = 'data/transactions.json'
+        self.transactions_file = 'data/transactions.json' # legacy single file, only read once to migrate into shards
         self.transactions_csv = 'data/transactions.csv'
+        self.goals_file = 'data/goals.json' # legacy goals file, only read once to migrate into goal stores
+        self.shards_dir = 'data/shards' # one folder per user_id: transactions.json/.csv and goals/
+        self.manifest_file = os.path.join(self.shards_dir, 'manifest.json')
+        self.lock_file = 'data/.lock' # advisory lock shared by every process using this data/ folder
+
+        # multi-process bookkeeping
+        self._lock_handle = None # open lock file while we hold the lock
+        self._lock_depth = 0 # re-entrant lock counter (flock would deadlock on a second fd in the same process)
+        self._pending = {} # user_id -> {transaction_id: "added"/"updated"/"removed"} not yet saved
+        self._manifest_stamp = None # (mtime_ns, size) of manifest.json when we last read or wrote it
+        self._users_stamp = None # same for users.json
+        self._decimals_by_user = {} # user_id -> minor-unit digits of the user's currency
+        self._data_versions = {} # user_id -> counter bumped on every change to the user's transactions
+        self._budgets = {} # user_id -> (file stamp, {category: monthly limit in minor units})
+        self.last_import_invalid = 0 # rows the last import_transactions_csv skipped for a bad amount
 
         # Ensure folders are present if not create them
         os.makedirs('data', exist_ok=True) # Ensure data directory exists
         os.makedirs(self.backup_dir, exist_ok=True) # Ensure backup directory exists
+        os.makedirs(self.shards_dir, exist_ok=True) # Ensure shards directory exists
 
-        # ensure transactions storage exists
-        if not os.path.exists(self.transactions_file):
-            with open(self.transactions_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=4)
+        self.manifest = self._load_manifest() # migrates the legacy single-file layout on first run
+        self.sessions = SessionCache() # logged-in users and their warm per-user indexes (one shard each)
+        self.oplog = OperationLog() # per-user undo/redo of this session's changes
+        # Old backups are cleaned up after the exit backup (create_backup_once), not here,
+        # so startup doesn't stat every file in data/backup
 
-        if not os.path.exists(self.transactions_csv):
-            with open(self.transactions_csv, 'w',newline= '', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'transaction_id','user_id','type', 'amount',
-                    'category', 'date', 'description','payment_method']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
+    # -----------------------------------------------------
+    # LOCKING & ATOMIC WRITES (private)
+    # -----------------------------------------------------
+    @contextmanager
+    def _locked(self):
+        """Hold the exclusive data/.lock advisory lock (re-entrant within this process)."""
+        if self._lock_depth == 0:
+            self._lock_handle = open(self.lock_file, 'a')
+            if fcntl is not None:
+                fcntl.flock(self._lock_handle, fcntl.LOCK_EX) # blocks until other processes finish writing
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_handle, fcntl.LOCK_UN)
+                self._lock_handle.close()
+                self._lock_handle = None
 
-        self.transactions = self.load_transactions()
-        # Clean up old backups on startup
-        self._cleanup_old_backups(days=10)
+    @contextmanager
+    def _atomic_open(self, path, newline=None):
+        """Write to a temp file and rename it over path, so readers never see a half-written file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', newline=newline, encoding='utf-8') as f:
+            yield f
+        os.replace(tmp_path, path)
+        perf.note_written(path)
+
+    @staticmethod
+    def _file_stamp(path):
+        """Return (mtime_ns, size) for change detection, or None if the file is missing."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
 
     # -----------------------------------------------------
     # LOAD USERS (from JSON)
     # -----------------------------------------------------
 
+    @timed()
     def load_users(self):
         """Load all users from the JSON file; return {} if missing or corrupted."""
         if not os.path.exists(self.users_file):
@@ -50,6 +108,8 @@ class DataManager:
 
         # Try to load JSON
         try:
+            self._users_stamp = self._file_stamp(self.users_file)
+            perf.note_read(self.users_file)
             with open(self.users_file, 'r', encoding='utf-8') as f: # Open user.json file in read mode using utf-8 encoding for special chars
                 return json.load(f) # Read JSON file and convert it to python dicts
 
@@ -61,38 +121,63 @@ class DataManager:
     # SAVE USERS (to both JSON and CSV)
     # -----------------------------------------------------
 
+    def users_changed(self):
+        """True if another process rewrote users.json since we last read or wrote it."""
+        return self._file_stamp(self.users_file) != self._users_stamp
+
+    @timed()
     def save_users(self, users):
-        """Write users data to both JSON and CSV files for persistence."""
-        # JSON saving
-        with open(self.users_file, 'w', encoding='utf-8') as f: # Open user.json file in write mode using utf-8 encoding for special chars
-            json.dump(users, f, indent=4, ensure_ascii=False) # Write python dicts to JSON file with pretty print indent of 4 spaces and ensure special chars are saved correctly
+        """Write users data to both JSON and CSV files for persistence.
+        Users created by other processes meanwhile are merged into `users` (in place) instead of being dropped."""
+        with self._locked():
+            if self.users_changed():
+                for user_id, user_data in self.load_users().items():
+                    users.setdefault(user_id, user_data)
 
-        # CSV saving
-        with open(self.users_csv, 'w', newline='', encoding='utf-8') as csvfile: # Open user.csv file in write mode using utf-8 encoding for special chars
-            fieldnames = ['user_id', 'name', 'password', 'currency']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            # JSON saving
+            with self._atomic_open(self.users_file) as f: # Open user.json file in write mode using utf-8 encoding for special chars
+                json.dump(users, f, indent=4, ensure_ascii=False) # Write python dicts to JSON file with pretty print indent of 4 spaces and ensure special chars are saved correctly
+
+            # CSV saving
+            with self._atomic_open(self.users_csv, newline='') as csvfile: # Open user.csv file in write mode using utf-8 encoding for special chars
+                fieldnames = ['user_id', 'name', 'password', 'currency']
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
 
-            writer.writeheader()  # Always write header
+                writer.writeheader()  # Always write header
 
-            # Write users (if any)
-            for user_data in users.values():
-                writer.writerow(user_data)
+                # Write users (if any)
+                for user_data in users.values():
+                    writer.writerow(user_data)
+            self._users_stamp = self._file_stamp(self.users_file)
+            self._decimals_by_user = {} # new users or currencies: read again on next use
 
     # Backup once function
+    @timed()
     def create_backup_once(self):
-        """Create timestamped backups for users and transactions files."""
+        """Create timestamped backups for users, the shard manifest and every user's shard files,
+        then delete backups older than 10 days."""
         self._backup_file(self.users_file)
         self._backup_file(self.users_csv)
-        self._backup_file(self.transactions_file)
-        self._backup_file(self.transactions_csv)
+        self._backup_file(self.manifest_file)
+        for user_id in os.listdir(self.shards_dir):
+            if not os.path.isdir(os.path.join(self.shards_dir, user_id)):
+                continue
+            for name in ('transactions.json', 'transactions.csv', 'recurring.json', 'budgets.json'):
+                # shard files share base names, so prefix the user_id ex: "0f765791_transactions.json"
+                self._backup_file(self._shard_path(user_id, name), f"{user_id}_{name}")
+            goals = GoalStore(self._shard_path(user_id, 'goals'))
+            for name in goals.files():
+                self._backup_file(os.path.join(goals.folder, name), f"{user_id}_goal_{name}")
+            self._backup_archive(user_id)
+        self._cleanup_old_backups(days=10)
 
     # -----------------------------------------------------
     # BACKUP HELPER (private)
     # -----------------------------------------------------
-    def _backup_file(self, file_path):
+    def _backup_file(self, file_path, base_name=None):
         """Private helper to copy a file into the backup directory with a timestamp."""
         if os.path.exists(file_path):
-            base_name = os.path.basename(file_path)  # Extracts filename from full path ex: get "users.json"
+            base_name = base_name or os.path.basename(file_path)  # Extracts filename from full path ex: get "users.json"
 
             # Add timestamp to backup name
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S') #  Format datetime as string ex: "20251019_143045"
@@ -101,10 +186,25 @@ class DataManager:
 
             try:
                 shutil.copy(file_path, backup_path) # Copies a file: copying original file to backup file
+                perf.note_written(backup_path)
             # Catch any error message
             except Exception as e:
                 print(f"⚠️ Backup failed: {e}")
 
+    def _backup_archive(self, user_id):
+        """Archive segments never change, so each one is copied once (to backup/archive/<user_id>/),
+        while the small summary gets a timestamped copy like the other files."""
+        archive = self._archive(user_id)
+        if not archive.exists():
+            return
+        self._backup_file(archive.summary_path, f"{user_id}_archive_summary.json")
+        target = os.path.join(self.backup_dir, 'archive', user_id)
+        os.makedirs(target, exist_ok=True)
+        for name in archive.segment_files():
+            if not os.path.exists(os.path.join(target, name)):
+                shutil.copy(os.path.join(archive.folder, name), os.path.join(target, name))
+                perf.note_written(os.path.join(target, name))
+
     # -----------------------------------------------------
     # CLEANUP BACKUP HELPER (private)
     # -----------------------------------------------------
@@ -137,158 +237,814 @@ class DataManager:
             print(f"⚠️ Backup cleanup failed: {e}")
 
 
-    def load_transactions(self) -> list[dict]:
-        """Load all transaction records from the JSON file and ensure valid Decimal amounts."""
+    # -----------------------------------------------------
+    # SHARDED STORAGE (one folder per user + manifest)
+    # -----------------------------------------------------
+    def _shard_path(self, user_id, name):
+        """Return the path of a file inside a user's shard folder ex: data/shards/<user_id>/goals.json."""
+        return os.path.join(self.shards_dir, user_id, name)
+
+    def _read_manifest_file(self):
+        """Return the manifest on disk (recording its stamp), or None if missing/corrupted."""
+        stamp = self._file_stamp(self.manifest_file)
+        perf.note_read(self.manifest_file)
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if isinstance(manifest, dict) and isinstance(manifest.get('users'), dict):
+            self._manifest_stamp = stamp
+            return manifest
+        return None
+
+    def _load_manifest(self):
+        """Read the shard manifest, migrating the legacy single-file layout if there is none yet."""
+        with self._locked(): # another process may be migrating at the same time
+            if os.path.exists(self.manifest_file):
+                manifest = self._read_manifest_file()
+                if manifest is not None:
+                    return manifest
+                print("⚠️ Could not read shards/manifest.json - rebuilding it from the shard folders")
+                return self._rebuild_manifest()
+            return self._migrate_legacy_files()
+
+    def _save_manifest(self, user_id=None):
+        """Write the (small) manifest file.
+        With user_id, only that user's entry is ours: other users' entries are taken from disk,
+        so concurrent sessions don't roll back each other's revisions."""
+        with self._locked():
+            to_write = self.manifest
+            if user_id is not None:
+                disk = self._read_manifest_file()
+                if disk is not None:
+                    self._adopt_manifest(disk, own_user_id=user_id)
+                    disk['users'][user_id] = self.manifest['users'][user_id]
+                    disk['next_transaction_number'] = self.manifest['next_transaction_number']
+                    to_write = disk
+            with self._atomic_open(self.manifest_file) as f:
+                json.dump(to_write, f, ensure_ascii=False, indent=4)
+            self._manifest_stamp = self._file_stamp(self.manifest_file)
+
+    def _adopt_manifest(self, disk, own_user_id=None):
+        """Merge a manifest read from disk into self.manifest.
+        Users whose revision moved get their cached index dropped (reloaded lazily). Users with
+        unsaved local changes keep their old revision so save_user_transactions notices and merges."""
+        for user_id, entry in disk['users'].items():
+            if user_id == own_user_id:
+                continue
+            known = self.manifest['users'].get(user_id)
+            if known is not None and known.get('revision') == entry.get('revision'):
+                continue
+            if self._pending.get(user_id):
+                continue
+            self.sessions.discard_index(user_id)
+            self._bump_version(user_id)
+            self.manifest['users'][user_id] = entry
+        self.manifest['next_transaction_number'] = max(disk['next_transaction_number'],
+                                                       self.manifest['next_transaction_number'])
+
+    @timed()
+    def refresh(self):
+        """Pick up changes other processes made since we last looked.
+        Costs one stat() when nothing changed; otherwise only the shards whose revision moved
+        are dropped from the cache and reloaded lazily."""
+        if self._file_stamp(self.manifest_file) == self._manifest_stamp:
+            return
+        disk = self._read_manifest_file()
+        if disk is not None:
+            self._adopt_manifest(disk)
+
+    def _rebuild_manifest(self):
+        """Recreate the manifest by scanning the shard folders."""
+        self.manifest = {'format': 1, 'next_transaction_number': 1, 'users': {}}
+        for user_id in sorted(os.listdir(self.shards_dir)):
+            if os.path.isdir(os.path.join(self.shards_dir, user_id)):
+                txs = self.load_user_transactions(user_id)
+                self._register_shard(user_id, txs)
+        self._save_manifest()
+        return self.manifest
+
+    def _migrate_legacy_files(self):
+        """Split data/transactions.json and data/goals.json into per-user shards (first run only).
+        The legacy files are left in place untouched."""
+        self.manifest = {'format': 1, 'next_transaction_number': 1, 'users': {}}
+        legacy = self._read_json_list(self.transactions_file) if os.path.exists(self.transactions_file) else []
+        by_user = {}
+        invalid = 0
+        for t in legacy:
+            user_id = str(t.get('user_id') or '')
+            try:
+                by_user.setdefault(user_id, []).append(Transaction.from_dict(t, self.currency_decimals(user_id)))
+            except (ValueError, ArithmeticError):
+                invalid += 1
+        if invalid:
+            print(f"⚠️ Skipped {invalid} legacy transaction(s) with an invalid amount (still in {self.transactions_file})")
+        for user_id, txs in by_user.items():
+            self.save_user_transactions(user_id, txs, update_manifest=False)
+            self._register_shard(user_id, txs)
+
+        # Legacy goals keyed by user_id move into the users' goal stores; an old flat list is
+        # picked up by each user's store on first use (see _goals)
+        legacy_goals = self._read_legacy_goals()
+        if isinstance(legacy_goals, dict):
+            for user_id, goals in legacy_goals.items():
+                if isinstance(goals, list):
+                    GoalStore(self._shard_path(user_id, 'goals')).migrate(goals)
+
+        self._save_manifest()
+        if legacy:
+            print(f"📦 Migrated {len(legacy)} transaction(s) into {len(by_user)} user shard(s)")
+        return self.manifest
+
+    def _register_shard(self, user_id, txs):
+        """Record a shard's row count in the manifest and keep the transaction ID counter ahead of it."""
+        entry = self.manifest['users'].setdefault(user_id, {'count': 0, 'revision': 0})
+        entry['count'] = len(txs)
+        entry['revision'] += 1
+        for t in txs:
+            self._bump_transaction_number(t.transaction_id)
+
+    def _bump_transaction_number(self, transaction_id):
+        """Make sure next_transaction_number is above an existing TXN### id."""
+        if transaction_id.startswith("TXN"):
+            try:
+                num = int(transaction_id[3:])
+            except ValueError:
+                return
+            if num >= self.manifest['next_transaction_number']:
+                self.manifest['next_transaction_number'] = num + 1
+
+    def next_transaction_id(self) -> str:
+        """Reserve and return the next sequential transaction ID in the format TXN###.
+        The counter lives in the manifest, so no shard has to be scanned."""
+        if self._lock_depth == 0 and hasattr(self, 'sessions'):
+            self.refresh() # another session may have used some numbers meanwhile
+        num = self.manifest['next_transaction_number']
+        self.manifest['next_transaction_number'] = num + 1
+        return f"TXN{num:03d}"
+
+    def _read_json_list(self, path) -> list[dict]:
+        """Read a JSON file holding a list of objects; [] if missing or unreadable."""
+        perf.note_read(path)
         try:
-            with open(self.transactions_file, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 if isinstance(data, list):
-                    for t in data:
-                        if 'amount' in t:
-                            try:
-                                # Convert any numeric or string type to Decimal safely
-                                t['amount'] = Decimal(str(t['amount']))
-                            except Exception:
-                                t['amount'] = Decimal('0')
-                    return data
+                    return [t for t in data if isinstance(t, dict)]
                 else:
-                    print("⚠️ transactions.json is not a list.")
+                    print(f"⚠️ {path} is not a list.")
                     return []
-        except (FileNotFoundError, json.JSONDecodeError):
-            print("⚠️ Could not read transactions.json")
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            print(f"⚠️ Could not read {path}")
             return []
 
+    def currency_decimals(self, user_id) -> int:
+        """Minor-unit digits for the user's currency (2 when the user is unknown)."""
+        if user_id not in self._decimals_by_user or self.users_changed():
+            self._decimals_by_user = {uid: currency_decimals(u.get('currency', 'USD'))
+                                      for uid, u in self.load_users().items()}
+            # remember unknown ids too, so orphaned rows don't re-read users.json one by one
+            self._decimals_by_user.setdefault(user_id, 2)
+        return self._decimals_by_user[user_id]
+
+    @timed()
+    def load_user_transactions(self, user_id) -> list[Transaction]:
+        """Load one user's transactions from their shard (the only file that is read).
+        Amounts are converted to integer minor units once, here."""
+        decimals = self.currency_decimals(user_id)
+        return [Transaction.from_dict(t, decimals)
+                for t in self._read_json_list(self._shard_path(user_id, 'transactions.json'))]
+
+    def _iter_shard(self, user_id):
+        """Yield one user's transactions straight from their shard file, one record at a time.
+        Shards are written one record per line; older pretty-printed files are loaded whole instead."""
+        decimals = self.currency_decimals(user_id)
+        path = self._shard_path(user_id, 'transactions.json')
+        if not os.path.exists(path):
+            return
+        yielded = False
+        perf.note_read(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip().rstrip(',')
+                if not line.startswith('{'):
+                    continue # "[" / "]" lines
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    if yielded:
+                        raise
+                    break # not one-record-per-line: fall back below
+                yielded = True
+                yield Transaction.from_dict(record, decimals)
+        if not yielded:
+            yield from self.load_user_transactions(user_id)
+
+    def iter_transactions(self, user_id, start=None, end=None, category=None, t_type=None):
+        """Yield the user's transactions that match the optional filters, without building a list.
+        start/end are datetime.date (inclusive), category is matched case-insensitively, t_type is income/expense.
+        Archived years that overlap [start, end] are streamed first, segment by segment; then the hot rows
+        come from the cached index when the user is loaded, otherwise straight from their shard on disk."""
+        self.refresh()
+        index = self.sessions.peek_index(user_id)
+        hot = index.transactions if index is not None else self._iter_shard(user_id)
+        archived = self._archive(user_id).iter_rows(self.currency_decimals(user_id),
+                                                     start.year if start else None, end.year if end else None)
+        category = category.casefold() if category else None
+        for t in chain(archived, hot):
+            if t_type and t.type != t_type:
+                continue
+            if category and t.category.casefold() != category:
+                continue
+            if start or end:
+                d = day_of(t.date)
+                if d is None or (start and d < start) or (end and d > end):
+                    continue
+            yield t
+
+    @timed()
+    def load_transactions(self) -> list[Transaction]:
+        """Load all transaction records from every user's shard."""
+        transactions = []
+        for user_id in self.manifest['users']:
+            transactions.extend(self.get_transactions(user_id))
+        return transactions
+
     def get_transactions(self, user_id):
-        """Return all transactions that belong to a specific user ID."""
-        if not hasattr(self, 'transactions'):
-            return []
-        return [t for t in self.transactions if t.get('user_id') == user_id]
+        """Return all transactions that belong to a specific user ID.
+        The list is owned by the user's index: read it, don't mutate it."""
+        return self.user_index(user_id).transactions
 
-    def save_transactions(self, transactions: list[dict]) -> None:
-        """Persist all transactions to JSON and CSV, converting Decimals to strings."""
-        # Convert Decimals to strings so JSON/CSV can handle them
-        serializable_transactions = []
-        for t in transactions:
-            t_copy = t.copy()
-            if isinstance(t_copy.get("amount"), Decimal):
-                t_copy["amount"] = str(t_copy["amount"])
-            serializable_transactions.append(t_copy)
-            # ---- Save as JSON ----
-        with open(self.transactions_file, 'w', encoding='utf-8') as f:
-            json.dump(serializable_transactions, f, ensure_ascii=False, indent=4)
+    # -----------------------------------------------------
+    # PER-USER INDEXES (kept warm by the session cache)
+    # -----------------------------------------------------
+    @timed()
+    def user_index(self, user_id) -> UserIndex:
+        """Return the user's UserIndex, loading their shard on a cache miss.
+        Shards changed by another process are reloaded first (see refresh)."""
+        self.refresh()
+        index = self.sessions.get_index(user_id)
+        if index is None:
+            index = self._new_index(user_id, self.load_user_transactions(user_id))
+            self._set_index(user_id, index)
+        return index
+
+    def _new_index(self, user_id, transactions):
+        """Build a UserIndex over the user's hot rows, seeded with their archive summary (if any)."""
+        return UserIndex(user_id, transactions, self.currency_decimals(user_id), self._archive(user_id).load_summary(),
+                         self._goal_links(user_id))
+
+    def _set_index(self, user_id, index):
+        """Cache a (re)built index for the user; its contents may differ, so the data version moves."""
+        self.sessions.set_index(user_id, index)
+        self._bump_version(user_id)
+
+    def _bump_version(self, user_id):
+        self._data_versions[user_id] = self._data_versions.get(user_id, 0) + 1
+
+    def data_version(self, user_id) -> int:
+        """Return a number that changes whenever the user's transactions may have changed
+        (adds, edits, deletes, imports, reloads after another process saved). Used to key report caches."""
+        self.refresh()
+        return self._data_versions.get(user_id, 0)
+
+    def find_transaction(self, transaction_id, user_id=None):
+        """Return the Transaction with this ID, or None.
+        Looks in user_id's shard when given, otherwise in every shard."""
+        user_ids = [user_id] if user_id else list(self.manifest['users'])
+        for uid in user_ids:
+            t = self.user_index(uid).by_id.get(transaction_id)
+            if t is not None:
+                return t
+        return None
+
+    def _mark_pending(self, user_id, transaction_id, change):
+        """Remember an unsaved change so it can be replayed onto a shard another process rewrote."""
+        pending = self._pending.setdefault(user_id, {})
+        previous = pending.get(transaction_id)
+        if previous == "added" and change == "removed":
+            del pending[transaction_id] # never reached the disk
+        elif previous != "added":
+            pending[transaction_id] = change
+
+    def transaction_added(self, t: Transaction):
+        """Append a new transaction to its owner's shard in memory (call save_user_transactions to persist)."""
+        index = self.user_index(t.user_id)
+        if t.transaction_id in index.by_id: # another session saved this ID meanwhile
+            t.transaction_id = self.next_transaction_id()
+        index.add(t)
+        self._mark_pending(t.user_id, t.transaction_id, "added")
+        self._bump_version(t.user_id)
+        self.oplog.note_added(t)
+
+    def transaction_updated(self, before: Transaction, t: Transaction):
+        """Keep the owner's index in sync after a transaction was edited in place."""
+        self.user_index(t.user_id).update(before, t)
+        self._mark_pending(t.user_id, t.transaction_id, "updated")
+        self._bump_version(t.user_id)
+        self.oplog.note_updated(before, t)
+
+    def transaction_replaced(self, old: Transaction, new: Transaction):
+        """Swap a transaction for an edited copy in its owner's index (readers holding old snapshots keep `old`)."""
+        self.user_index(new.user_id).replace(old, new)
+        self._mark_pending(new.user_id, new.transaction_id, "updated")
+        self._bump_version(new.user_id)
+        self.oplog.note_updated(old, new)
+
+    def transaction_removed(self, t: Transaction):
+        """Remove a transaction from its owner's shard in memory (call save_user_transactions to persist)."""
+        self.user_index(t.user_id).remove(t)
+        self._mark_pending(t.user_id, t.transaction_id, "removed")
+        self._bump_version(t.user_id)
+        self.oplog.note_removed(t)
+
+    def transactions_updated(self, user_id, pairs):
+        """Bulk form of transaction_updated: `pairs` is a list of (before copy, edited record) of one user."""
+        self.user_index(user_id).update_many(pairs)
+        with self.oplog.record(user_id, "edit"):
+            for before, t in pairs:
+                self._mark_pending(user_id, t.transaction_id, "updated")
+                self.oplog.note_updated(before, t)
+        self._bump_version(user_id)
+
+    def transactions_removed(self, user_id, records):
+        """Bulk form of transaction_removed for many records of one user (one pass over the shard)."""
+        self.user_index(user_id).remove_many(records)
+        with self.oplog.record(user_id, "delete"):
+            for t in records:
+                self._mark_pending(user_id, t.transaction_id, "removed")
+                self.oplog.note_removed(t)
+        self._bump_version(user_id)
+
+    # ---------------- undo / redo ----------------
+    def undo(self, user_id: str):
+        """Revert the user's most recent change of this session. Returns the undone Operation, or None.
+        Only the records the change touched are replayed in memory; the shard is then saved once, like any edit."""
+        op = self.oplog.pop_undo(user_id)
+        if op is not None:
+            self._replay(op.inverse())
+        return op
+
+    def redo(self, user_id: str):
+        """Re-apply the most recently undone change. Returns the Operation, or None."""
+        op = self.oplog.pop_redo(user_id)
+        if op is not None:
+            self._replay(op)
+        return op
+
+    def _replay(self, op):
+        """Apply an Operation to its user's shard without recording it again.
+        Records another session deleted meanwhile are skipped; re-added records go to the end of the shard.
+        Index updates follow the size of the operation, but saving rewrites the whole shard (as every edit does);
+        an operation that only changed goals rewrites just those goal files."""
+        user_id = op.user_id
+        self.oplog.paused = True
+        try:
+            with self._locked():
+                self._merge_external_changes(user_id)
+                by_id = self.user_index(user_id).by_id
+                gone = [by_id[t.transaction_id] for t in op.removed if t.transaction_id in by_id]
+                if gone:
+                    self.transactions_removed(user_id, gone)
+                for t in op.added:
+                    if t.transaction_id not in by_id:
+                        self.transaction_added(t)
+                pairs = []
+                for _, values in op.updated:
+                    t = by_id.get(values.transaction_id)
+                    if t is not None:
+                        before = t.copy()
+                        t.assign(values)
+                        pairs.append((before, t))
+                if pairs:
+                    self.transactions_updated(user_id, pairs)
+                if gone or op.added or pairs:
+                    self.save_user_transactions(user_id)
+                if op.goals:
+                    store, index = self._goals(user_id), self.user_index(user_id)
+                    for goal_id, (_, goal) in op.goals.items():
+                        store.save(goal) if goal is not None else store.delete(goal_id)
+                        index.link_goal(goal_id, goal.get("contributions", []) if goal is not None else [])
+                    self._bump_version(user_id)
+        finally:
+            self.oplog.paused = False
+
+    def _merge_external_changes(self, user_id):
+        """If another process saved this user's shard since we loaded it, reload it from disk
+        and replay our unsaved changes on top (call with the lock held)."""
+        disk = self._read_manifest_file()
+        if disk is None:
+            return
+        self._adopt_manifest(disk, own_user_id=user_id)
+        disk_entry = disk['users'].get(user_id)
+        known = self.manifest['users'].get(user_id)
+        if disk_entry is None or (known is not None and known.get('revision') == disk_entry.get('revision')):
+            return
+
+        ours = self.user_index(user_id).by_id
+        merged = self.load_user_transactions(user_id)
+        positions = {t.transaction_id: i for i, t in enumerate(merged)}
+        for transaction_id, change in self._pending.get(user_id, {}).items():
+            pos = positions.get(transaction_id)
+            if change == "removed":
+                if pos is not None:
+                    merged[pos] = None
+            elif change == "updated":
+                if pos is not None: # edited here, deleted there: the delete wins
+                    merged[pos] = ours[transaction_id]
+            else: # added: renumber if the other process used the same ID
+                t = ours[transaction_id]
+                if pos is not None:
+                    t.transaction_id = self.next_transaction_id()
+                merged.append(t)
+        merged = [t for t in merged if t is not None]
+
+        self.manifest['users'][user_id] = disk_entry
+        self._set_index(user_id, self._new_index(user_id, merged))
+        print("🔄 Merged changes saved by another session.")
+
+    @timed()
+    def save_user_transactions(self, user_id: str, transactions: list[Transaction] = None, update_manifest=True) -> None:
+        """Persist one user's shard to JSON and CSV (amounts written as decimal strings).
+        Other users' files are not touched."""
+        with self._locked():
+            if transactions is None:
+                self._merge_external_changes(user_id) # never clobber another session's writes
+                transactions = self.get_transactions(user_id)
+            self._write_shard(user_id, transactions)
+            if update_manifest:
+                self._register_shard(user_id, transactions)
+                self._save_manifest(user_id)
+            self._pending.pop(user_id, None)
+
+    def _write_shard(self, user_id, transactions):
+        """Write one user's transactions.json and transactions.csv (atomically).
+        Records serialise themselves from their slots; no per-row dict copies are made."""
+        os.makedirs(os.path.join(self.shards_dir, user_id), exist_ok=True)
+            # ---- Save as JSON (one record per line) ----
+        with self._atomic_open(self._shard_path(user_id, 'transactions.json')) as f:
+            f.write("[")
+            for i, t in enumerate(transactions):
+                f.write(",\n    " if i else "\n    ")
+                f.write(t.to_json())
+            f.write("\n]\n" if transactions else "]\n")
             # ---- Save as CSV ----
-        fieldnames = [
-            'transaction_id', 'user_id', 'type', 'amount',
-            'category', 'date', 'description', 'payment_method'
-        ]
-        with open(self.transactions_csv, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for t in serializable_transactions:
-                row = {
-                    'transaction_id': t.get('transaction_id', ''),
-                    'user_id': t.get('user_id', ''),
-                    'type': t.get('type', ''),
-                    'amount': t.get('amount', ''),  # already string
-                    'category': t.get('category', ''),
-                    'date': t.get('date', ''),
-                    'description': t.get('description', ''),
-                    'payment_method': t.get('payment_method', '')
-                }
-                writer.writerow(row)
-        self.transactions = self.load_transactions()
+        with self._atomic_open(self._shard_path(user_id, 'transactions.csv'), newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(Transaction.FIELDS)
+            writer.writerows(t.as_row() for t in transactions)
+
+    @timed()
+    def save_transactions(self, transactions: list[Transaction]) -> None:
+        """Persist a full list of transactions, rewriting the shard of every user that appears in it."""
+        by_user = {}
+        for t in transactions:
+            by_user.setdefault(t.user_id, []).append(t)
+        for user_id, txs in by_user.items():
+            self._set_index(user_id, self._new_index(user_id, txs))
+            self.save_user_transactions(user_id, txs)
 
     # --------- Advanced features csv import/export ----------------
+    @timed()
     def export_transactions_csv(self, user_id: str, tx_list: list, path: str):
         """Export given user's transactions into a CSV file at the specified path."""
-        fieldnames = ["transaction_id", "user_id", "type", "amount", "category", "date", "description",
-                      "payment_method"]
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
         with open(path, "w", newline="", encoding="utf-8") as f:
-            import csv
-            w = csv.DictWriter(f, fieldnames=fieldnames)
-            w.writeheader()
-            for t in tx_list:
-                if t.get("user_id") != user_id:
-                    continue
-                row = {k: t.get(k, "") for k in fieldnames}
-                w.writerow(row)
+            w = csv.writer(f)
+            w.writerow(Transaction.FIELDS)
+            w.writerows(t.as_row() for t in tx_list if t.user_id == user_id)
+        perf.note_written(path)
+
+    @timed()
+    def stream_export_csv(self, user_id: str, path: str, start=None, end=None, category=None, t_type=None,
+                          compress=None) -> int:
+        """Stream the user's (filtered) transactions into a CSV file, one row at a time.
+        Writes gzip when compress is True or the path ends with .gz. Returns the number of rows written."""
+        if compress is None:
+            compress = path.endswith(".gz")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        opener = gzip.open if compress else open
+        count = 0
+        with opener(path, "wt", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(Transaction.FIELDS)
+            for t in self.iter_transactions(user_id, start, end, category, t_type):
+                w.writerow(t.as_row())
+                count += 1
+        perf.note_written(path)
+        return count
 
+    @timed()
     def import_transactions_csv(self, user_id: str, path: str) -> int:
-        """Import transactions from a CSV file, skipping duplicates by (date, amount, category)."""
+        """Import transactions from a CSV file, skipping duplicates by (date, amount, category)
+        and rows whose amount isn't a finite number (counted in self.last_import_invalid and reported)."""
         if not os.path.exists(path):
             print(f"❌ File not found: {path}")
             return 0
         added = 0
-        with open(path, "r", newline="", encoding="utf-8") as f:
-            import csv
+        invalid = []
+        perf.note_read(path)
+        with self.oplog.record(user_id, "import"), open(path, "r", newline="", encoding="utf-8") as f:
             r = csv.DictReader(f)
-            # Load current
-            try:
-                txs = self.load_transactions()
-            except Exception:
-                txs = []
-            existing_keys = {(t.get("user_id"), str(t.get("date")), str(t.get("amount")), t.get("category")) for t in
-                             txs}
+            # Only this user's shard is read and rewritten
+            index = self.user_index(user_id)
+            unusual = []
+            existing_keys = {(t.date, t.minor, t.category) for t in index.transactions}
+            decimals = self.currency_decimals(user_id)
+            archive = self._archive(user_id)
+            archived_years = set(archive.years()) # their keys are streamed in only when an imported row needs them
             # Append new
             for row in r:
-                key = (user_id, row.get("date", ""), row.get("amount", ""), row.get("category", ""))
+                row["user_id"] = user_id
+                try:
+                    t = Transaction.from_dict(row, decimals) # amount parsed to minor units once, here
+                except (ValueError, ArithmeticError):
+                    invalid.append(r.line_num)
+                    continue
+                key = (t.date, t.minor, t.category)
+                d = day_of(t.date)
+                if d is not None and d.year in archived_years:
+                    archived_years.discard(d.year)
+                    existing_keys.update((a.date, a.minor, a.category)
+                                         for a in archive.iter_rows(decimals, d.year, d.year))
                 if key in existing_keys:
                     continue
-                row["user_id"] = user_id
-                txs.append(row)
+                if not t.transaction_id:
+                    t.transaction_id = self.next_transaction_id()
+                self._bump_transaction_number(t.transaction_id)
+                if index.unusual_expense(t): # O(1) per row against running per-category statistics
+                    unusual.append(t)
+                self.transaction_added(t)
                 added += 1
-        self.save_transactions(txs)
+        self.save_user_transactions(user_id)
+        self.last_import_invalid = len(invalid)
+        if invalid:
+            lines = ", ".join(str(n) for n in invalid[:10]) + (", ..." if len(invalid) > 10 else "")
+            print(f"⚠️ Skipped {len(invalid)} row(s) with an invalid amount (line {lines})")
+        if unusual:
+            print(f"⚠️ {len(unusual)} imported expense(s) look unusually large for their category:")
+            for t in unusual[:5]:
+                print(f"   {t.transaction_id} {t.date} {t.category}: {t.amount}")
         return added
 
 
+    # --------- Year archive (cold storage) ----------------
+    def _archive(self, user_id) -> YearArchive:
+        return YearArchive(os.path.join(self.shards_dir, user_id, 'archive'))
+
+    def archived_years(self, user_id) -> list:
+        """Years of the user's history that live in the archive, oldest first."""
+        return self._archive(user_id).years()
+
+    @timed()
+    def archive_closed_years(self, user_id: str, before_year: int = None) -> dict:
+        """Move the user's rows dated before `before_year` (default: the current year) out of the hot shard
+        into one compressed archive segment per year. Returns {year: rows archived}.
+        Segments and the summary are written before the shard is rewritten, so an interruption can
+        at worst leave rows in both places, never lose them."""
+        before_year = before_year or datetime.now().year
+        with self._locked():
+            self._merge_external_changes(user_id)
+            hot, by_year = [], {}
+            for t in self.get_transactions(user_id):
+                d = day_of(t.date)
+                if d is not None and d.year < before_year:
+                    by_year.setdefault(d.year, []).append(t)
+                else:
+                    hot.append(t) # current period, or a date we can't place in a year
+            if not by_year:
+                return {}
+            archive = self._archive(user_id)
+            for year, rows in sorted(by_year.items()):
+                archive.add_year(year, rows)
+            self._move_goal_contributions(user_id, chain.from_iterable(by_year.values()), 1)
+            self._set_index(user_id, self._new_index(user_id, hot))
+            self.save_user_transactions(user_id)
+        return {year: len(rows) for year, rows in sorted(by_year.items())}
+
+    @timed()
+    def restore_archived_year(self, user_id: str, year: int) -> int:
+        """Move an archived year back into the hot shard (so its rows can be edited again). Returns the row count."""
+        with self._locked():
+            self._merge_external_changes(user_id)
+            archive = self._archive(user_id)
+            rows = list(archive.iter_rows(self.currency_decimals(user_id), year, year))
+            if not rows:
+                return 0
+            self._move_goal_contributions(user_id, rows, -1)
+            hot = list(self.get_transactions(user_id)) + rows
+            self.save_user_transactions(user_id, hot, update_manifest=False) # rows are on disk in both places...
+            archive.remove_year(year) # ...until the archive lets go of them
+            self._set_index(user_id, self._new_index(user_id, hot))
+            self._register_shard(user_id, hot)
+            self._save_manifest(user_id)
+        return len(rows)
+
+    def _move_goal_contributions(self, user_id, rows, sign):
+        """Book linked savings contributions leaving (sign=1) or coming back to (sign=-1) the hot rows
+        in their goal's "archived" total, so the goal's progress doesn't change. Only touched goals are rewritten."""
+        index = self.user_index(user_id)
+        moved = {}
+        for t in rows:
+            goal_id = index.goal_links.get(t.transaction_id)
+            if goal_id is not None and index.is_contribution(t):
+                moved[goal_id] = moved.get(goal_id, 0) + t.minor * sign
+        store = self._goals(user_id)
+        for goal_id, minor in moved.items():
+            goal = store.load(goal_id)
+            if goal is not None:
+                goal["archived"] = str(from_minor(to_minor(goal.get("archived", "0"), index.decimals) + minor, index.decimals))
+                store.save(goal)
+
+    # --------- Maintenance ----------------
+    @timed()
+    def compact(self, backup_days=10) -> dict:
+        """Rewrite every shard in the current one-record-per-line format, drop duplicate transaction IDs,
+        delete leftover *.tmp files from interrupted writes and backups older than backup_days.
+        Returns counts and the shards' total size before and after."""
+        stats = {"users": 0, "transactions": 0, "duplicates_removed": 0, "tmp_files_removed": 0,
+                 "bytes_before": 0, "bytes_after": 0}
+
+        def shard_bytes():
+            total = 0
+            for root, _, files in os.walk(self.shards_dir):
+                total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+            return total
+
+        with self._locked():
+            self.refresh()
+            stats["bytes_before"] = shard_bytes()
+            for root, _, files in os.walk(self.shards_dir):
+                for name in files:
+                    if name.endswith('.tmp'):
+                        os.remove(os.path.join(root, name))
+                        stats["tmp_files_removed"] += 1
+
+            for user_id in list(self.manifest['users']):
+                txs = self.get_transactions(user_id)
+                seen = set()
+                kept = [t for t in txs if not (t.transaction_id in seen or seen.add(t.transaction_id))]
+                if len(kept) != len(txs):
+                    stats["duplicates_removed"] += len(txs) - len(kept)
+                    self._set_index(user_id, self._new_index(user_id, kept))
+                self.save_user_transactions(user_id)
+                stats["users"] += 1
+                stats["transactions"] += len(kept)
+            stats["bytes_after"] = shard_bytes()
+
+        self._cleanup_old_backups(days=backup_days)
+        return stats
+
     #--------------- load/save goals --------------
+    def _read_legacy_goals(self):
+        """Return the parsed legacy data/goals.json (list or dict), or None."""
+        if not os.path.exists(self.goals_file):
+            return None
+        perf.note_read(self.goals_file)
+        try:
+            with open(self.goals_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _old_goals(self, user_id: str) -> list:
+        """The user's goals in the old list format: their shard's goals.json, else the legacy
+        data/goals.json (a flat list is returned as is, a dict returns dict[user_id] or [])."""
+        path = self._shard_path(user_id, "goals.json")
+        data = None
+        if os.path.exists(path):
+            perf.note_read(path)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                return []
+        else:
+            data = self._read_legacy_goals()
+            if isinstance(data, dict):
+                data = data.get(user_id, [])
+        return data if isinstance(data, list) else []
+
+    def _goals(self, user_id: str) -> GoalStore:
+        """The user's goal store (data/shards/<user_id>/goals/), created from their old goals on first use.
+        The old files are left in place untouched."""
+        store = GoalStore(self._shard_path(user_id, "goals"))
+        if not store.exists():
+            with self._locked():
+                if not store.exists():
+                    store.migrate(self._old_goals(user_id))
+        return store
+
+    def _goal_links(self, user_id: str) -> dict:
+        """transaction_id -> goal_id for every contribution linked to one of the user's goals."""
+        return {transaction_id: goal["goal_id"] for goal in self._goals(user_id).load_all()
+                for transaction_id in goal.get("contributions", [])}
+
+    @timed()
     def load_goals(self, user_id: str) -> list:
-        """Load saving goals for a specific user_id from goals.json.
-        Backward compatible: if file contains a flat list, return it; otherwise, return dict[user_id] or []."""
-        path = "data/goals.json"
+        """Return the user's saving goals (oldest first) with their progress in "saved" (a decimal string):
+        the opening amount, plus linked contributions in the archive, plus linked contributions in the
+        hot rows (read from the index, so edits and deletes of a contribution are reflected)."""
+        index = self.user_index(user_id)
+        goals = self._goals(user_id).load_all()
+        links = {transaction_id: goal["goal_id"] for goal in goals for transaction_id in goal.get("contributions", [])}
+        if links != index.goal_links: # a goal was changed by another process
+            for goal in goals:
+                index.link_goal(goal["goal_id"], goal.get("contributions", []))
+        for goal in goals:
+            saved = (to_minor(goal.get("opening", "0"), index.decimals) + to_minor(goal.get("archived", "0"), index.decimals)
+                     + index.goal_sums.get(goal["goal_id"], 0))
+            goal["saved"] = str(from_minor(saved, index.decimals))
+        return goals
+
+    @timed()
+    def save_goal(self, user_id: str, goal: dict):
+        """Persist one goal (new or changed). Only that goal's file is rewritten; "saved" is derived and not stored."""
+        goal = {key: value for key, value in goal.items() if key != "saved"}
+        goal["contributions"] = list(goal.get("contributions", []))
+        store = self._goals(user_id)
+        with self._locked():
+            if not self.oplog.paused: # undo keeps both versions of the goal
+                self.oplog.note_goal(user_id, goal["goal_id"], store.load(goal["goal_id"]), goal)
+            store.save(goal)
+        self.user_index(user_id).link_goal(goal["goal_id"], goal["contributions"])
+        self._bump_version(user_id)
+
+    def create_goal(self, user_id: str, name: str, target) -> dict:
+        """Add a new goal with nothing saved yet and return it."""
+        goal = GoalStore.new_goal(name, str(target))
+        self.save_goal(user_id, goal)
+        return goal
+
+    def link_contribution(self, user_id: str, goal_id: str, t):
+        """Link a savings transaction to a goal: its amount counts towards the goal for as long as it exists."""
+        goal = self._goals(user_id).load(goal_id)
+        if goal is None:
+            raise ValueError(f"Unknown goal {goal_id}")
+        if t.transaction_id not in goal["contributions"]:
+            goal["contributions"].append(t.transaction_id)
+            self.save_goal(user_id, goal)
+
+    # --------- Recurring rules ----------------
+    def load_recurring(self, user_id: str) -> list:
+        """Load the user's recurring rules (data/shards/<user_id>/recurring.json), [] if none.
+        A rule is {"type", "amount", "category", "description", "payment_method",
+        "frequency": "monthly"|"yearly"|"weekly"|"fortnightly", "day" (of the month, or 1-7 = Mon-Sun for weekly
+        and fortnightly), "month" (yearly only), "last_date": last occurrence created}."""
+        path = self._shard_path(user_id, "recurring.json")
         if not os.path.exists(path):
             return []
+        perf.note_read(path)
         try:
             with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+                rules = json.load(f)
         except Exception:
             return []
+        return rules if isinstance(rules, list) else []
 
-        # Old format: a flat list for everyone
-        if isinstance(data, list):
-            return data
-        # New format: dict keyed by user_id
-        if isinstance(data, dict):
-            goals = data.get(user_id, [])
-            return goals if isinstance(goals, list) else []
-        return []
-
-    def save_goals(self, user_id: str, goals: list):
-        """Persist goals for a specific user_id to goals.json.
-        Maintains a dict keyed by user_id and preserves other users' goals."""
-        path = "data/goals.json"
-        os.makedirs("data", exist_ok=True)
-
-        # Load existing structure (dict keyed by user_id) or migrate from old list
-        if os.path.exists(path):
+    def save_recurring(self, user_id: str, rules: list):
+        """Persist the user's recurring rules. Forecasts depend on them, so the user's data version moves."""
+        os.makedirs(os.path.join(self.shards_dir, user_id), exist_ok=True)
+        with self._locked(), self._atomic_open(self._shard_path(user_id, "recurring.json")) as f:
+            json.dump(rules, f, ensure_ascii=False, indent=2)
+        self._bump_version(user_id)
+
+    # --------- Budgets ----------------
+    def load_budgets(self, user_id: str) -> dict:
+        """Return the user's monthly budgets as {category: limit in minor units}, from budgets.json next to goals.json.
+        Kept in memory and re-read only when the file changes, so a budget check costs one stat()."""
+        path = self._shard_path(user_id, "budgets.json")
+        stamp = self._file_stamp(path)
+        cached = self._budgets.get(user_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        budgets = {}
+        if stamp is not None:
+            perf.note_read(path)
             try:
                 with open(path, "r", encoding="utf-8") as f:
-                    existing = json.load(f)
+                    rows = json.load(f)
             except Exception:
-                existing = {}
-        else:
-            existing = {}
-
-        if isinstance(existing, list):
-            # Old global list → migrate to dict under this user_id
-            data = {user_id: goals if isinstance(goals, list) else []}
-        elif isinstance(existing, dict):
-            data = existing
-            data[user_id] = goals if isinstance(goals, list) else []
-        else:
-            data = {user_id: goals if isinstance(goals, list) else []}
+                rows = []
+            decimals = self.currency_decimals(user_id)
+            for row in rows if isinstance(rows, list) else []:
+                try:
+                    budgets[str(row["category"])] = to_minor(row["limit"], decimals)
+                except (KeyError, TypeError, ValueError, ArithmeticError):
+                    continue # skip a malformed entry rather than losing every budget
+        self._budgets[user_id] = (stamp, budgets)
+        return budgets
 
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def save_budgets(self, user_id: str, budgets: dict):
+        """Persist {category: monthly limit in minor units} as [{"category", "limit"}] with decimal strings."""
+        decimals = self.currency_decimals(user_id)
+        rows = [{"category": category, "limit": str(from_minor(limit, decimals))}
+                for category, limit in sorted(budgets.items())]
+        os.makedirs(os.path.join(self.shards_dir, user_id), exist_ok=True)
+        with self._locked(), self._atomic_open(self._shard_path(user_id, "budgets.json")) as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        self._budgets.pop(user_id, None)
+        self._bump_version(user_id) # budget reports are cached by data version
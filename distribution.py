@@ -0,0 +1,124 @@
+import math
+import os
+import random
+from bisect import bisect_right
+
+# quantiles are within this relative error of the true value (0.01 = 1%)
+ACCURACY = float(os.environ.get("PFM_STATS_ACCURACY", 0.01))
+# groups up to this many amounts get exact quantiles (selection); larger ones are read from the sketches
+EXACT_LIMIT = int(os.environ.get("PFM_STATS_EXACT_LIMIT", 100_000))
+_GAMMA = (1 + ACCURACY) / (1 - ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+def rank(q: float, n: int) -> int:
+    """0-based position of the q quantile among n sorted values (nearest rank)."""
+    return max(0, math.ceil(q * n) - 1)
+
+def select(values: list, k: int) -> int:
+    """The k-th smallest (0-based) of `values` by quickselect: expected O(n), without sorting the list."""
+    while len(values) > 32:
+        pivot = sorted(random.sample(values, 3))[1]
+        lows = [v for v in values if v < pivot]
+        if k < len(lows):
+            values = lows
+            continue
+        highs = [v for v in values if v > pivot]
+        equal = len(values) - len(lows) - len(highs)
+        if k < len(lows) + equal:
+            return pivot
+        k -= len(lows) + equal
+        values = highs
+    return sorted(values)[k]
+
+def exact_quantiles(values: list, qs) -> list:
+    """Exact amounts at each fraction in `qs`, one selection per quantile. Returns zeros for no values."""
+    if not values:
+        return [0 for _ in qs]
+    return [select(values, rank(q, len(values))) for q in qs]
+
+def exact_histogram(values, edges: list) -> list:
+    """Count values per size bin like QuantileSketch.histogram, but from the amounts themselves:
+    an amount equal to an edge always lands in the bin that starts there."""
+    counts = [0] * len(edges)
+    for v in values:
+        counts[max(0, bisect_right(edges, v) - 1)] += 1
+    return counts
+
+class QuantileSketch:
+    """Counts of amounts in logarithmic buckets (as in DDSketch): bucket k holds amounts in (gamma^(k-1), gamma^k].
+    add and remove are O(1) and exact (unlike t-digest, a delete undoes an add), sketches merge by adding
+    counts, and any quantile is read back within ACCURACY relative error from the buckets alone, so a query
+    costs O(buckets) (a few hundred at most) however many transactions went in."""
+
+    __slots__ = ("counts", "n")
+
+    def __init__(self):
+        self.counts = {}  # bucket -> number of amounts in it
+        self.n = 0
+
+    @staticmethod
+    def _bucket(minor: int) -> int:
+        return math.ceil(math.log(minor) / _LOG_GAMMA)
+
+    @staticmethod
+    def _value(bucket: int) -> int:
+        """The amount (minor units) that represents a bucket: within ACCURACY of everything in it."""
+        return round(2 * _GAMMA ** bucket / (_GAMMA + 1))
+
+    def add(self, minor: int):
+        if minor > 0:
+            k = self._bucket(minor)
+            self.counts[k] = self.counts.get(k, 0) + 1
+            self.n += 1
+
+    def remove(self, minor: int):
+        if minor > 0:
+            k = self._bucket(minor)
+            count = self.counts.get(k)
+            if count: # ignore amounts that were never added
+                if count > 1:
+                    self.counts[k] = count - 1
+                else:
+                    del self.counts[k]
+                self.n -= 1
+
+    def merge(self, other: "QuantileSketch"):
+        for k, count in other.counts.items():
+            self.counts[k] = self.counts.get(k, 0) + count
+        self.n += other.n
+
+    def quantiles(self, qs) -> list:
+        """Amounts (minor units) at each fraction in `qs` (e.g. 0.5, 0.9, 0.99), in one pass over the buckets.
+        Returns zeros for an empty sketch."""
+        if not self.n:
+            return [0 for _ in qs]
+        wanted = sorted((rank(q, self.n), i) for i, q in enumerate(qs))
+        result = [0] * len(wanted)
+        seen, w = 0, 0
+        for k in sorted(self.counts):
+            seen += self.counts[k]
+            while w < len(wanted) and wanted[w][0] < seen:
+                result[wanted[w][1]] = self._value(k)
+                w += 1
+            if w == len(wanted):
+                break
+        return result
+
+    def histogram(self, edges: list) -> list:
+        """Count amounts per size bin: result[i] counts amounts in [edges[i], edges[i+1]) and the last entry
+        everything from edges[-1] up. Bins are assigned by bucket, so an amount within ACCURACY of an edge
+        may be counted in the neighbouring bin (use exact_histogram when the amounts are at hand)."""
+        counts = [0] * len(edges)
+        for k, count in self.counts.items():
+            counts[max(0, bisect_right(edges, self._value(k)) - 1)] += count
+        return counts
+
+def size_edges(largest: int, decimals: int = 2) -> list:
+    """Histogram bin edges in minor units on a 1-2-5 scale (1.00, 2.00, 5.00, 10.00, ...) up to `largest`."""
+    edges, unit = [0], 10 ** decimals
+    while unit <= largest:
+        for step in (1, 2, 5):
+            if unit * step <= largest:
+                edges.append(unit * step)
+        unit *= 10
+    return edges
@@ -0,0 +1,210 @@
+import gzip # built in library for reading/writing .gz files
+import json
+import os
+import struct # built in library for packing binary headers
+import sys
+from array import array # built in compact typed arrays for the columnar fallback
+from itertools import islice
+from indexes import day_of
+
+pa = pq = None # pyarrow modules, imported on the first columnar export (see _load_pyarrow)
+_pyarrow_checked = False
+
+CHUNK_ROWS = 50_000 # rows buffered per write, keeps memory flat for huge histories
+
+def _load_pyarrow():
+    """Import the optional pyarrow package once; returns False when it is not installed.
+    Deferred so that importing this module (and starting the app) stays cheap."""
+    global pa, pq, _pyarrow_checked
+    if not _pyarrow_checked:
+        _pyarrow_checked = True
+        try:
+            import pyarrow # optional: real Parquet output when installed
+            import pyarrow.parquet
+            pa, pq = pyarrow, pyarrow.parquet
+        except ImportError:
+            pass
+    return pa is not None
+
+def _chunks(rows, size):
+    """Yield lists of up to `size` items from any iterable."""
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+# -----------------------------------------------------
+# NDJSON (newline-delimited JSON)
+# -----------------------------------------------------
+def export_ndjson(rows, path: str, compress=None, chunk_rows: int = CHUNK_ROWS) -> int:
+    """Write Transaction records as one JSON object per line (gzip when compress or path ends with .gz).
+    Downstream tools can stream the file line by line. Returns the number of rows written."""
+    if compress is None:
+        compress = path.endswith(".gz")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    opener = gzip.open if compress else open
+    count = 0
+    with opener(path, "wt", encoding="utf-8") as f:
+        for chunk in _chunks(rows, chunk_rows):
+            f.write("".join(t.to_json() + "\n" for t in chunk))
+            count += len(chunk)
+    return count
+
+# -----------------------------------------------------
+# COLUMNAR (Parquet with pyarrow, stdlib layout otherwise)
+# -----------------------------------------------------
+# Columns and their types, shared by both writers:
+#   transaction_id  string
+#   user_id         string (dictionary encoded)
+#   type            string (dictionary encoded)
+#   amount_minor    int64   amount in minor units (cents), see `decimals` in the header
+#   category        string (dictionary encoded)
+#   date            int32   proleptic Gregorian ordinal (date.toordinal()), 0 if invalid
+#   description     string
+#   payment_method  string (dictionary encoded)
+COLUMNS = (
+    ("transaction_id", "str"), ("user_id", "dict"), ("type", "dict"), ("amount_minor", "int64"),
+    ("category", "dict"), ("date", "int32"), ("description", "str"), ("payment_method", "dict"),
+)
+PFMC_MAGIC = b"PFMCOL1\0"
+
+def _column_values(chunk, name):
+    """Return one column of a chunk of Transaction records as a Python list."""
+    if name == "amount_minor":
+        return [t.minor for t in chunk]
+    if name == "date":
+        return [d.toordinal() if (d := day_of(t.date)) else 0 for t in chunk]
+    return [getattr(t, name) for t in chunk]
+
+def columnar_target(path: str) -> tuple[str, str]:
+    """Return (path actually written, "parquet" or "pfmc") for a columnar export to `path`.
+    Without pyarrow a .parquet name becomes .pfmc (keeping a trailing .gz), since the file won't be Parquet.
+    Parquet compresses internally, so a .gz Parquet target is refused (ValueError)."""
+    base, gz = (path[:-3], path[-3:]) if path.lower().endswith(".gz") else (path, "")
+    if _load_pyarrow():
+        if gz:
+            raise ValueError("Parquet files are compressed internally: drop the .gz suffix")
+        return path, "parquet"
+    if base.lower().endswith(".parquet"):
+        base = base[:-len(".parquet")] + ".pfmc"
+    return base + gz, "pfmc"
+
+def export_columnar(rows, path: str, decimals: int = 2, chunk_rows: int = CHUNK_ROWS) -> tuple[int, str, str]:
+    """Write Transaction records column by column, one chunk at a time.
+    Uses Parquet when pyarrow is installed, otherwise the stdlib PFMC layout (see write_pfmc), gzip-compressed
+    when the path ends with .gz. The written path can differ from `path` (see columnar_target).
+    Returns (rows written, "parquet" or "pfmc", path written)."""
+    path, fmt = columnar_target(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "parquet":
+        return _write_parquet(rows, path, decimals, chunk_rows), fmt, path
+    return write_pfmc(rows, path, decimals, chunk_rows), fmt, path
+
+def _write_parquet(rows, path, decimals, chunk_rows):
+    """Parquet writer: one row group per chunk."""
+    arrow_types = {"str": pa.string(), "dict": pa.dictionary(pa.int32(), pa.string()),
+                   "int64": pa.int64(), "int32": pa.int32()}
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in COLUMNS],
+                       metadata={"decimals": str(decimals)})
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(rows, chunk_rows):
+            arrays = []
+            for name, kind in COLUMNS:
+                values = _column_values(chunk, name)
+                arrays.append(pa.array(values, pa.string()).dictionary_encode() if kind == "dict"
+                              else pa.array(values, arrow_types[kind]))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(chunk)
+    return count
+
+# PFMC stdlib layout (all integers little-endian):
+#   magic     8 bytes  b"PFMCOL1\0"
+#   header    uint32 length + UTF-8 JSON {"columns": [[name, type], ...], "decimals": n}
+#   chunks    repeated: uint32 row_count (> 0), then every column in header order:
+#               int64 / int32 -> row_count fixed-width values
+#               str           -> uint32 offsets[row_count + 1] + UTF-8 bytes (offsets[-1] long)
+#               dict          -> uint32 n_values + n_values strings encoded like `str`
+#                                + uint32 codes[row_count] indexing into those values
+#   end       uint32 0
+def _pack_strings(values):
+    """Encode strings as uint32 offsets followed by the concatenated UTF-8 bytes."""
+    data = bytearray()
+    offsets = array("I", [0])
+    for v in values:
+        data += v.encode("utf-8")
+        offsets.append(len(data))
+    return _le(offsets) + bytes(data)
+
+def _le(arr):
+    """Return an array's bytes in little-endian order."""
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def write_pfmc(rows, path: str, decimals: int = 2, chunk_rows: int = CHUNK_ROWS) -> int:
+    """Write the stdlib PFMC columnar layout described above (gzip-compressed when path ends with .gz).
+    Returns the number of rows."""
+    header = json.dumps({"columns": [list(c) for c in COLUMNS], "decimals": decimals}).encode("utf-8")
+    count = 0
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "wb") as f:
+        f.write(PFMC_MAGIC + struct.pack("<I", len(header)) + header)
+        for chunk in _chunks(rows, chunk_rows):
+            f.write(struct.pack("<I", len(chunk)))
+            for name, kind in COLUMNS:
+                values = _column_values(chunk, name)
+                if kind == "int64":
+                    f.write(_le(array("q", values)))
+                elif kind == "int32":
+                    f.write(_le(array("i", values)))
+                elif kind == "str":
+                    f.write(_pack_strings(values))
+                else:
+                    codes = {}
+                    col = array("I", (codes.setdefault(v, len(codes)) for v in values))
+                    f.write(struct.pack("<I", len(codes)) + _pack_strings(list(codes)) + _le(col))
+            count += len(chunk)
+        f.write(struct.pack("<I", 0))
+    return count
+
+def read_pfmc(path: str):
+    """Yield (header, {column: list}) for every chunk of a PFMC file (.pfmc or .pfmc.gz)."""
+    def read_array(f, typecode, n):
+        arr = array(typecode)
+        arr.frombytes(f.read(arr.itemsize * n))
+        if sys.byteorder == "big":
+            arr.byteswap()
+        return arr
+
+    def read_strings(f, n):
+        offsets = read_array(f, "I", n + 1)
+        data = f.read(offsets[-1])
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n)]
+
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rb") as f:
+        if f.read(8) != PFMC_MAGIC:
+            raise ValueError(f"{path} is not a PFMC file")
+        (size,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size))
+        while True:
+            (n,) = struct.unpack("<I", f.read(4))
+            if n == 0:
+                return
+            columns = {}
+            for name, kind in header["columns"]:
+                if kind == "int64":
+                    columns[name] = read_array(f, "q", n).tolist()
+                elif kind == "int32":
+                    columns[name] = read_array(f, "i", n).tolist()
+                elif kind == "str":
+                    columns[name] = read_strings(f, n)
+                else:
+                    (n_values,) = struct.unpack("<I", f.read(4))
+                    values = read_strings(f, n_values)
+                    columns[name] = [values[c] for c in read_array(f, "I", n)]
+            yield header, columns
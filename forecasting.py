@@ -0,0 +1,117 @@
+import calendar
+import os
+from datetime import date
+from utils import parse_date, to_minor, today_date
+
+INTERVALS = {"weekly": 7, "fortnightly": 14}  # rule frequencies that repeat every n days
+
+class Forecaster:
+    """Projects a user's month-end balances N months ahead.
+    For every future month and category the expected amount is the larger of
+      - what is already known: future-dated transactions (e.g. from recurring_transaction) plus
+        occurrences of the user's recurring rules (recurring.json) after their last created date, and
+      - the category's average per month over the last `window_months` complete months.
+    Everything is read from the index's (category, year, month) aggregates, so a forecast costs
+    O(categories x months) however long the history is. Averages are kept per user and only
+    recomputed when the user's data version or the window moves."""
+
+    def __init__(self, data_manager, window_months: int = None):
+        """window_months defaults to the PFM_FORECAST_WINDOW env var (12)."""
+        self.data_manager = data_manager
+        self.window_months = window_months or int(os.environ.get("PFM_FORECAST_WINDOW", 12))
+        self._baselines = {}  # user_id -> (version, first month after the window, {(category, type): minor})
+
+    # ---------------- helpers (private) ----------------
+    @staticmethod
+    def _shift(year: int, month: int, months: int):
+        """(year, month) moved by `months` (may be negative)."""
+        index = year * 12 + month - 1 + months
+        return index // 12, index % 12 + 1
+
+    def _baseline(self, user_id: str, index, year: int, month: int) -> dict:
+        """Average minor units per month for each (category, type) over the complete months before (year, month).
+        Months before the user's first transaction don't count, so new users aren't underestimated."""
+        version = self.data_manager.data_version(user_id)
+        cached = self._baselines.get(user_id)
+        if cached is not None and cached[0] == version and cached[1] == (year, month):
+            return cached[2]
+
+        active = [key for key, bucket in index.by_month.items() if bucket["count"] > 0 and key < (year, month)]
+        window = [self._shift(year, month, -k) for k in range(1, self.window_months + 1)]
+        if active:
+            window = [ym for ym in window if ym >= min(active)]
+        sums = {}
+        for category in list(index.by_category):
+            for y, m in window:
+                bucket = index.by_category_month.get((category, y, m))
+                if bucket:
+                    for t_type in ("income", "expense"):
+                        if bucket[t_type]:
+                            sums[(category, t_type)] = sums.get((category, t_type), 0) + bucket[t_type]
+        baseline = {key: total // len(window) for key, total in sums.items()} if window else {}
+        self._baselines[user_id] = (version, (year, month), baseline)
+        return baseline
+
+    def _rules(self, user_id: str, decimals: int) -> list:
+        """The user's recurring rules as (category, type, minor, frequency, day, month, last date)."""
+        rules = []
+        for rule in self.data_manager.load_recurring(user_id):
+            try:
+                rules.append((rule["category"], rule["type"], to_minor(rule["amount"], decimals),
+                              rule["frequency"], int(rule["day"]), int(rule.get("month") or 0),
+                              parse_date(rule["last_date"])))
+            except (KeyError, ValueError, ArithmeticError):
+                continue # a hand-edited or partial rule is skipped, not fatal
+        return rules
+
+    @staticmethod
+    def _occurrences(rule, year: int, month: int) -> int:
+        """How many times the rule falls in (year, month) after its last created date."""
+        _, _, _, frequency, day, rule_month, last_date = rule
+        if frequency in INTERVALS: # every n days from the last occurrence
+            step, last = INTERVALS[frequency], last_date.toordinal()
+            start = max(date(year, month, 1).toordinal(), last + 1)
+            end = date(year, month, calendar.monthrange(year, month)[1]).toordinal()
+            first = last + (start - last + step - 1) // step * step # first occurrence on or after start
+            return 0 if first > end else (end - first) // step + 1
+        if frequency == "yearly" and month != rule_month:
+            return 0
+        return int(date(year, month, min(day, calendar.monthrange(year, month)[1])) > last_date)
+
+    # ---------------- public API ----------------
+    def project(self, user_id: str, months: int = 12, today: date = None) -> list:
+        """Return one dict per month after the current one:
+        {"month": "YYYY-MM", "income", "expense", "net", "balance", "known"} as Decimals, where balance is the
+        projected month-end balance (starting from the recorded balance at the end of this month) and
+        known is the part of income - expense that comes from scheduled transactions and recurring rules."""
+        today = today or today_date()
+        index = self.data_manager.user_index(user_id)
+        year, month = today.year, today.month
+        balance = index.balance_on(date(year, month, calendar.monthrange(year, month)[1]))
+        baseline = self._baseline(user_id, index, year, month)
+        rules = self._rules(user_id, index.decimals)
+        categories = set(index.by_category) | {rule[0] for rule in rules}
+
+        rows = []
+        for k in range(1, months + 1):
+            y, m = self._shift(year, month, k)
+            recurring = {}
+            for rule in rules:
+                count = self._occurrences(rule, y, m)
+                if count:
+                    recurring[rule[:2]] = recurring.get(rule[:2], 0) + rule[2] * count
+            totals = {"income": 0, "expense": 0}
+            known = {"income": 0, "expense": 0}
+            for category in categories:
+                bucket = index.by_category_month.get((category, y, m))
+                for t_type in ("income", "expense"):
+                    scheduled = (bucket[t_type] if bucket else 0) + recurring.get((category, t_type), 0)
+                    known[t_type] += scheduled
+                    totals[t_type] += max(scheduled, baseline.get((category, t_type), 0))
+            net = totals["income"] - totals["expense"]
+            balance += net
+            rows.append({"month": f"{y}-{m:02d}",
+                         "income": index.money(totals["income"]), "expense": index.money(totals["expense"]),
+                         "net": index.money(net), "balance": index.money(balance),
+                         "known": index.money(known["income"] - known["expense"])})
+        return rows
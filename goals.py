@@ -0,0 +1,77 @@
+import json
+import os
+import uuid
+from datetime import datetime
+
+class GoalStore:
+    """One user's savings goals, stored one small JSON file per goal in data/shards/<user_id>/goals/,
+    so saving a goal rewrites only that goal:
+        {"goal_id": "3f2a9c1b", "name": "Car", "target": "5000", "opening": "0", "archived": "0",
+         "created": "2025-03-01T10:00:00.000000", "contributions": ["TXN012", "TXN040", ...]}
+    `contributions` links savings transactions by ID, and progress is derived from them (UserIndex.goal_sums),
+    so editing or deleting a contribution moves the goal with it. `opening` is what had been saved before
+    contributions were linked (goals from the old goals.json) and `archived` the sum of linked contributions
+    that now live in the year archive. Amounts are decimal strings, like in the transaction shards."""
+
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.folder)
+
+    def _path(self, goal_id: str) -> str:
+        return os.path.join(self.folder, f"{goal_id}.json")
+
+    @staticmethod
+    def new_goal(name: str, target: str, opening: str = "0") -> dict:
+        return {"goal_id": uuid.uuid4().hex[:8], "name": name, "target": str(target), "opening": str(opening),
+                "archived": "0", "created": datetime.now().isoformat(timespec="microseconds"), "contributions": []}
+
+    # ---------------- reading ----------------
+    def load(self, goal_id: str):
+        """Return one goal, or None if it doesn't exist."""
+        try:
+            with open(self._path(goal_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load_all(self) -> list:
+        """Every goal, oldest first."""
+        if not self.exists():
+            return []
+        goals = []
+        for name in os.listdir(self.folder):
+            if name.endswith(".json"):
+                goal = self.load(name[:-len(".json")])
+                if isinstance(goal, dict) and "goal_id" in goal:
+                    goals.append(goal)
+        goals.sort(key=lambda g: (g.get("created", ""), g.get("name", "")))
+        return goals
+
+    def files(self) -> list:
+        return sorted(n for n in os.listdir(self.folder) if n.endswith(".json")) if self.exists() else []
+
+    # ---------------- writing ----------------
+    def save(self, goal: dict):
+        """Write one goal atomically (the other goals' files are not touched)."""
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._path(goal["goal_id"])
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(goal, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def delete(self, goal_id: str):
+        try:
+            os.remove(self._path(goal_id))
+        except FileNotFoundError:
+            pass
+
+    def migrate(self, old_goals: list):
+        """Create per-goal files from the old list format ({"name", "target", "saved"}).
+        Their saved amount becomes the opening balance, since old contributions weren't linked."""
+        os.makedirs(self.folder, exist_ok=True)
+        for old in old_goals:
+            if isinstance(old, dict) and old.get("name"):
+                self.save(self.new_goal(old["name"], old.get("target", "0"), old.get("saved", "0")))
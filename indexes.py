@@ -0,0 +1,395 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+from utils import parse_date, from_minor
+from anomaly import RunningStats
+from distribution import QuantileSketch
+
+@lru_cache(maxsize=4096)
+def month_of(date_str: str):
+    """Return (year, month) for a dd/mm/YYYY string, or None if invalid (dates repeat a lot, so it's cached)."""
+    try:
+        d = parse_date(date_str)
+    except ValueError:
+        return None
+    return d.year, d.month
+
+@lru_cache(maxsize=4096)
+def day_of(date_str: str):
+    """Return the datetime.date for a dd/mm/YYYY string, or None if invalid (cached like month_of)."""
+    try:
+        return parse_date(date_str)
+    except ValueError:
+        return None
+
+class DailyBalances:
+    """Fenwick (binary indexed) tree of net amounts (income - expense, in minor units) per calendar day.
+    Positions are date ordinals counted from `first_day`. add() and until() cost O(log days), so the
+    balance on any date or the net flow between two dates never rescans the history.
+    A date outside the covered range re-lays the tree out over a wider range (O(days), rare)."""
+
+    __slots__ = ("first_day", "tree")
+
+    def __init__(self, first_day: int, days: int):
+        self.first_day = first_day
+        self.tree = [0] * (days + 1)  # 1-based Fenwick array
+
+    @classmethod
+    def from_days(cls, daily: dict) -> "DailyBalances":
+        """Build from {date ordinal: net amount} in O(days)."""
+        if not daily:
+            return cls(0, 0)
+        first, last = min(daily), max(daily)
+        balances = cls(first, last - first + 1)
+        for ordinal, amount in daily.items():
+            balances.tree[ordinal - first + 1] += amount
+        balances._build()
+        return balances
+
+    def _build(self):
+        """Turn the raw per-day values in self.tree into Fenwick sums (linear-time construction)."""
+        tree, n = self.tree, len(self.tree) - 1
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+
+    def _daily(self) -> list:
+        """Inverse of _build: the raw per-day values (index 0 unused)."""
+        tree, n = list(self.tree), len(self.tree) - 1
+        for i in range(n, 0, -1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] -= tree[i]
+        return tree
+
+    def _grow(self, ordinal: int):
+        """Re-lay the tree out so it covers `ordinal`, with a year of headroom on that side."""
+        n = len(self.tree) - 1
+        first = min(self.first_day, ordinal - 366) if n else ordinal - 366
+        last = max(self.first_day + n - 1, ordinal + 366) if n else ordinal + 366
+        raw = self._daily()
+        tree = [0] * (last - first + 2)
+        shift = self.first_day - first
+        for i in range(1, n + 1):
+            tree[i + shift] = raw[i]
+        self.first_day, self.tree = first, tree
+        self._build()
+
+    def add(self, ordinal: int, amount: int):
+        i = ordinal - self.first_day + 1
+        if i < 1 or i >= len(self.tree):
+            self._grow(ordinal)
+            i = ordinal - self.first_day + 1
+        tree, n = self.tree, len(self.tree) - 1
+        while i <= n:
+            tree[i] += amount
+            i += i & -i
+
+    def until(self, ordinal: int) -> int:
+        """Net amount of every day up to and including `ordinal`."""
+        i = min(ordinal - self.first_day + 1, len(self.tree) - 1)
+        total, tree = 0, self.tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def copy(self) -> "DailyBalances":
+        clone = DailyBalances.__new__(DailyBalances)
+        clone.first_day, clone.tree = self.first_day, list(self.tree)
+        return clone
+
+class UserIndex:
+    """Per-user view over a list of Transaction records with running aggregates.
+    Built once from the full list, then kept up to date with add/update/remove
+    so reports can read totals without rescanning the user's history.
+    All sums are ints in minor units; use money() to turn one into a Decimal for display.
+    Aggregates also include the user's archived years (see archive.YearArchive), seeded from
+    their precomputed summary; `transactions` and `by_id` only hold the hot (unarchived) rows."""
+
+    def __init__(self, user_id: str, transactions: list, decimals: int = 2, archived: dict = None,
+                 goal_links: dict = None):
+        """Build the index for user_id over that user's Transaction list (the list is adopted, not copied).
+        `archived` is the user's archive summary, whose totals are added to the aggregates.
+        `goal_links` maps transaction_id -> goal_id for savings contributions (see goals.GoalStore)."""
+        self.user_id = user_id
+        self.decimals = decimals  # minor-unit digits of the user's currency
+        self.transactions = transactions  # the user's shard, in file order
+        self.by_id = {}  # transaction_id -> Transaction
+        self.totals = {"income": 0, "expense": 0}
+        self.by_category = defaultdict(self._bucket)  # category -> {"income", "expense", "count"}
+        self.by_month = defaultdict(self._bucket)  # (year, month) -> {"income", "expense", "count"}
+        self.by_category_month = defaultdict(self._bucket)  # (category, year, month) -> {"income", "expense", "count"}
+        self.archived_count = 0  # rows living in the archive
+        self.version = 0  # bumps on every change
+        self._archived_days = {}  # date ordinal -> archived net amount, for balances()
+        self._balances = None  # DailyBalances, built on first use then kept up to date
+        self._expense_stats = None  # category -> RunningStats of expense amounts, built on first use
+        self._sketches = None  # (category, year, month) -> QuantileSketch of expense amounts, built on first use
+        self._amounts = None  # (category, year, month) -> list of expense amounts, built on first use
+        self.goal_links = dict(goal_links or {})  # transaction_id -> goal_id
+        self.goal_sums = defaultdict(int)  # goal_id -> linked contributions among the hot rows (minor units)
+        if archived:
+            self._seed(archived)
+        for t in transactions:
+            self.by_id[t.transaction_id] = t
+            self._apply(t, 1)
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def money(self, minor: int):
+        """Convert a minor-unit sum from this index into a Decimal for display."""
+        return from_minor(minor, self.decimals)
+
+    # ---------------- aggregate helpers (private) ----------------
+    @staticmethod
+    def _bucket():
+        return {"income": 0, "expense": 0, "count": 0}
+
+    @staticmethod
+    def _add_bucket(bucket, other):
+        for key in ("income", "expense", "count"):
+            bucket[key] += other.get(key, 0)
+
+    def _seed(self, archived: dict):
+        """Start the aggregates from an archive summary's per-year totals."""
+        for year, totals in archived.get("years", {}).items():
+            self.archived_count += totals.get("count", 0)
+            self.totals["income"] += totals.get("income", 0)
+            self.totals["expense"] += totals.get("expense", 0)
+            for month, bucket in totals.get("months", {}).items():
+                self._add_bucket(self.by_month[(int(year), int(month))], bucket)
+            for category, bucket in totals.get("categories", {}).items():
+                self._add_bucket(self.by_category[category], bucket)
+            for category, months in totals.get("category_months", {}).items():
+                for month, bucket in months.items():
+                    self._add_bucket(self.by_category_month[(category, int(year), int(month))], bucket)
+            if "days" in totals:
+                for ordinal, net in totals["days"].items():
+                    self._archived_days[int(ordinal)] = self._archived_days.get(int(ordinal), 0) + net
+            else: # summaries written before per-day nets: book each month on its last day
+                for month, bucket in totals.get("months", {}).items():
+                    month = int(month)
+                    last = date(int(year) + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+                    self._archived_days[last.toordinal()] = (self._archived_days.get(last.toordinal(), 0)
+                                                             + bucket.get("income", 0) - bucket.get("expense", 0))
+
+    def _apply(self, t, sign: int):
+        """Add (sign=1) or subtract (sign=-1) a transaction's amount from every aggregate."""
+        t_type = t.type
+        if t_type not in ("income", "expense"):
+            return
+        amount = t.minor * sign
+        self.totals[t_type] += amount
+        if t_type == "expense" and self._expense_stats is not None and t.minor > 0:
+            stats = self._expense_stats[t.category]
+            stats.add(t.minor) if sign > 0 else stats.remove(t.minor)
+        if self.goal_links and t.transaction_id in self.goal_links and self.is_contribution(t):
+            self.goal_sums[self.goal_links[t.transaction_id]] += amount
+        bucket = self.by_category[t.category]
+        bucket[t_type] += amount
+        bucket["count"] += sign
+        key = month_of(t.date)
+        if key is not None:
+            bucket = self.by_month[key]
+            bucket[t_type] += amount
+            bucket["count"] += sign
+            bucket = self.by_category_month[(t.category, *key)]
+            bucket[t_type] += amount
+            bucket["count"] += sign
+            if self._balances is not None:
+                self._balances.add(day_of(t.date).toordinal(), amount if t_type == "income" else -amount)
+            if t_type == "expense" and self._sketches is not None:
+                sketch = self._sketches[(t.category, *key)]
+                sketch.add(t.minor) if sign > 0 else sketch.remove(t.minor)
+            if t_type == "expense" and self._amounts is not None and t.minor > 0:
+                amounts = self._amounts[(t.category, *key)]
+                amounts.append(t.minor) if sign > 0 else amounts.remove(t.minor)
+
+    # ---------------- incremental updates ----------------
+    def add(self, t):
+        """Register a new transaction."""
+        self.transactions.append(t)
+        self.by_id[t.transaction_id] = t
+        self._apply(t, 1)
+        self.version += 1
+
+    def update(self, before, after):
+        """Re-aggregate a transaction edited in place; `before` is a copy of its old values."""
+        self._apply(before, -1)
+        self._apply(after, 1)
+        self.version += 1
+
+    def replace(self, old, new):
+        """Swap a record for an edited copy (copy-on-write edits, so snapshots keep the old record)."""
+        pos = self.transactions.index(old)
+        self.transactions[pos] = new
+        self.by_id[new.transaction_id] = new
+        self.update(old, new)
+
+    def remove(self, t):
+        """Drop a transaction from the index."""
+        if self.by_id.pop(t.transaction_id, None) is None:
+            return
+        self.transactions.remove(t)
+        self._apply(t, -1)
+        self.version += 1
+
+    def update_many(self, pairs):
+        """Re-aggregate many in-place edits at once; `pairs` is a list of (before copy, edited record)."""
+        for before, after in pairs:
+            self._apply(before, -1)
+            self._apply(after, 1)
+        self.version += 1
+
+    def remove_many(self, records):
+        """Drop many transactions with one pass over the list (remove() would rescan it for each record)."""
+        gone = set()
+        for t in records:
+            if self.by_id.pop(t.transaction_id, None) is not None:
+                gone.add(t.transaction_id)
+                self._apply(t, -1)
+        if gone:
+            self.transactions[:] = [t for t in self.transactions if t.transaction_id not in gone]
+            self.version += 1
+
+    # ---------------- point-in-time balances ----------------
+    def balances(self) -> DailyBalances:
+        """The per-day prefix sums (built in one pass on first use, then updated by every change)."""
+        if self._balances is None:
+            daily = dict(self._archived_days)
+            for t in self.transactions:
+                if t.type in ("income", "expense"):
+                    d = day_of(t.date)
+                    if d is not None:
+                        ordinal = d.toordinal()
+                        daily[ordinal] = daily.get(ordinal, 0) + (t.minor if t.type == "income" else -t.minor)
+            self._balances = DailyBalances.from_days(daily)
+        return self._balances
+
+    def balance_on(self, day) -> int:
+        """Balance (income - expense, minor units) at the end of `day` (a datetime.date). O(log days)."""
+        return self.balances().until(day.toordinal())
+
+    def net_between(self, start, end) -> int:
+        """Net flow (minor units) over the dates start..end inclusive. O(log days)."""
+        balances = self.balances()
+        return balances.until(end.toordinal()) - balances.until(start.toordinal() - 1)
+
+    # ---------------- unusual expenses ----------------
+    def expense_stats(self) -> dict:
+        """category -> RunningStats of the hot rows' expenses (built in one pass on first use,
+        then updated in O(1) by every add, edit and delete)."""
+        if self._expense_stats is None:
+            self._expense_stats = defaultdict(RunningStats)
+            for t in self.transactions:
+                if t.type == "expense" and t.minor > 0:
+                    self._expense_stats[t.category].add(t.minor)
+        return self._expense_stats
+
+    def unusual_expense(self, t):
+        """For a transaction about to be added: how many times its category's typical expense it is,
+        if it stands out (see anomaly.RunningStats.unusual), else None."""
+        if t.type != "expense":
+            return None
+        stats = self.expense_stats().get(t.category)
+        return stats.unusual(t.minor) if stats is not None else None
+
+    # ---------------- amount distributions ----------------
+    def sketches(self) -> dict:
+        """(category, year, month) -> QuantileSketch of the hot rows' expense amounts (built in one pass on
+        first use, then updated in O(1) by every add, edit and delete). Archived years only keep totals."""
+        if self._sketches is None:
+            self._sketches = defaultdict(QuantileSketch)
+            for t in self.transactions:
+                if t.type == "expense":
+                    key = month_of(t.date)
+                    if key is not None:
+                        self._sketches[(t.category, *key)].add(t.minor)
+        return self._sketches
+
+    def amounts(self) -> dict:
+        """(category, year, month) -> list of the hot rows' positive expense amounts (the same population
+        as the sketches), in no particular order. Built in one pass on first use, then kept up to date
+        by every add, edit and delete."""
+        if self._amounts is None:
+            self._amounts = defaultdict(list)
+            for t in self.transactions:
+                if t.type == "expense" and t.minor > 0:
+                    key = month_of(t.date)
+                    if key is not None:
+                        self._amounts[(t.category, *key)].append(t.minor)
+        return self._amounts
+
+    def expense_amounts(self, category: str = None, year: int = None, month: int = None) -> list:
+        """Every expense amount matching the filters (None = any), as one new list."""
+        return [minor for (c, y, m), amounts in self.amounts().items()
+                if (category is None or c == category) and (year is None or y == year) and (month is None or m == month)
+                for minor in amounts]
+
+    def expense_sketch(self, category: str = None, year: int = None, month: int = None) -> QuantileSketch:
+        """One sketch for the expenses matching the filters (None = any), merged from the per-month sketches."""
+        merged = QuantileSketch()
+        for (c, y, m), sketch in self.sketches().items():
+            if (category is None or c == category) and (year is None or y == year) and (month is None or m == month):
+                merged.merge(sketch)
+        return merged
+
+    # ---------------- savings goals ----------------
+    @staticmethod
+    def is_contribution(t) -> bool:
+        """Only savings expenses count towards a goal (a linked row edited into another category stops counting)."""
+        return t.type == "expense" and t.category.lower() == "savings"
+
+    def link(self, transaction_id: str, goal_id: str):
+        """Count a transaction towards a goal (moving it from the goal it was linked to, if any). O(1)."""
+        old = self.goal_links.get(transaction_id)
+        if old == goal_id:
+            return
+        t = self.by_id.get(transaction_id)
+        counted = t is not None and self.is_contribution(t)
+        if old is not None and counted:
+            self.goal_sums[old] -= t.minor
+        if goal_id is None:
+            self.goal_links.pop(transaction_id, None)
+        else:
+            self.goal_links[transaction_id] = goal_id
+            if counted:
+                self.goal_sums[goal_id] += t.minor
+        self.version += 1
+
+    def link_goal(self, goal_id: str, transaction_ids):
+        """Make `transaction_ids` the goal's complete list of contributions (after a goal was saved,
+        deleted or restored by undo)."""
+        wanted = set(transaction_ids)
+        for transaction_id in [tid for tid, gid in self.goal_links.items() if gid == goal_id and tid not in wanted]:
+            self.link(transaction_id, None)
+        for transaction_id in wanted:
+            self.link(transaction_id, goal_id)
+
+    # ---------------- read-only copies ----------------
+    def snapshot(self) -> "UserIndex":
+        """Return a frozen copy that other threads can read while this index keeps changing:
+        the records are shared (in a tuple), the aggregates are copied.
+        Only valid while records are replaced rather than edited in place (see replace)."""
+        snap = UserIndex.__new__(UserIndex)
+        snap.user_id = self.user_id
+        snap.decimals = self.decimals
+        snap.transactions = tuple(self.transactions)
+        snap.by_id = dict(self.by_id)
+        snap.totals = dict(self.totals)
+        snap.by_category = {key: dict(bucket) for key, bucket in self.by_category.items()}
+        snap.by_month = {key: dict(bucket) for key, bucket in self.by_month.items()}
+        snap.by_category_month = {key: dict(bucket) for key, bucket in self.by_category_month.items()}
+        snap.archived_count = self.archived_count
+        snap.version = self.version
+        snap._archived_days = self._archived_days
+        snap._balances = self._balances.copy() if self._balances is not None else None
+        snap._expense_stats = None
+        snap._sketches = None
+        snap._amounts = None
+        snap.goal_links = dict(self.goal_links)
+        snap.goal_sums = dict(self.goal_sums)
+        return snap
@@ -0,0 +1,170 @@
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+PERF_ENV = "PFM_PERF" # "1" turns timing on at startup
+PROFILE_ENV = "PFM_PERF_PROFILE" # "cprofile", "tracemalloc" or "both": dump a snapshot at exit
+PERF_DIR = "data/perf"
+
+class PerfStats:
+    """Call counts, wall time and bytes read/written per instrumented method.
+    Disabled by default: an instrumented call then costs one attribute check.
+    Times and bytes are inclusive, so a method is charged for the I/O of the methods it calls."""
+
+    def __init__(self):
+        self.enabled = False
+        self.calls = {} # label -> {"calls", "total_s", "max_s", "bytes_read", "bytes_written"}
+        self.profile_mode = None
+        self.profiler = None
+        self.tracing = False # tracemalloc started by us
+        self.started = None
+        self._local = threading.local() # stack of [bytes_read, bytes_written] for calls in progress
+
+    # ---------------- switching ----------------
+    def enable(self, profile_mode=None):
+        """Start recording; profile_mode 'cprofile', 'tracemalloc' or 'both' also starts a profiler."""
+        self.enabled = True
+        self.started = self.started or datetime.now()
+        self.profile_mode = profile_mode or self.profile_mode
+        # the profilers are imported only when asked for, keeping them off the startup path
+        if self.profile_mode in ("cprofile", "both"):
+            if self.profiler is None:
+                import cProfile
+                self.profiler = cProfile.Profile()
+            self.profiler.enable() # also resumes a profiler paused by disable()
+        if self.profile_mode in ("tracemalloc", "both") and not self.tracing:
+            import tracemalloc
+            tracemalloc.start()
+            self.tracing = True
+
+    def disable(self):
+        """Stop recording (collected numbers are kept until reset)."""
+        self.enabled = False
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        self.calls.clear()
+        self.started = datetime.now() if self.enabled else None
+
+    def enable_from_env(self):
+        """Turn recording on when PFM_PERF=1 (or a profiler is requested in PFM_PERF_PROFILE)."""
+        profile_mode = os.environ.get(PROFILE_ENV, "").strip().lower() or None
+        if os.environ.get(PERF_ENV, "").strip() in ("1", "true", "yes") or profile_mode:
+            self.enable(profile_mode)
+
+    # ---------------- recording ----------------
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add_bytes(self, read=0, written=0):
+        """Charge bytes to every instrumented call in progress on this thread."""
+        if not self.enabled:
+            return
+        for frame in self._stack():
+            frame[0] += read
+            frame[1] += written
+
+    def note_read(self, path):
+        """Charge the size of a file that is about to be read (cheap no-op when disabled)."""
+        if self.enabled:
+            try:
+                self.add_bytes(read=os.path.getsize(path))
+            except OSError:
+                pass
+
+    def note_written(self, path):
+        """Charge the size of a file that has just been written (cheap no-op when disabled)."""
+        if self.enabled:
+            try:
+                self.add_bytes(written=os.path.getsize(path))
+            except OSError:
+                pass
+
+    def _record(self, label, elapsed, frame):
+        entry = self.calls.get(label)
+        if entry is None:
+            entry = self.calls[label] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "bytes_read": 0, "bytes_written": 0}
+        entry["calls"] += 1
+        entry["total_s"] += elapsed
+        entry["max_s"] = max(entry["max_s"], elapsed)
+        entry["bytes_read"] += frame[0]
+        entry["bytes_written"] += frame[1]
+
+    # ---------------- reporting ----------------
+    def show(self):
+        """Print the 'Performance stats' screen, slowest methods first."""
+        print("\n=== ⏱️ PERFORMANCE STATS ===")
+        print(f"Recording: {'on' if self.enabled else 'off'}"
+              + (f" since {self.started:%H:%M:%S}" if self.started else "")
+              + (f" | profiler: {self.profile_mode}" if self.profile_mode else ""))
+        if not self.calls:
+            print("Nothing recorded yet.")
+            return
+        print(f"{'Method':<44} | {'Calls':>6} | {'Total ms':>10} | {'Avg ms':>8} | {'Max ms':>8} | {'Read KB':>9} | {'Write KB':>9}")
+        print("-" * 113)
+        for label, e in sorted(self.calls.items(), key=lambda item: -item[1]["total_s"]):
+            print(f"{label:<44} | {e['calls']:>6} | {e['total_s'] * 1000:>10.2f} | {e['total_s'] * 1000 / e['calls']:>8.2f} | "
+                  f"{e['max_s'] * 1000:>8.2f} | {e['bytes_read'] / 1024:>9.1f} | {e['bytes_written'] / 1024:>9.1f}")
+
+    def dump(self, folder=PERF_DIR) -> list:
+        """Write the stats as JSON plus any profiler snapshot into `folder`. Returns the paths written."""
+        os.makedirs(folder, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        paths = []
+
+        path = os.path.join(folder, f"stats_{stamp}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"started": self.started.isoformat(timespec="seconds") if self.started else None,
+                       "calls": self.calls}, f, indent=4)
+        paths.append(path)
+
+        if self.profiler is not None:
+            path = os.path.join(folder, f"profile_{stamp}.prof") # open with: python -m pstats <file>
+            self.profiler.create_stats()
+            self.profiler.dump_stats(path)
+            paths.append(path)
+        if self.tracing:
+            import tracemalloc
+            path = os.path.join(folder, f"memory_{stamp}.tracemalloc") # load with tracemalloc.Snapshot.load()
+            tracemalloc.take_snapshot().dump(path)
+            paths.append(path)
+        return paths
+
+    def end_session(self):
+        """At exit: dump stats and snapshots when a profiler was requested for this session."""
+        if self.profile_mode and (self.calls or self.profiler is not None):
+            self.disable()
+            for path in self.dump():
+                print(f"⏱️ Saved {path}")
+
+perf = PerfStats()
+
+def timed(label=None):
+    """Decorator recording calls, wall time and bytes for a method while perf is enabled."""
+    def decorate(fn):
+        name = label or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not perf.enabled:
+                return fn(*args, **kwargs)
+            stack = perf._stack()
+            frame = [0, 0]
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                perf._record(name, elapsed, frame)
+        return wrapper
+    return decorate
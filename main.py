@@ -1,21 +1,39 @@
 from user_manager import UserManager
 from data_manager import DataManager
-from transactions import TransactionManager
-from reports import Reports
 from utils import pause
+from instrumentation import perf
 import atexit
+import sys
+from datetime import datetime
 
 class PersonalFinanceApp:
     """Main app controller."""
 
     def __init__(self):
-        self.data_manager = DataManager() # Used for JSON files handling
+        self.data_manager = DataManager() # Used for JSON files handling (reads only the small shard manifest)
         self.user_manager = UserManager(self.data_manager) # UserManager reads and writes users through data_manager
-        self.transaction_manager = TransactionManager(self.data_manager) # TransactionManager reads and writes transactions through data_manager
-        self.reports = Reports(self.data_manager)
+        self._transaction_manager = None # created on first use, after login (see the properties below)
+        self._reports = None
         self.current_user = None
         self.current_user_id = None
 
+    # ---------------------------
+    # LAZY MANAGERS (nothing transaction related is imported or loaded before it is needed)
+    # ---------------------------
+    @property
+    def transaction_manager(self):
+        if self._transaction_manager is None:
+            from transactions import TransactionManager
+            self._transaction_manager = TransactionManager(self.data_manager) # TransactionManager reads and writes transactions through data_manager
+        return self._transaction_manager
+
+    @property
+    def reports(self):
+        if self._reports is None:
+            from reports import Reports
+            self._reports = Reports(self.data_manager)
+        return self._reports
+
     # ---------------------------
     # MAIN MENU
     # ---------------------------
@@ -44,6 +62,8 @@ class PersonalFinanceApp:
             elif choice == "4":
                 self.exit_program()
                 break
+            elif choice == "perf": # hidden option
+                self.perf_menu()
             else:
                 print("❌ Invalid choice.")
             pause()
@@ -120,6 +140,21 @@ class PersonalFinanceApp:
             print("    • Set a target amount to save")
             print("    • Track progress automatically")
             print("    • Tip: Category must be 'savings' to count!")
+            print("    • Editing or deleting a contribution updates its goal")
+
+            print("\n9️⃣  BULK EDIT / DELETE")
+            print("    • Select many transactions by ID range, category, description or dates")
+            print("    • Delete them or change category, payment method or type in one go")
+            print("    • Tip: one CSV import gets one ID range, so it's easy to clean up a bad import")
+
+            print("\n🔟 UNDO / REDO")
+            print("    • Undo your last changes (adds, edits, deletes, imports, goal contributions)")
+            print("    • Works for the last 50 changes of this session")
+
+            print("\n📏 BUDGETS")
+            print("    • Set a monthly limit per category (e.g. groceries: 400)")
+            print("    • You're warned right after an expense when 80% or more is used")
+            print("    • Reports Menu → Budget Status shows every budget for any month")
             
             # Ask if they want to go to transactions menu
             go_there = input("\n➡️  Go to Transactions Menu now? (y/n): ").strip().lower()
@@ -164,6 +199,10 @@ class PersonalFinanceApp:
             print("\n7️⃣  ASCII LAST 12 MONTHS")
             print("    • Vertical chart showing expense trends")
             print("    • Compare spending across months")
+
+            print("\n📐 EXPENSE DISTRIBUTION")
+            print("    • Median, p90 and p99 expense per category")
+            print("    • Histogram of how big your expenses usually are")
             
             # Ask if they want to go to reports menu
             go_there = input("\n➡️  Go to Reports Menu now? (y/n): ").strip().lower()
@@ -184,7 +223,8 @@ class PersonalFinanceApp:
             print("    • Save your transactions to a CSV file")
             print("    • Open in Excel or Google Sheets")
             print("    • Great for backups or sharing with accountant")
-            print("    • Example path: exports/my_data.csv")
+            print("    • Example path: exports/my_data.csv (use .csv.gz to compress)")
+            print("    • Optionally filter by date range, category, or type")
             
             print("\n2️⃣  IMPORT TRANSACTIONS FROM CSV")
             print("    • Load transactions from a CSV file")
@@ -192,6 +232,15 @@ class PersonalFinanceApp:
             print("    • File must have correct columns:")
             print("      transaction_id, user_id, type, amount,")
             print("      category, date, description, payment_method")
+
+            print("\n3️⃣  EXPORT TO NDJSON / COLUMNAR")
+            print("    • NDJSON: one JSON object per line, easy to stream into other tools")
+            print("    • Columnar: Parquet if pyarrow is installed, otherwise a compact .pfmc file")
+
+            print("\n4️⃣  ARCHIVE CLOSED YEARS")
+            print("    • Moves old years into compressed files under your data folder")
+            print("    • Reports and totals still include them; filters and exports read them back")
+            print("    • Restore a year to edit or delete its transactions again")
             
             print("\n💡 TIPS:")
             print("  • Data is auto-saved after every change")
@@ -287,6 +336,8 @@ class PersonalFinanceApp:
             elif choice == "8":
                 self.user_manager.logout()
                 return
+            elif choice == "perf": # hidden option
+                self.perf_menu()
             else:
                 print("❌ Invalid choice.")
             pause()
@@ -301,26 +352,107 @@ class PersonalFinanceApp:
             print("\n=== 📂 Data Management ===")
             print("1. Export transactions to CSV")
             print("2. Import transactions from CSV")
-            print("3. Back")
+            print("3. Export transactions to NDJSON (one JSON object per line)")
+            print("4. Export transactions to columnar file (Parquet, or .pfmc without pyarrow)")
+            print("5. Archive closed years (compressed, summaries kept for reports)")
+            print("6. Restore an archived year")
+            print("7. Back")
             
-            choice = input("👉🏼 Choose an option (1-3): ").strip()
+            choice = input("👉🏼 Choose an option (1-7): ").strip()
             user_id = self.current_user_id
             
             if choice == "1":
-                path = input("Enter file path to export to: ")
-                tx_list = self.data_manager.load_transactions()
-                self.data_manager.export_transactions_csv(user_id, tx_list, path)
-                print("✅ Transactions exported successfully.")
+                # streams only this user's rows; no need to load everyone's transactions
+                self.transaction_manager.export_transactions_interactive(user_id)
             elif choice == "2":
                 path = input("Enter file path to import from: ")
                 added = self.data_manager.import_transactions_csv(user_id, path)
                 print(f"✅ Imported {added} new transactions.")
             elif choice == "3":
+                path = input("Enter file path to export to (e.g., exports/data.ndjson or .ndjson.gz): ").strip()
+                if path:
+                    from exporters import export_ndjson
+                    count = export_ndjson(self.data_manager.iter_transactions(user_id), path)
+                    print(f"✅ Exported {count} transactions to {path}")
+            elif choice == "4":
+                path = input("Enter file path to export to (e.g., exports/data.parquet): ").strip()
+                if path:
+                    from exporters import export_columnar
+                    decimals = self.data_manager.currency_decimals(user_id)
+                    try:
+                        count, fmt, written = export_columnar(self.data_manager.iter_transactions(user_id), path, decimals)
+                    except ValueError as e:
+                        print(f"❌ {e}")
+                    else:
+                        if written != path:
+                            print(f"ℹ️  pyarrow is not installed, so the file is in PFMC format: saved as {written}")
+                        print(f"✅ Exported {count} transactions to {written} ({fmt} format)")
+            elif choice == "5":
+                year = input(f"Archive all years before (default {datetime.now().year}): ").strip()
+                if year and not year.isdigit():
+                    print("❌ Invalid year.")
+                else:
+                    archived = self.data_manager.archive_closed_years(user_id, int(year) if year else None)
+                    if archived:
+                        for y, count in archived.items():
+                            print(f"✅ Archived {count} transactions from {y}")
+                    else:
+                        print("ℹ️  Nothing to archive.")
+            elif choice == "6":
+                years = self.data_manager.archived_years(user_id)
+                if not years:
+                    print("ℹ️  No archived years.")
+                else:
+                    print("Archived years: " + ", ".join(str(y) for y in years))
+                    year = input("Year to restore: ").strip()
+                    if year.isdigit() and int(year) in years:
+                        count = self.data_manager.restore_archived_year(user_id, int(year))
+                        print(f"✅ Restored {count} transactions from {year}")
+                    else:
+                        print("❌ Invalid year.")
+            elif choice == "7":
                 return
             else:
                 print("❌ Invalid choice.")
             pause()
 
+    # ---------------------------
+    # PERFORMANCE STATS (hidden: type "perf" in the main or user menu)
+    # ---------------------------
+    def perf_menu(self):
+        while True:
+            perf.show()
+            if self._reports is not None:
+                stats = self._reports.cache.stats()
+                print(f"\nReport cache: {stats['entries']} entries ({stats['rows']} rows) | hits {stats['hits']} | "
+                      f"misses {stats['misses']} (stale {stats['stale']}) | evictions {stats['evictions']} | "
+                      f"hit rate {stats['hit_rate']:.0%}")
+            print("\n1. Refresh")
+            print(f"2. Turn recording {'off' if perf.enabled else 'on'}")
+            print("3. Reset counters")
+            print("4. Save stats (and profiler snapshot, if running) to data/perf/")
+            print("5. Back")
+
+            choice = input("👉🏼 Choose an option (1-5): ").strip()
+
+            if choice == "1":
+                continue
+            elif choice == "2":
+                if perf.enabled:
+                    perf.disable()
+                else:
+                    perf.enable()
+            elif choice == "3":
+                perf.reset()
+            elif choice == "4":
+                for path in perf.dump():
+                    print(f"✅ Saved {path}")
+                pause()
+            elif choice == "5":
+                return
+            else:
+                print("❌ Invalid choice.")
+
     # ---------------------------
     # EXIT PROGRAM
     # ---------------------------
@@ -328,6 +460,11 @@ class PersonalFinanceApp:
         print("👋🏼 Goodbye!")
 
 if __name__ == "__main__":
+    perf.enable_from_env() # PFM_PERF=1 records timings, PFM_PERF_PROFILE=cprofile|tracemalloc|both also profiles
+    atexit.register(perf.end_session) # registered first so it runs after the backup
+    if len(sys.argv) > 1: # batch mode: python main.py <command> ... (see cli.py)
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
     app = PersonalFinanceApp()
     atexit.register(app.data_manager.create_backup_once) # insure backup is created even if we don't exit program properly
     app.run()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import json
+import sys
+from decimal import Decimal as decimal
+from utils import to_minor, from_minor
+
+class Transaction:
+    """Compact transaction record.
+    Uses __slots__ instead of a per-row dict, and interns the highly repeated
+    strings (user_id, type, category, date, payment_method) so every row shares one copy.
+    The amount is kept as an int in minor units (cents for USD) with the currency's number
+    of decimals; `amount` turns it into a Decimal only when something needs to display it.
+    Serialises straight from its slots to JSON text or a CSV row, without building a dict."""
+
+    FIELDS = ("transaction_id", "user_id", "type", "amount", "category", "date", "description", "payment_method")
+    __slots__ = ("transaction_id", "user_id", "type", "minor", "decimals", "category", "date", "description",
+                 "payment_method")
+
+    def __init__(self, transaction_id="", user_id="", type="", minor=0, category="",
+                 date="", description="", payment_method="", decimals=2):
+        self.transaction_id = transaction_id
+        self.user_id = sys.intern(user_id)
+        self.type = sys.intern(type)
+        self.minor = minor  # amount in integer minor units
+        self.decimals = decimals  # minor-unit digits of the owner's currency
+        self.category = sys.intern(category)
+        self.date = sys.intern(date)
+        self.description = description
+        self.payment_method = sys.intern(payment_method)
+
+    @classmethod
+    def from_dict(cls, data: dict, decimals: int = 2) -> "Transaction":
+        """Build a record from a JSON object or CSV row; missing fields become ''.
+        Raises ValueError / ArithmeticError when the amount isn't a finite number (it is never replaced by 0)."""
+        minor = to_minor(data.get("amount", "0"), decimals)
+        return cls(
+            transaction_id=str(data.get("transaction_id") or ""),
+            user_id=str(data.get("user_id") or ""),
+            type=str(data.get("type") or ""),
+            minor=minor,
+            category=str(data.get("category") or ""),
+            date=str(data.get("date") or ""),
+            description=str(data.get("description") or ""),
+            payment_method=str(data.get("payment_method") or ""),
+            decimals=decimals,
+        )
+
+    @property
+    def amount(self) -> decimal:
+        """The amount as a Decimal, for display."""
+        return from_minor(self.minor, self.decimals)
+
+    @amount.setter
+    def amount(self, value):
+        self.minor = to_minor(value, self.decimals)
+
+    # ---------------- dict-style compatibility ----------------
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return f"Transaction({self.transaction_id!r}, {self.type!r}, {self.amount!s}, {self.category!r}, {self.date!r})"
+
+    def update(self, changes: dict):
+        """Set several fields at once (repeated strings are interned, amounts converted to minor units).
+        All or nothing: every value is checked and converted before any field changes, so an unknown
+        field (KeyError) or a bad amount (ValueError / ArithmeticError) leaves the record as it was."""
+        staged = {}
+        for key, value in changes.items():
+            if key not in self.FIELDS:
+                raise KeyError(key)
+            if key == "amount":
+                key, value = "minor", to_minor(value, self.decimals)
+            elif key in ("user_id", "type", "category", "date", "payment_method"):
+                value = sys.intern(str(value))
+            staged[key] = value
+        for key, value in staged.items():
+            setattr(self, key, value)
+
+    def copy(self) -> "Transaction":
+        """Return a shallow copy (used to remember old values before an edit)."""
+        clone = Transaction.__new__(Transaction)
+        for key in self.__slots__:
+            setattr(clone, key, getattr(self, key))
+        return clone
+
+    def assign(self, other: "Transaction"):
+        """Take every field from another record (used to put back old values on undo)."""
+        for key in self.__slots__:
+            setattr(self, key, getattr(other, key))
+
+    def to_dict(self) -> dict:
+        """Return a plain dict with the amount as a string."""
+        return dict(zip(self.FIELDS, self.as_row()))
+
+    # ---------------- serialisation ----------------
+    def as_row(self) -> tuple:
+        """Field values in FIELDS order, ready for csv.writer (amount as a string)."""
+        return (self.transaction_id, self.user_id, self.type, str(self.amount),
+                self.category, self.date, self.description, self.payment_method)
+
+    def to_json(self) -> str:
+        """Encode the record as a one-line JSON object, straight from the slots."""
+        dumps = json.dumps
+        return "{" + ", ".join(f'"{key}": {dumps(value, ensure_ascii=False)}'
+                               for key, value in zip(self.FIELDS, self.as_row())) + "}"
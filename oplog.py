@@ -0,0 +1,137 @@
+import os
+from collections import deque
+from contextlib import contextmanager
+
+class Operation:
+    """One undoable change to a user's data, stored as the records it touched (not a copy of the dataset):
+    added / removed hold the records, updated holds (before, after) copies, goals maps goal_id -> (before, after) goal dicts (None = absent)."""
+
+    __slots__ = ("user_id", "label", "added", "removed", "updated", "goals")
+
+    def __init__(self, user_id: str, label: str):
+        self.user_id = user_id
+        self.label = label
+        self.added = []
+        self.removed = []
+        self.updated = []
+        self.goals = {}
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.updated) + len(self.goals)
+
+    def describe(self) -> str:
+        """Short text for menus, e.g. "import (250 added)"."""
+        parts = [f"{len(rows)} {word}" for rows, word in ((self.added, "added"), (self.removed, "removed"),
+                                                          (self.updated, "edited")) if rows]
+        if self.goals:
+            parts.append(f"{len(self.goals)} goal(s) changed")
+        return f"{self.label} ({', '.join(parts)})"
+
+    def inverse(self) -> "Operation":
+        """The operation that undoes this one."""
+        op = Operation(self.user_id, self.label)
+        op.added = self.removed
+        op.removed = self.added
+        op.updated = [(after, before) for before, after in self.updated]
+        op.goals = {goal_id: (after, before) for goal_id, (before, after) in self.goals.items()}
+        return op
+
+
+class OperationLog:
+    """Bounded per-user undo/redo stacks of Operations.
+    DataManager reports every change through the note_* methods; changes made inside a
+    record(...) block form one Operation (an import, a bulk delete...), any other change is its own.
+    Only the last max_ops operations per user are kept (PFM_UNDO_LIMIT, default 50); a new change clears redo."""
+
+    def __init__(self, max_ops: int = None):
+        self.max_ops = max_ops if max_ops is not None else int(os.environ.get("PFM_UNDO_LIMIT", 50))
+        self._undo = {}  # user_id -> deque of Operation, newest last
+        self._redo = {}
+        self._current = None  # Operation being recorded by record()
+        self.paused = False  # True while an undo/redo is replayed
+
+    @contextmanager
+    def record(self, user_id: str, label: str):
+        """Group every change made inside the block into one Operation (nested blocks join the outer one)."""
+        if self._current is not None or self.paused:
+            yield
+            return
+        self._current = Operation(user_id, label)
+        try:
+            yield
+        finally:
+            op, self._current = self._current, None
+            if len(op):
+                self._push(op)
+
+    def _push(self, op: Operation):
+        self._undo.setdefault(op.user_id, deque(maxlen=self.max_ops)).append(op)
+        self._redo.pop(op.user_id, None)
+
+    def _op(self, user_id: str, label: str):
+        """The Operation a change should be added to, or None while paused."""
+        if self.paused:
+            return None
+        if self._current is not None:
+            return self._current
+        op = Operation(user_id, label)
+        self._push(op)
+        return op
+
+    # ---------------- recording ----------------
+    def note_added(self, t):
+        op = self._op(t.user_id, "add")
+        if op is not None:
+            op.added.append(t)
+
+    def note_removed(self, t):
+        op = self._op(t.user_id, "delete")
+        if op is not None:
+            op.removed.append(t)
+
+    def note_updated(self, before, after):
+        """`after` is copied, since the live record may be edited again later."""
+        op = self._op(after.user_id, "edit")
+        if op is not None:
+            op.updated.append((before, after.copy()))
+
+    def note_goal(self, user_id: str, goal_id: str, before, after):
+        """`before` / `after` are copies of one goal (None when it didn't / doesn't exist)."""
+        op = self._op(user_id, "goal")
+        if op is not None:
+            op.goals[goal_id] = (op.goals[goal_id][0] if goal_id in op.goals else before, after)
+
+    # ---------------- undo / redo ----------------
+    def peek_undo(self, user_id: str):
+        stack = self._undo.get(user_id)
+        return stack[-1] if stack else None
+
+    def peek_redo(self, user_id: str):
+        stack = self._redo.get(user_id)
+        return stack[-1] if stack else None
+
+    def pop_undo(self, user_id: str):
+        """Take the newest operation off the undo stack (moving it to redo) and return it, or None."""
+        stack = self._undo.get(user_id)
+        if not stack:
+            return None
+        op = stack.pop()
+        self._redo.setdefault(user_id, deque(maxlen=self.max_ops)).append(op)
+        return op
+
+    def pop_redo(self, user_id: str):
+        """Take the newest undone operation off the redo stack (moving it back to undo) and return it, or None."""
+        stack = self._redo.get(user_id)
+        if not stack:
+            return None
+        op = stack.pop()
+        self._undo.setdefault(user_id, deque(maxlen=self.max_ops)).append(op)
+        return op
+
+    def forget(self, user_id: str = None):
+        """Drop the history of one user (or everyone), e.g. after their shard was rebuilt from disk."""
+        for stacks in (self._undo, self._redo):
+            if user_id is None:
+                stacks.clear()
+            else:
+                stacks.pop(user_id, None)
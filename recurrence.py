@@ -0,0 +1,132 @@
+import math
+import os
+import re
+from collections import Counter
+from datetime import date
+from indexes import day_of
+from utils import format_date, from_minor
+
+# name -> (typical gap in days, tolerance in days)
+PERIODS = {"weekly": (7, 1), "fortnightly": (14, 2), "monthly": (30, 3), "yearly": (365, 5)}
+BAND_WIDTH = math.log(1.1)  # amounts within ~10% of each other share a band
+_NOISE = re.compile(r"[^a-z ]+")
+
+def normalise_description(text: str) -> str:
+    """Lowercase, drop digits and punctuation ("Netflix #12" -> "netflix") so repeated bills group together."""
+    return " ".join(_NOISE.sub(" ", text.casefold()).split())
+
+def amount_band(minor: int) -> int:
+    return int(math.log(minor) / BAND_WIDTH) if minor > 0 else 0
+
+def detect_series(rows, decimals: int = 2, min_occurrences: int = 3, min_regularity: float = 0.75) -> list:
+    """Find periodic series in one user's rows and return proposed recurrence rules, most regular first.
+    `rows` are (date ordinal, minor, type, category, description, payment_method) tuples (plain data,
+    so the function can run in a worker process). Rows are grouped by normalised
+    (type, category, description, amount band) in one pass; each group's dates are sorted and its gaps
+    matched against PERIODS, so the whole run is O(n log n)."""
+    groups = {}
+    for row in rows:
+        _, minor, t_type, category, description = row[:5]
+        key = (t_type, category.casefold(), normalise_description(description), amount_band(minor))
+        groups.setdefault(key, []).append(row)
+
+    proposals = []
+    for (t_type, _, name, _), members in groups.items():
+        if len(members) < min_occurrences:
+            continue
+        days = sorted({m[0] for m in members})
+        gaps = [b - a for a, b in zip(days, days[1:])]
+        if len(gaps) < min_occurrences - 1 or len(days) < len(members) * 0.9: # several per day: not a bill
+            continue
+        for frequency, (period, tolerance) in PERIODS.items():
+            regular = sum(1 for g in gaps if abs(g - period) <= tolerance) / len(gaps)
+            if regular >= min_regularity:
+                break
+        else:
+            continue
+
+        last = date.fromordinal(days[-1])
+        amounts = sorted(m[1] for m in members)
+        description, seen = Counter(m[4] for m in members).most_common(1)[0]
+        rule = {
+            "type": t_type,
+            "amount": str(from_minor(amounts[len(amounts) // 2], decimals)), # median amount
+            "category": Counter(m[3] for m in members).most_common(1)[0][0],
+            "description": description if seen > 1 else name, # "Netflix #12", "Netflix #13"... -> "netflix"
+            "payment_method": Counter(m[5] for m in members).most_common(1)[0][0],
+            "frequency": frequency,
+            "day": Counter(date.fromordinal(d).day for d in days).most_common(1)[0][0],
+            "last_date": format_date(last),
+            "occurrences": len(members),
+            "regularity": round(regular, 2),
+        }
+        if frequency == "yearly":
+            rule["month"] = last.month
+        elif frequency in ("weekly", "fortnightly"):
+            rule["day"] = last.isoweekday() # 1 = Monday
+        proposals.append(rule)
+    proposals.sort(key=lambda r: (-r["regularity"], -r["occurrences"]))
+    return proposals
+
+def _rows(index) -> list:
+    """A user's hot rows as detect_series tuples (skips rows without a valid date or amount)."""
+    rows = []
+    for t in index.transactions:
+        d = day_of(t.date)
+        if d is not None and t.minor > 0 and t.type in ("income", "expense"):
+            rows.append((d.toordinal(), t.minor, t.type, t.category, t.description, t.payment_method))
+    return rows
+
+
+class RecurrenceDetector:
+    """Proposes recurrence rules from a user's history, for bills entered by hand rather than
+    through recurring_transaction. Accepted proposals are stored with the user's other recurring
+    rules (recurring.json), where forecasts pick them up."""
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+
+    @staticmethod
+    def _known(rule, rules) -> bool:
+        """True if an existing rule already covers this series (same type, category, frequency, ~amount)."""
+        for other in rules:
+            if (other.get("type") == rule["type"] and other.get("category", "").casefold() == rule["category"].casefold()
+                    and other.get("frequency") == rule["frequency"]):
+                try:
+                    if abs(float(other["amount"]) - float(rule["amount"])) <= 0.1 * float(rule["amount"]):
+                        return True
+                except (KeyError, ValueError):
+                    continue
+        return False
+
+    def _new_only(self, user_id: str, proposals: list) -> list:
+        rules = self.data_manager.load_recurring(user_id)
+        return [p for p in proposals if not self._known(p, rules)]
+
+    def propose(self, user_id: str) -> list:
+        """Proposed rules for one user's series that no recurring rule covers yet."""
+        index = self.data_manager.user_index(user_id)
+        return self._new_only(user_id, detect_series(_rows(index), index.decimals))
+
+    def propose_all(self, workers: int = None) -> dict:
+        """Proposals for every user: {user_id: [rule, ...]}. With workers > 1 (default: the
+        PFM_DETECT_WORKERS env var, 1) each user's detection runs in a separate process."""
+        workers = workers if workers is not None else int(os.environ.get("PFM_DETECT_WORKERS", 1))
+        user_ids = list(self.data_manager.manifest['users'])
+        if workers <= 1 or len(user_ids) < 2:
+            return {user_id: self.propose(user_id) for user_id in user_ids}
+
+        from concurrent.futures import ProcessPoolExecutor # only needed for the parallel path
+        jobs = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for user_id in user_ids: # shards are loaded here, one at a time; detection runs in the pool
+                index = self.data_manager.user_index(user_id)
+                jobs[user_id] = pool.submit(detect_series, _rows(index), index.decimals)
+            return {user_id: self._new_only(user_id, job.result()) for user_id, job in jobs.items()}
+
+    def accept(self, user_id: str, proposals: list):
+        """Save proposals as recurring rules (without the detection statistics)."""
+        rules = self.data_manager.load_recurring(user_id)
+        for proposal in proposals:
+            rules.append({k: v for k, v in proposal.items() if k not in ("occurrences", "regularity")})
+        self.data_manager.save_recurring(user_id, rules)
@@ -1,69 +1,240 @@
 from datetime import datetime, date
-from collections import defaultdict
-from utils import pause, parse_date
+from utils import pause, parse_date, to_minor, today_date
 from data_manager import DataManager
-from decimal import Decimal as decimal
 import calendar
+from instrumentation import timed
+from cache import ReportCache
+from forecasting import Forecaster
+from distribution import ACCURACY, EXACT_LIMIT, exact_histogram, exact_quantiles, size_edges
+
+QUANTILES = (0.5, 0.9, 0.99)  # median, p90, p99
 
 class Reports:
     def __init__(self, data_manager: DataManager):
         """Initialize the reports module with a DataManager used to read transactions."""
         self.data_manager = data_manager
         #initializing our data manager
+        self.cache = ReportCache() # report results, reused until the user's data version changes
+        self.forecaster = Forecaster(data_manager) # cash-flow projections from monthly aggregates
+
+    def _cached(self, user_id: str, report: str, params, compute):
+        """Return compute()'s result for (user_id, report, params), reusing it while the user's data is unchanged."""
+        return self.cache.get_or_compute(user_id, report, params, self.data_manager.data_version(user_id), compute)
+
+    # ----------------- report data (no printing, used by the screens below and the batch CLI) ----------------
+    def summary_totals(self, user_id: str) -> dict:
+        """Return {"income", "expense", "balance"} as Decimals for all of the user's transactions."""
+        def compute():
+            # totals are kept up to date by the user's index (in minor units), no rescan needed
+            index = self.data_manager.user_index(user_id)
+            income = index.money(index.totals['income'])
+            expense = index.money(index.totals['expense'])
+            return {"income": income, "expense": expense, "balance": income - expense}
+        return self._cached(user_id, "summary", None, compute)
+
+    def monthly_totals(self, user_id: str, year: int, month: int):
+        """Return {"income", "expense", "net"} as Decimals for one month, or None if it has no transactions."""
+        def compute():
+            index = self.data_manager.user_index(user_id)
+            monthly = index.by_month.get((year, month))
+            if not monthly or monthly['count'] <= 0:
+                return None
+            income = index.money(monthly['income'])
+            expense = index.money(monthly['expense'])
+            return {"income": income, "expense": expense, "net": income - expense}
+        return self._cached(user_id, "monthly", (year, month), compute)
+
+    def category_totals(self, user_id: str) -> dict:
+        """Return {category: {"income", "expense"}} (Decimals) for categories that have transactions."""
+        def compute():
+            index = self.data_manager.user_index(user_id)
+            return {cat: {"income": index.money(totals['income']), "expense": index.money(totals['expense'])}
+                    for cat, totals in index.by_category.items() if totals['count'] > 0}
+        return self._cached(user_id, "categories", None, compute)
+
+    def monthly_expenses(self, user_id: str) -> dict:
+        """Return {"YYYY-MM": total expense (Decimal)} for every month with expenses, oldest first."""
+        def compute():
+            index = self.data_manager.user_index(user_id)
+            return {
+                f"{year}-{month:02d}": index.money(totals['expense'])
+                for (year, month), totals in sorted(index.by_month.items())
+                if totals['expense'] > 0
+            }
+        return self._cached(user_id, "trends", None, compute)
+
+    def balance_at(self, user_id: str, day: date, start: date = None) -> dict:
+        """Return {"date", "balance"} at the end of `day`, plus "net" over start..day when start is given.
+        Answered from the index's per-day prefix sums in O(log n); not cached, it's cheaper than a cache key."""
+        index = self.data_manager.user_index(user_id)
+        result = {"date": day, "balance": index.money(index.balance_on(day))}
+        if start is not None:
+            result["from"] = start
+            result["net"] = index.money(index.net_between(start, day))
+        return result
+
+    def forecast(self, user_id: str, months: int = 12) -> list:
+        """Return projected monthly income, expense, net and month-end balance for the next `months` months
+        (see forecasting.Forecaster)."""
+        today = today_date()
+        return self._cached(user_id, "forecast", (months, today),
+                            lambda: self.forecaster.project(user_id, months, today))
+
+    def budget_status(self, user_id: str, year: int, month: int) -> list:
+        """Return one dict per budget for (year, month): {"category", "limit", "spent", "remaining"} as Decimals
+        and "used_pct". Spending comes from the index's per-category monthly totals, so this is O(budgets);
+        it isn't cached because budgets.json can change without the transactions changing."""
+        index = self.data_manager.user_index(user_id)
+        rows = []
+        for category, limit in sorted(self.data_manager.load_budgets(user_id).items()):
+            bucket = index.by_category_month.get((category, year, month))
+            spent = bucket["expense"] if bucket else 0
+            rows.append({"category": category, "limit": index.money(limit), "spent": index.money(spent),
+                         "remaining": index.money(limit - spent),
+                         "used_pct": round(spent * 100 / limit, 1) if limit > 0 else 0.0})
+        return rows
+
+    def expense_distribution(self, user_id: str, year: int = None, month: int = None) -> dict:
+        """Return the spread of expense amounts, optionally for one year or month:
+        {"categories": [{"category", "count", "median", "p90", "p99", "exact"}, ...] (largest p90 first),
+         "overall": the same for every category together,
+         "histogram": [{"from", "to", "count"}, ...], "histogram_exact": bool}
+        with Decimal amounts, over the positive expense amounts. Groups of up to PFM_STATS_EXACT_LIMIT (100,000)
+        expenses get exact quantiles by selection over the index's per-(category, month) amounts (expected O(n),
+        no sort) and, for the overall group, an exact histogram. Larger groups are read from the per-(category,
+        month) quantile sketches (see distribution.QuantileSketch), within PFM_STATS_ACCURACY (1%) of the exact
+        values; "exact" / "histogram_exact" say which was used. Archived years are not included."""
+        def compute():
+            index = self.data_manager.user_index(user_id)
+
+            def amounts_for(sketch, category=None):
+                """The group's amounts if it is small enough to be exact, else None (use the sketch)."""
+                return index.expense_amounts(category, year, month) if sketch.n <= EXACT_LIMIT else None
+
+            def row(name, sketch, amounts):
+                exact = amounts is not None
+                values = exact_quantiles(amounts, QUANTILES) if exact else sketch.quantiles(QUANTILES)
+                median, p90, p99 = (index.money(v) for v in values)
+                return {"category": name, "count": len(amounts) if exact else sketch.n,
+                        "median": median, "p90": p90, "p99": p99, "exact": exact}
+
+            categories = sorted({key[0] for key in index.sketches()})
+            rows = [row(c, s, amounts_for(s, c)) for c in categories for s in [index.expense_sketch(c, year, month)] if s.n]
+            rows.sort(key=lambda r: -r["p90"])
+            overall = index.expense_sketch(year=year, month=month)
+            amounts = amounts_for(overall)
+            if amounts is not None:
+                edges = size_edges(max(amounts, default=0), index.decimals)
+                counts = exact_histogram(amounts, edges)
+            else:
+                edges = size_edges(overall.quantiles((1.0,))[0], index.decimals)
+                counts = overall.histogram(edges)
+            histogram = [{"from": index.money(low), "to": index.money(high) if high is not None else None, "count": n}
+                         for low, high, n in zip(edges, edges[1:] + [None], counts) if n]
+            return {"categories": rows, "overall": row("All", overall, amounts), "histogram": histogram,
+                    "histogram_exact": amounts is not None}
+        return self._cached(user_id, "distribution", (year, month), compute)
+
     # ----------------- dashboard summary ----------------
+    @timed()
     def show_dashboard_summary(self, user_id: str):
         """Print overall income, expense, and balance summary for the user."""
         print("=== 📊 DASHBOARD SUMMARY ===")
-        # txns = transactions
-        txns = self.data_manager.get_transactions(user_id)
-
-        total_income = sum(t['amount'] for t in txns if t['type'] == 'income')
-        total_expense = sum(t['amount'] for t in txns if t['type'] == 'expense')
-        balance = total_income - total_expense
+        totals = self.summary_totals(user_id)
 
-        print(f"💰 Total Income:  {total_income:.2f}")
-        print(f"💸 Total Expense: {total_expense:.2f}")
-        print(f"🧾 Balance:       {balance:.2f}\n")
+        print(f"💰 Total Income:  {totals['income']:.2f}")
+        print(f"💸 Total Expense: {totals['expense']:.2f}")
+        print(f"🧾 Balance:       {totals['balance']:.2f}\n")
 
     # ---------------- Monthly report -----------------
+    @timed()
     def show_monthly_report(self, user_id: str, year:int, month: int):
         """Show income, expense, and net totals for the specified month and user."""
         print(f"=== 📅 REPORT for {year}-{month:02d} ===")
 
-        txns = self.data_manager.get_transactions(user_id)
-
-        monthly_txns = [
-            t for t in txns
-            if datetime.strptime(t['date'], '%d/%m/%Y').year == year and
-               datetime.strptime(t['date'], '%d/%m/%Y').month == month
-        ]
-
-        if not monthly_txns:
+        monthly = self.monthly_totals(user_id, year, month)
+        if monthly is None:
             print("No transactions for this month.")
             return
 
-        total_income = sum(t['amount'] for t in txns if t['type'] == 'income')
-        total_expense = sum(t['amount'] for t in txns if t['type'] == 'expense')
-        net = total_income - total_expense
-
-        print(f"Income: {total_income:.2f}")
-        print(f"Expense: {total_expense:.2f}")
-        print(f"net: {net:.2f}")
+        print(f"Income: {monthly['income']:.2f}")
+        print(f"Expense: {monthly['expense']:.2f}")
+        print(f"net: {monthly['net']:.2f}")
+
+    # ---------------- Balance on a date -----------------
+    @timed()
+    def show_balance_on_date(self, user_id: str, day: date, start: date = None):
+        """Show the balance at the end of a date and, optionally, the net flow since another date."""
+        result = self.balance_at(user_id, day, start)
+        print(f"=== 💳 BALANCE on {day:%d/%m/%Y} ===")
+        print(f"Balance: {result['balance']:.2f}")
+        if start is not None:
+            print(f"Net flow {start:%d/%m/%Y} → {day:%d/%m/%Y}: {result['net']:.2f}")
+
+    # ---------------- Cash-flow forecast -----------------
+    @timed()
+    def show_forecast(self, user_id: str, months: int = 12):
+        """Print the projected month-end balances for the next months."""
+        rows = self.forecast(user_id, months)
+        print(f"=== 🔮 CASH-FLOW FORECAST (next {months} months) ===")
+        print(f"{'Month':<8} {'Income':>12} {'Expense':>12} {'Net':>12} {'Balance':>14} {'Known':>12}")
+        print("-" * 75)
+        for row in rows:
+            print(f"{row['month']:<8} {row['income']:>12.2f} {row['expense']:>12.2f} {row['net']:>12.2f} "
+                  f"{row['balance']:>14.2f} {row['known']:>12.2f}")
+        print("-" * 75)
+        print("Known = scheduled and recurring transactions; the rest comes from your average spending per category.")
+
+    # ---------------- Budget status -----------------
+    @timed()
+    def show_budget_status(self, user_id: str, year: int, month: int):
+        """Print each budget's limit, spending and remaining amount for one month, with a usage bar."""
+        rows = self.budget_status(user_id, year, month)
+        print(f"=== 📏 BUDGET STATUS for {year}-{month:02d} ===")
+        if not rows:
+            print("No budgets yet. Set them in Transactions Menu → Budgets.")
+            return
+        print(f"{'Category':<16} {'Limit':>10} {'Spent':>10} {'Left':>10}  Used")
+        print("-" * 70)
+        for row in rows:
+            filled = min(20, int(row["used_pct"] / 5))
+            flag = " 🚨" if row["used_pct"] > 100 else (" ⚠️" if row["used_pct"] >= 80 else "")
+            print(f"{row['category']:<16} {row['limit']:>10.2f} {row['spent']:>10.2f} {row['remaining']:>10.2f}  "
+                  f"{'#' * filled}{'.' * (20 - filled)} {row['used_pct']:.0f}%{flag}")
+
+    # ---------------- Expense distribution -----------------
+    @timed()
+    def show_expense_distribution(self, user_id: str, year: int = None, month: int = None):
+        """Print median, p90 and p99 expense per category and a histogram of expense sizes."""
+        result = self.expense_distribution(user_id, year, month)
+        period = f"{year}-{month:02d}" if month else (str(year) if year else "all time")
+        print(f"=== 📐 EXPENSE DISTRIBUTION ({period}) ===")
+        if not result["categories"]:
+            print("No expenses found for this period.")
+            return
+        print(f"{'Category':<16} {'Count':>7} {'Median':>10} {'p90':>10} {'p99':>10}")
+        print("-" * 57)
+        for row in result["categories"] + [result["overall"]]:
+            if row is result["overall"]:
+                print("-" * 57)
+            print(f"{row['category']:<16} {row['count']:>7} {row['median']:>10.2f} {row['p90']:>10.2f} {row['p99']:>10.2f}")
+
+        print("\nExpense sizes:" if result["histogram_exact"] else "\nExpense sizes (approximate):")
+        largest = max(b["count"] for b in result["histogram"])
+        for b in result["histogram"]:
+            label = f"{b['from']:.0f}–{b['to']:.0f}" if b["to"] is not None else f"{b['from']:.0f}+"
+            print(f"{label:>14} | {'#' * max(1, b['count'] * 40 // largest)} {b['count']}")
+        if not all(row["exact"] for row in result["categories"] + [result["overall"]]):
+            print(f"Percentiles of groups over {EXACT_LIMIT:,} expenses (and approximate bins) are accurate to about {ACCURACY:.0%}.")
 
     #-------------- Category BreakDown ------------
 
+    @timed()
     def show_category_breakdown(self, user_id: str):
         """Display income and expense totals grouped by category for the user."""
         print("=== 📂 CATEGORY BREAKDOWN ===")
 
-        txns = self.data_manager.get_transactions(user_id)
-        categories = defaultdict(lambda: {"income": decimal("0"), "expense": decimal("0")})
-
-        for t in txns:
-            if t['type'] == 'income':
-                categories[t['category']]['income'] += t['amount']
-            elif t['type'] == 'expense':
-                categories[t['category']]['expense'] += t['amount']
+        categories = self.category_totals(user_id)
 
         if not categories:
             print("No transactions found!")
@@ -75,24 +246,18 @@ class Reports:
             print(f"{category:<20} | {totals['income']:>10.2f} | {totals['expense']:>10.2f}")
 
     # -------------- Spending trends --------------
+    @timed()
     def show_spending_trends(self, user_id: str):
         """Print total expenses per month to visualize spending trends over time."""
         print("=== 📈 SPENDING TRENDS ===")
 
-        txns = self.data_manager.get_transactions(user_id)
-        monthly_expenses = defaultdict(decimal)
-
-        for t in txns:
-            if t['type'] == 'expense':
-                date = datetime.strptime(t['date'], '%d/%m/%Y')
-                month_key = f"{date.year}-{date.month:02d}"
-                monthly_expenses[month_key] += t['amount']
+        monthly_expenses = self.monthly_expenses(user_id)
 
         if not monthly_expenses:
             print("No transactions for this month.")
             return
 
-        for month, total in sorted(monthly_expenses.items()):
+        for month, total in monthly_expenses.items():
             print(f"{month}: {total:.2f}")
 
     # ----------------- Search & Filter Menu -----------------
@@ -122,17 +287,32 @@ class Reports:
                 print("Invalid choice!")
 
     # ---------------- Filter by Category ----------------
+    # The prompt screens below time only their *_matching / sorted_* helper, not the input() and pause() waits.
+    @timed("Reports.filter_by_category")
+    def category_matching(self, user_id: str, category: str) -> list:
+        """Transactions whose category equals `category` (case-insensitive)."""
+        category = category.lower()
+        # iter_transactions also streams archived years, keeping only the matching rows
+        return self._cached(user_id, "filter_by_category", category, lambda: [
+            t for t in self.data_manager.iter_transactions(user_id) if t.category.lower() == category])
+
     def filter_by_category(self, user_id: str):
         """Filter and display transactions that exactly match a given category name."""
-        txns = self.data_manager.get_transactions(user_id)
-        category = input("Enter category name: ").lower()
-        results = [t for t in txns if t['category'].lower() == category]
-        self.display_results(results)
+        category = input("Enter category name: ")
+        self.display_results(self.category_matching(user_id, category))
 
     # ---------------- Filter by Date Range ----------------
+    @timed("Reports.filter_by_date_range")
+    def dates_matching(self, user_id: str, start_date: datetime, end_date: datetime) -> list:
+        """Transactions dated between start_date and end_date (inclusive)."""
+        # only archived years inside the range are opened
+        return self._cached(user_id, "filter_by_date_range", (start_date, end_date), lambda: [
+            t for t in self.data_manager.iter_transactions(user_id, start_date.date(), end_date.date())
+            if start_date <= datetime.strptime(t.date, "%d/%m/%Y") <= end_date
+        ])
+
     def filter_by_date_range(self, user_id: str):
         """Filter transactions between two dates (inclusive) entered by the user."""
-        txns = self.data_manager.get_transactions(user_id)
         start = input("Start date (DD/MM/YYYY): ")
         end = input("End date (DD/MM/YYYY): ")
 
@@ -144,33 +324,46 @@ class Reports:
             pause()
             return
 
-        results = [
-            t for t in txns
-            if start_date <= datetime.strptime(t['date'], "%d/%m/%Y") <= end_date
-        ]
-
-        self.display_results(results)
+        self.display_results(self.dates_matching(user_id, start_date, end_date))
 
     # ---------------- Filter by Amount Range ----------------
+    @timed("Reports.filter_by_amount_range")
+    def amounts_matching(self, user_id: str, min_amt: int, max_amt: int) -> list:
+        """Transactions whose amount (minor units) is between min_amt and max_amt (inclusive)."""
+        return self._cached(user_id, "filter_by_amount_range", (min_amt, max_amt), lambda: [
+            t for t in self.data_manager.iter_transactions(user_id) if min_amt <= t.minor <= max_amt])
+
     def filter_by_amount_range(self, user_id: str):
         """Filter transactions whose amounts fall within a user-provided range."""
-        txns = self.data_manager.get_transactions(user_id)
+        decimals = self.data_manager.currency_decimals(user_id)
         try:
-            min_amt = decimal(input("Minimum amount: "))
-            max_amt = decimal(input("Maximum amount: "))
-        except ValueError:
+            # compare in integer minor units, converted once instead of per row
+            min_amt = to_minor(input("Minimum amount: "), decimals)
+            max_amt = to_minor(input("Maximum amount: "), decimals)
+        except (ValueError, ArithmeticError):
             print("Please enter valid numbers!")
             pause()
             return
 
-        results = [t for t in txns if min_amt <= t['amount'] <= max_amt]
-        self.display_results(results)
+        self.display_results(self.amounts_matching(user_id, min_amt, max_amt))
 
     # ---------------- Sort Transactions ----------------
+    SORT_ORDERS = {
+        "1": (lambda t: datetime.strptime(t.date, "%d/%m/%Y"), True),
+        "2": (lambda t: datetime.strptime(t.date, "%d/%m/%Y"), False),
+        "3": (lambda t: t.minor, True),
+        "4": (lambda t: t.minor, False),
+    }
+
+    @timed("Reports.sort_transactions")
+    def sorted_transactions(self, user_id: str, choice: str) -> list:
+        """All transactions in one of the SORT_ORDERS ("1"-"4")."""
+        key, reverse = self.SORT_ORDERS[choice]
+        return self._cached(user_id, "sort_transactions", choice, lambda: sorted(
+            self.data_manager.iter_transactions(user_id), key=key, reverse=reverse))
+
     def sort_transactions(self, user_id: str):
         """Sort and display transactions by date or amount in ascending/descending order."""
-        txns = self.data_manager.get_transactions(user_id)
-
         print("\nSort by:")
         print("1. Date (newest first)")
         print("2. Date (oldest first)")
@@ -178,20 +371,11 @@ class Reports:
         print("4. Amount (low to high)")
         choice = input("Choose option: ").strip()
 
-        if choice == "1":
-            results = sorted(txns, key=lambda t: datetime.strptime(t['date'], "%d/%m/%Y"), reverse=True)
-        elif choice == "2":
-            results = sorted(txns, key=lambda t: datetime.strptime(t['date'], "%d/%m/%Y"))
-        elif choice == "3":
-            results = sorted(txns, key=lambda t: t['amount'], reverse=True)
-        elif choice == "4":
-            results = sorted(txns, key=lambda t: t['amount'])
-        else:
+        if choice not in self.SORT_ORDERS:
             print("Invalid choice!")
             pause()
             return
-
-        self.display_results(results)
+        self.display_results(self.sorted_transactions(user_id, choice))
 
     # ---------------- Helper to Display Results ----------------
     def display_results(self, results):
@@ -203,69 +387,58 @@ class Reports:
             print(f"{'Date':<12} | {'Type':<12} | {'Category':<15} | {'Amount':<12} | {'Description':<15}")
             print("-" * 80)
             for t in results:
-                print(f"{t['date']:<12} | {t['type']:<12} | {t['category']:<15} | {t['amount']:<12} | {t['description']:<15}")
+                print(f"{t.date:<12} | {t.type:<12} | {t.category:<15} | {t.amount:<12} | {t.description:<15}")
         pause()
 
 
     #----------------Advanced features ASCII visualizations ----------------
 
+    @timed()
     def ascii_category_bars(self, user_id: str):
         """
         ASCII bar chart by expense category.
         Uses all transactions for the user.
         """
 
-        # Group totals by category (only expenses)
-        sums = defaultdict(float)
-        for t in self.data_manager.get_transactions(user_id):
-            if t.get("type") == "expense":
-                cat = t.get("category", "Uncategorized")
-                try:
-                    amt = float(t.get("amount", 0))
-                    sums[cat] += amt
-                except ValueError:
-                    continue
+        # Expense totals by category (minor units) come straight from the user's index
+        index = self.data_manager.user_index(user_id)
+        sums = self._cached(user_id, "ascii_category_bars", None, lambda: {
+            cat or "Uncategorized": totals["expense"]
+            for cat, totals in index.by_category.items()
+            if totals["expense"] > 0
+        })
 
         if not sums:
             print("\nNo expenses found to visualize.\n")
             return
 
-        # Scale bars
+        # Scale bars with integer math: the largest category gets 40 chars
         max_val = max(sums.values())
-        scale = max_val / 40 if max_val > 0 else 1  # 40 chars wide max
 
         print("\n📊 Expense Breakdown by Category (ASCII)")
         print("-" * 50)
         for cat, total in sorted(sums.items(), key=lambda x: -x[1]):
-            bar_len = int(total / scale)
+            bar_len = total * 40 // max_val
             bar = "#" * bar_len
-            print(f"{cat:<15} | {bar} {total:.2f}")
+            print(f"{cat:<15} | {bar} {index.money(total):.2f}")
         print("-" * 50)
 
+    @timed()
     def ascii_last_12_months_vertical(self, user_id: str):
         """
         Vertical ASCII chart of total expenses over the last 12 months.
         Each column = one month. The higher the column, the higher the expense.
         """
 
-        txs = self.data_manager.get_transactions(user_id)
-        if not txs:
+        index = self.data_manager.user_index(user_id)
+        if not len(index) and not index.archived_count:
             print("\nNo transactions found.\n")
             return
 
         today = date.today()
         year, month = today.year, today.month
-        totals = defaultdict(float)
 
-        # 1️⃣ Aggregate totals per (year, month)
-        for t in txs:
-            if t.get("type") != "expense":
-                continue
-            d = parse_date(str(t.get("date", "")))
-            key = (d.year, d.month)
-            totals[key] += float(t.get("amount", 0) or 0)
-
-        # 2️⃣ Build list of last 12 months
+        # 1️⃣ Build list of last 12 months
         months = []
         for i in range(12):
             m = month - i
@@ -276,28 +449,28 @@ class Reports:
             months.append((y, m))
         months.reverse()
 
-        # 3️⃣ Prepare data
-        vals = [totals.get(k, 0.0) for k in months]
-        max_val = max(vals) if vals else 1
-        scale = max_val / 10 if max_val > 0 else 1  # max 10 rows high
+        # 2️⃣ Totals per (year, month) are maintained by the user's index, in minor units
+        vals = self._cached(user_id, "ascii_last_12_months", (year, month), lambda: [
+            index.by_month[k]["expense"] if k in index.by_month else 0 for k in months])
+        max_val = max(vals) if vals else 0
 
-        # 4️⃣ Build 2D grid (10 rows × 12 months)
+        # 3️⃣ Build 2D grid (10 rows × 12 months)
         grid = []
         for level in range(10, 0, -1):
             row = ""
-            threshold = level * scale
             for v in vals:
-                row += " █ " if v >= threshold else "   "
+                # v >= level * max_val / 10, kept in integers
+                row += " █ " if max_val > 0 and v * 10 >= level * max_val else "   "
             grid.append(row)
 
-        # 5️⃣ Print chart
+        # 4️⃣ Print chart
         print("\n📊 Expense Trend - Last 12 Months (Vertical ASCII)")
         print("-" * 50)
         for r in grid:
             print(r)
         print("-" * 50)
         print("".join([f"{calendar.month_abbr[m][0:3]:^3}" for (_, m) in months]))
-        print("".join([f"{v:>3.0f}" for v in vals]))
+        print("".join([f"{index.money(v):>3.0f}" for v in vals]))
         print("-" * 50)
 
     # -----------------Submenu for reports------------------------
@@ -314,8 +487,12 @@ class Reports:
             print("5. 🔍 Search & Filter")
             print("6. 📊 Ascii Category Bars")
             print("7. 📉 Ascii Last 12 Months Vertical")
-            print("8. 🔙 Back")
-            choice = input("👉 Choose an option (1–8): ").strip()
+            print("8. 💳 Balance on a Date")
+            print("9. 🔮 Cash-flow Forecast")
+            print("10. 📏 Budget Status")
+            print("11. 📐 Expense Distribution")
+            print("12. 🔙 Back")
+            choice = input("👉 Choose an option (1–12): ").strip()
 
             if choice == "1":
                 self.show_dashboard_summary(user_id)
@@ -344,9 +521,44 @@ class Reports:
                 self.ascii_last_12_months_vertical(user_id)
 
             elif choice == "8":
+                try:
+                    day = parse_date(input("Date (dd/mm/YYYY): ").strip())
+                    raw_start = input("Net flow since (dd/mm/YYYY, Enter to skip): ").strip()
+                    self.show_balance_on_date(user_id, day, parse_date(raw_start) if raw_start else None)
+                except ValueError:
+                    print("❌ Invalid date. Use dd/mm/YYYY.")
+
+            elif choice == "9":
+                raw = input("How many months ahead? (Enter for 12): ").strip()
+                if raw.isdigit() and int(raw) > 0 or not raw:
+                    self.show_forecast(user_id, int(raw) if raw else 12)
+                else:
+                    print("❌ Please enter a positive number of months.")
+
+            elif choice == "10":
+                today = today_date()
+                raw = input(f"Month (mm/YYYY, Enter for {today:%m/%Y}): ").strip()
+                try:
+                    when = datetime.strptime(raw, "%m/%Y") if raw else today
+                    self.show_budget_status(user_id, when.year, when.month)
+                except ValueError:
+                    print("❌ Invalid month. Use mm/YYYY.")
+
+            elif choice == "11":
+                raw = input("Period (YYYY or mm/YYYY, Enter for all time): ").strip()
+                try:
+                    if "/" in raw:
+                        when = datetime.strptime(raw, "%m/%Y")
+                        self.show_expense_distribution(user_id, when.year, when.month)
+                    else:
+                        self.show_expense_distribution(user_id, int(raw) if raw else None)
+                except ValueError:
+                    print("❌ Invalid period. Use YYYY or mm/YYYY.")
+
+            elif choice == "12":
                 print("↩️ Returning to user menu...")
                 return
 
             else:
-                print("❌ Invalid choice! Please select 1–8.")
+                print("❌ Invalid choice! Please select 1–12.")
             pause()
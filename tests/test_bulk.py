@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from data_manager import DataManager
+from transactions import TransactionManager
+
+
+class BulkUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.root = tempfile.mkdtemp(prefix="pfm_test_")
+        os.chdir(self.root) # DataManager works on ./data
+        self.dm = DataManager()
+        self.tm = TransactionManager(self.dm)
+        for amount, category in (("1000", "salary"), ("250", "food"), ("10", "food")):
+            t_type = "income" if category == "salary" else "expense"
+            self.tm.add_transaction("u1", t_type, amount, category, "01/03/2025", "", "bank", interactive=False)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_bad_value_leaves_every_record_unchanged(self):
+        before = [t.to_dict() for t in self.dm.get_transactions("u1")]
+        with self.assertRaises(ArithmeticError):
+            self.tm.bulk_update("u1", {"type": "expense", "amount": "Infinity"}, ids=["TXN001", "TXN002"])
+        self.assertEqual([t.to_dict() for t in self.dm.get_transactions("u1")], before)
+        self.assertEqual(self.dm.user_index("u1").totals, {"income": 100000, "expense": 26000})
+
+    def test_update_keeps_index_in_step(self):
+        self.assertEqual(self.tm.bulk_update("u1", {"category": "groceries"}, predicate=lambda t: t.category == "food"), 2)
+        index = self.dm.user_index("u1")
+        self.assertEqual(index.by_category["groceries"]["expense"], 26000)
+        self.assertEqual(index.by_category["food"]["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
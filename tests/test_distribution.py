@@ -0,0 +1,86 @@
+import random
+import unittest
+from decimal import Decimal
+
+from distribution import QuantileSketch, exact_quantiles, select
+from indexes import UserIndex
+from models import Transaction
+from reports import Reports
+
+
+def expense(n, amount, category="food", date="05/03/2025"):
+    return Transaction(transaction_id=f"TXN{n:03d}", user_id="u1", type="expense", minor=int(amount * 100),
+                       category=category, date=date, description="", payment_method="cash", decimals=2)
+
+
+class _Data:
+    """Just the two DataManager calls expense_distribution() makes."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def user_index(self, user_id):
+        return self.index
+
+    def data_version(self, user_id):
+        return self.index.version
+
+
+class SelectionTest(unittest.TestCase):
+    def test_select_matches_sorted(self):
+        rng = random.Random(7)
+        values = [rng.randint(1, 500) for _ in range(2000)]
+        ordered = sorted(values)
+        for k in (0, 1, 999, 1800, 1999):
+            self.assertEqual(select(values, k), ordered[k])
+
+    def test_nearest_rank(self):
+        self.assertEqual(exact_quantiles([700, 250000], (0.5, 0.9, 0.99)), [700, 250000, 250000])
+        self.assertEqual(exact_quantiles([], (0.5,)), [0])
+
+    def test_sketch_within_accuracy(self):
+        sketch = QuantileSketch()
+        for minor in range(100, 100_100):
+            sketch.add(minor)
+        median = sketch.quantiles((0.5,))[0]
+        self.assertLess(abs(median - 50_099) / 50_099, 0.011)
+
+
+class ExpenseDistributionTest(unittest.TestCase):
+    def test_small_groups_are_exact(self):
+        rows = [expense(1, 50)] + [expense(n, 30, "rent") for n in range(2, 6)]
+        index = UserIndex("u1", rows)
+        result = Reports(_Data(index)).expense_distribution("u1")
+        by_category = {row["category"]: row for row in result["categories"]}
+        self.assertEqual(by_category["food"]["median"], Decimal("50.00"))
+        self.assertEqual(by_category["rent"]["median"], Decimal("30.00"))
+        self.assertEqual(by_category["rent"]["p99"], Decimal("30.00"))
+        self.assertTrue(by_category["food"]["exact"])
+        self.assertEqual(result["overall"]["p90"], Decimal("50.00"))
+
+    def test_edits_and_deletes_stay_exact(self):
+        rows = [expense(n, amount) for n, amount in enumerate((10, 20, 30, 40, 1000), start=1)]
+        index = UserIndex("u1", rows)
+        reports = Reports(_Data(index))
+        self.assertEqual(reports.expense_distribution("u1", 2025, 3)["overall"]["median"], Decimal("30.00"))
+        index.remove(rows[4])
+        before = rows[0].copy()
+        rows[0].minor = 2500
+        index.update(before, rows[0])
+        result = reports.expense_distribution("u1", 2025, 3)["overall"]
+        self.assertEqual((result["count"], result["median"], result["p99"]), (4, Decimal("25.00"), Decimal("40.00")))
+
+    def test_histogram_bins_round_amounts_from_their_edge(self):
+        rows = [expense(1, 5), expense(2, 50), expense(3, 7)]
+        result = Reports(_Data(UserIndex("u1", rows))).expense_distribution("u1")
+        self.assertTrue(result["histogram_exact"])
+        bins = {(b["from"], b["to"]): b["count"] for b in result["histogram"]}
+        self.assertEqual(bins, {(Decimal("5.00"), Decimal("10.00")): 2, (Decimal("50.00"), None): 1})
+
+    def test_count_matches_percentile_population(self):
+        rows = [expense(1, 0), expense(2, 20), expense(3, 40)]
+        overall = Reports(_Data(UserIndex("u1", rows))).expense_distribution("u1")["overall"]
+        self.assertEqual((overall["count"], overall["median"]), (2, Decimal("20.00")))
+
+if __name__ == "__main__":
+    unittest.main()
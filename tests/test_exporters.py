@@ -0,0 +1,37 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import exporters
+from models import Transaction
+
+
+def rows():
+    return [Transaction(f"TXN{n:03d}", "u1", "expense", n * 100, "food", "01/03/2025", "", "card") for n in range(1, 4)]
+
+
+@unittest.skipIf(exporters._load_pyarrow(), "checks the stdlib fallback used without pyarrow")
+class ColumnarWithoutPyarrowTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="pfm_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_parquet_name_becomes_pfmc(self):
+        count, fmt, path = exporters.export_columnar(rows(), os.path.join(self.root, "out.parquet"))
+        self.assertEqual((count, fmt, os.path.basename(path)), (3, "pfmc", "out.pfmc"))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "out.parquet")))
+
+    def test_gz_target_is_compressed(self):
+        _, _, path = exporters.export_columnar(rows(), os.path.join(self.root, "out.pfmc.gz"))
+        with gzip.open(path, "rb") as f:
+            self.assertEqual(f.read(8), exporters.PFMC_MAGIC)
+        amounts = [a for _, columns in exporters.read_pfmc(path) for a in columns["amount_minor"]]
+        self.assertEqual(amounts, [100, 200, 300])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from data_manager import DataManager
+from models import Transaction
+
+
+class ImportInvalidAmountsTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.root = tempfile.mkdtemp(prefix="pfm_test_")
+        os.chdir(self.root) # DataManager works on ./data
+        self.dm = DataManager()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_from_dict_rejects_bad_amounts(self):
+        for amount in ("abc", "1,234.50", "Infinity", "NaN", ""):
+            with self.assertRaises((ValueError, ArithmeticError)):
+                Transaction.from_dict({"amount": amount})
+
+    def test_rows_with_invalid_amounts_are_skipped(self):
+        path = os.path.join(self.root, "bank.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["type", "amount", "category", "date", "description", "payment_method"])
+            writer.writerow(["expense", "12.50", "food", "01/03/2025", "lunch", "card"])
+            writer.writerow(["expense", "abc", "food", "02/03/2025", "typo", "card"])
+            writer.writerow(["expense", "1,234.50", "rent", "03/03/2025", "thousands separator", "bank"])
+            writer.writerow(["income", "Infinity", "salary", "04/03/2025", "", "bank"])
+
+        self.assertEqual(self.dm.import_transactions_csv("u1", path), 1)
+        self.assertEqual(self.dm.last_import_invalid, 3)
+        rows = self.dm.get_transactions("u1")
+        self.assertEqual([(t.description, t.minor) for t in rows], [("lunch", 1250)])
+        self.assertEqual(self.dm.user_index("u1").totals, {"income": 0, "expense": 1250})
+
+
+if __name__ == "__main__":
+    unittest.main()
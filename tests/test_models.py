@@ -0,0 +1,24 @@
+import unittest
+
+from models import Transaction
+
+
+class TransactionUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.t = Transaction("TXN001", "u1", "income", 100000, "salary", "01/03/2025", "pay", "bank")
+
+    def test_update_converts_amount(self):
+        self.t.update({"category": "bonus", "amount": "12.345"})
+        self.assertEqual((self.t.category, self.t.minor), ("bonus", 1235))
+
+    def test_failed_update_changes_nothing(self):
+        for changes in ({"type": "expense", "category": "rent", "amount": "Infinity"},
+                        {"category": "rent", "amount": "abc"},
+                        {"type": "expense", "colour": "red"}):
+            with self.assertRaises((KeyError, ValueError, ArithmeticError)):
+                self.t.update(changes)
+            self.assertEqual((self.t.type, self.t.category, self.t.minor), ("income", "salary", 100000))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,195 +1,263 @@
-from utils import input_non_empty, input_positive_float, today_str, next_yearly_date, next_monthly_date, today_date, parse_date, format_date, pause
+from utils import input_non_empty, input_positive_amount, to_minor, today_str, next_yearly_date, next_monthly_date, today_date, parse_date, format_date, pause
 from decimal import Decimal as decimal
+from models import Transaction
 from datetime import timedelta
+from instrumentation import timed
+from indexes import day_of, month_of
 
 class TransactionManager:
     def __init__(self, data_manager):
-        """Initialize the transaction manager and load persisted transactions.
-        Expects a data_manager with load/save methods."""
+        """Initialize the transaction manager on top of a data_manager.
+        Transactions are loaded per user, on demand, from that user's shard."""
         self.data_manager = data_manager
 
-        try:
-            self.transactions = self.data_manager.load_transactions()
-        except AttributeError:
+        if not hasattr(self.data_manager, "get_transactions"):
             raise RuntimeError("Data manager has not been initialized.")
 
     def _next_transaction_id(self) -> str:
         """Return the next sequential transaction ID in the format TXN###.
-        Scans existing records to find the max and increments it."""
-        max_num = 0
-        for t in self.transactions:
-            tid = t.get("transaction_id", "")
-            if tid.startswith("TXN"):
-                try:
-                    num = int(tid[3:])
-                    if num > max_num:
-                        max_num = num
-                except ValueError:
-                    pass
-        return f"TXN{max_num + 1:03d}"
+        The counter is kept by the data manager, so no records are scanned."""
+        return self.data_manager.next_transaction_id()
 
-    def _save(self):
-        """Persist the in-memory transactions list to storage via data_manager."""
-        self.data_manager.save_transactions(self.transactions)
+    def _save(self, user_id: str):
+        """Persist the user's transactions shard to storage via data_manager."""
+        self.data_manager.save_user_transactions(user_id)
 
 
     # CRUD operations
    # -------------------- Create ----------------
     def add_transaction(self, user_id: str, t_type: str, amount: decimal, category: str,
-                        date: str, description: str, payment_method: str) -> dict:
+                        date: str, description: str, payment_method: str, interactive: bool = True) -> Transaction:
         """Create and persist a new transaction record for the given user.
-        If category == 'savings', prompt to choose a goal and update its progress."""
-
-        # 1️⃣ Create transaction normally
-        t = {
-            "transaction_id": self._next_transaction_id(),
-            "user_id": user_id,
-            "type": t_type,
-            "amount": amount,
-            "category": category,
-            "date": date,
-            "description": description,
-            "payment_method": payment_method
-        }
-        self.transactions.append(t)
-        self._save()
-
-        # 2️⃣ Handle savings goal contribution
-        if category.lower() == "savings" and t_type.lower() == "expense":
-            try:
-                goals = self.data_manager.load_goals(user_id) or []
-            except Exception:
-                goals = []
-
-            if not goals:
-                print("⚠️ You have no savings goals yet. Create one first.")
-                return t
-
-            print("\n💰 Your Savings Goals:")
-            for idx, g in enumerate(goals, start=1):
+        If category == 'savings', prompt to choose a goal and update its progress
+        (skipped when interactive is False, e.g. for API requests)."""
+
+        # the transaction and its goal contribution are undone together
+        with self.data_manager.oplog.record(user_id, "add"):
+            # 1️⃣ Create transaction normally
+            t, unusual = self._create_transaction(user_id, t_type, amount, category, date, description, payment_method)
+            if unusual and interactive:
+                print(f"⚠️ Unusually large {t.category} expense: {t.amount} is about {unusual:.1f}× what you usually spend there.")
+            if interactive and t_type == "expense":
+                self._warn_budget(t)
+
+            # 2️⃣ Handle savings goal contribution
+            if interactive and category.lower() == "savings" and t_type.lower() == "expense":
                 try:
-                    saved_dec = decimal(str(g.get("saved", "0")))
+                    goals = [g for g in self.data_manager.load_goals(user_id) if not self._goal_reached(g)]
                 except Exception:
-                    saved_dec = decimal("0")
-                try:
-                    target_dec = decimal(str(g.get("target", "0")))
-                except Exception:
-                    target_dec = decimal("0")
-                remaining = max(decimal("0"), target_dec - saved_dec)
-                progress = decimal("0") if target_dec <= 0 else min(decimal("100"), (saved_dec / target_dec) * decimal("100"))
-                print(
-                    f"{idx}. {g['name']} — Target: {target_dec:.2f}, Saved: {saved_dec:.2f}, Remaining: {remaining:.2f}, Progress: {progress:.1f}%"
-                )
-
-            # Choose goal
-            while True:
-                choice = input(f"\nSelect goal number (1-{len(goals)}): ").strip()
-                if choice.isdigit() and 1 <= int(choice) <= len(goals):
-                    goal = goals[int(choice) - 1]
-                    break
-                print("❌ Invalid choice. Try again.")
-
-            # 3️⃣ Update the goal (only here, not by scanning past transactions)
-            try:
-                prev_saved = decimal(str(goal.get("saved", "0")))
-            except Exception:
-                prev_saved = decimal("0")
-            try:
-                amt = decimal(str(amount))
-            except Exception:
-                amt = decimal("0")
-
-            new_saved = prev_saved + amt
-            goal["saved"] = str(new_saved)
+                    goals = []
+
+                if not goals:
+                    print("⚠️ You have no active savings goals yet. Create one first.")
+                    return t
+
+                print("\n💰 Your Savings Goals:")
+                for idx, g in enumerate(goals, start=1):
+                    target_dec, saved_dec, remaining, progress = self._goal_progress(g)
+                    print(
+                        f"{idx}. {g['name']} — Target: {target_dec:.2f}, Saved: {saved_dec:.2f}, Remaining: {remaining:.2f}, Progress: {progress:.1f}%"
+                    )
+
+                # Choose goal
+                while True:
+                    choice = input(f"\nSelect goal number (1-{len(goals)}): ").strip()
+                    if choice.isdigit() and 1 <= int(choice) <= len(goals):
+                        goal = goals[int(choice) - 1]
+                        break
+                    print("❌ Invalid choice. Try again.")
 
-            target_dec = decimal(str(goal.get("target", "0")))
-            remaining = max(decimal("0"), target_dec - new_saved)
-            progress = decimal("0") if target_dec <= 0 else min(decimal("100"), (new_saved / target_dec) * decimal("100"))
-
-            print("\n=== Updated Goal Summary ===")
-            print(f"Goal: {goal['name']}")
-            print(f"Target: {target_dec:.2f}")
-            print(f"Saved: {new_saved:.2f}")
-            print(f"Remaining: {remaining:.2f}")
-            print(f"Progress: {progress:.1f}%")
-
-            # 4️⃣ Remove goal if complete
-            if new_saved >= target_dec and target_dec > 0:
-                print(f"🎉 Goal '{goal['name']}' reached! It has been removed from active goals.")
-                goals.remove(goal)
-
-            # 5️⃣ Save goals
-            try:
-                self.data_manager.save_goals(user_id, goals)
-            except Exception as e:
-                print(f"⚠️ Could not save updated goals: {e}")
+                # 3️⃣ Link the transaction to the goal: progress is derived from linked contributions,
+                # so later edits or deletes of this transaction update the goal too
+                try:
+                    self.data_manager.link_contribution(user_id, goal["goal_id"], t)
+                except Exception as e:
+                    print(f"⚠️ Could not save updated goal: {e}")
+                    return t
+                goal = next(g for g in self.data_manager.load_goals(user_id) if g["goal_id"] == goal["goal_id"])
+                target_dec, new_saved, remaining, progress = self._goal_progress(goal)
+
+                print("\n=== Updated Goal Summary ===")
+                print(f"Goal: {goal['name']}")
+                print(f"Target: {target_dec:.2f}")
+                print(f"Saved: {new_saved:.2f}")
+                print(f"Remaining: {remaining:.2f}")
+                print(f"Progress: {progress:.1f}%")
+
+                # 4️⃣ Reached goals no longer take contributions
+                if self._goal_reached(goal):
+                    print(f"🎉 Goal '{goal['name']}' reached! It has been removed from active goals.")
 
         return t
+    # timed under add_transaction's name, without the goal prompt that follows it there
+    @timed("TransactionManager.add_transaction")
+    def _create_transaction(self, user_id: str, t_type: str, amount: decimal, category: str,
+                            date: str, description: str, payment_method: str) -> tuple:
+        """Build, index and save a new record (amount stored once as integer minor units of the user's currency).
+        Returns (transaction, how unusual it is for its category or None).
+        Raises ValueError / ArithmeticError for an amount that can't be stored; nothing is saved then."""
+        decimals = self.data_manager.currency_decimals(user_id)
+        minor = to_minor(amount, decimals)
+        t = Transaction(
+            transaction_id=self._next_transaction_id(),
+            user_id=user_id,
+            type=t_type,
+            minor=minor,
+            category=category,
+            date=date,
+            description=description,
+            payment_method=payment_method,
+            decimals=decimals
+        )
+        # compared with the category's running statistics before the new row joins them
+        unusual = self.data_manager.user_index(user_id).unusual_expense(t)
+        self.data_manager.transaction_added(t)
+        self._save(user_id)
+        return t, unusual
+
     # ------------ Read -------------
+    @timed()
     def list_transactions(self, user_id: str) -> list:
         """Return all transactions belonging to the given user_id as a list."""
-        #return all transactions for a specific user id
-        return [t for t in self.transactions if t.get("user_id") == user_id]
+        #return all transactions for a specific user id (served from the user's cached index)
+        return self.data_manager.get_transactions(user_id)
 
     # ---------------- update -----------
 
-    def update_transaction(self, transaction_id: str, updates: dict) -> bool:
+    @timed()
+    def update_transaction(self, transaction_id: str, updates: dict, user_id: str = None) -> bool:
         """Update fields of a transaction by ID and persist changes.
-        Returns True if updated, False if not found."""
-        for i, t in enumerate(self.transactions):
-            if t.get("transaction_id") == transaction_id:
-                t.update(updates)
-                self._save()
-                return True
-
-        return False
+        Pass user_id to look only in that user's shard.
+        Returns True if updated, False if not found. A bad field or amount raises (see Transaction.update)
+        before the record, the index or the file change."""
+        t = self.data_manager.find_transaction(transaction_id, user_id)
+        if t is None:
+            return False
+        before = t.copy()
+        t.update(updates)
+        self.data_manager.transaction_updated(before, t)
+        self._save(t.user_id)
+        return True
 
     #------------------ Delete ----------------
 
-    def delete_transaction(self, transaction_id: str) -> bool:
+    @timed()
+    def delete_transaction(self, transaction_id: str, user_id: str = None) -> bool:
         """Delete a transaction by ID and persist changes.
+        Pass user_id to look only in that user's shard.
         Returns True if deleted, False if not found."""
-        for i, t in enumerate(self.transactions):
-            if t.get("transaction_id") == transaction_id:
-                self.transactions.pop(i)
-                self._save()
-                return True
-        return False
-
+        t = self.data_manager.find_transaction(transaction_id, user_id)
+        if t is None:
+            return False
+        self.data_manager.transaction_removed(t)
+        self._save(t.user_id)
+        return True
+
+    #------------------ Budgets ----------------
+
+    def budget_usage(self, user_id: str, category: str, date: str):
+        """Return (spent, limit) in minor units for the category's budget in the month of `date`, or None
+        if there is no budget. O(1): spending is read from the index's per-category monthly totals."""
+        limit = self.data_manager.load_budgets(user_id).get(category)
+        key = month_of(date)
+        if limit is None or key is None:
+            return None
+        bucket = self.data_manager.user_index(user_id).by_category_month.get((category, *key))
+        return (bucket["expense"] if bucket else 0), limit
+
+    def _warn_budget(self, t: Transaction):
+        """After an expense, say if its category's monthly budget is nearly or already used up."""
+        usage = self.budget_usage(t.user_id, t.category, t.date)
+        if usage is None:
+            return
+        spent, limit = usage
+        index = self.data_manager.user_index(t.user_id)
+        if spent > limit:
+            print(f"🚨 Over budget: {t.category} {index.money(spent)} / {index.money(limit)} this month "
+                  f"(+{index.money(spent - limit)})")
+        elif limit > 0 and spent * 100 >= limit * 80:
+            print(f"📏 {spent * 100 // limit}% of your {t.category} budget used ({index.money(spent)} / {index.money(limit)})")
+
+
+    def select_transactions(self, user_id: str, ids=None, predicate=None) -> list:
+        """Return the user's transactions whose ID is in `ids` and for which predicate(t) is true
+        (either may be None to skip that test), in one pass over the user's shard."""
+        ids = set(ids) if ids is not None else None
+        return [t for t in self.list_transactions(user_id)
+                if (ids is None or t.transaction_id in ids) and (predicate is None or predicate(t))]
+
+    @timed()
+    def bulk_update(self, user_id: str, updates: dict, ids=None, predicate=None) -> int:
+        """Apply the same field updates to every selected transaction (see select_transactions)
+        and persist the shard once. Returns the number of transactions changed.
+        All or nothing: the edited copies are built first, so a bad value raises before any record changes."""
+        if ids is None and predicate is None:
+            raise ValueError("bulk_update needs an ID list or a predicate")
+        if "transaction_id" in updates or "user_id" in updates:
+            raise ValueError("transaction_id and user_id can't be bulk edited")
+        selected = self.select_transactions(user_id, ids, predicate)
+        edited = []
+        for t in selected:
+            after = t.copy()
+            after.update(updates)
+            edited.append(after)
+        pairs = []
+        for t, after in zip(selected, edited):
+            before = t.copy()
+            t.assign(after)
+            pairs.append((before, t))
+        if pairs:
+            with self.data_manager.oplog.record(user_id, "bulk edit"):
+                self.data_manager.transactions_updated(user_id, pairs)
+                self._save(user_id)
+        return len(pairs)
+
+    @timed()
+    def bulk_delete(self, user_id: str, ids=None, predicate=None) -> int:
+        """Delete every selected transaction (see select_transactions) and persist the shard once.
+        Returns the number of transactions deleted."""
+        if ids is None and predicate is None:
+            raise ValueError("bulk_delete needs an ID list or a predicate")
+        doomed = self.select_transactions(user_id, ids, predicate)
+        if doomed:
+            with self.data_manager.oplog.record(user_id, "bulk delete"):
+                self.data_manager.transactions_removed(user_id, doomed)
+                self._save(user_id)
+        return len(doomed)
+
+    @timed()
     def compute_total(self, user_id: str) -> dict:
         """Compute total income, expense, and balance for the given user.
         Returns a dict with keys: income, expense, balance."""
-        income = sum(
-            decimal(str(t["amount"]))
-            for t in self.transactions
-            if t.get("user_id") == user_id and t.get("type") == "income"
-        )
-        expense = sum(
-            decimal(str(t["amount"]))
-            for t in self.transactions
-            if t.get("user_id") == user_id and t.get("type") == "expense"
-        )
+        index = self.data_manager.user_index(user_id)
+        totals = index.totals  # maintained incrementally in minor units, no rescan
+        income = index.money(totals["income"])
+        expense = index.money(totals["expense"])
         return {"income": income, "expense": expense, "balance": income - expense}
 
 
     #----------------- interactive GUI ---------------
     # --------- Print all of user transactions --------
     def print_all_for_user(self, user_id):
-        """Print a table of all transactions for the user along with totals."""
+        """Print a table of all transactions for the user along with totals.
+        The Balance column is the balance at the end of each row's date (O(log n) per row, see UserIndex.balance_on)."""
         user_txs = self.list_transactions(user_id)
         if not user_txs:
             print("No transactions found.")
             return
+        index = self.data_manager.user_index(user_id)
 
         print("\n===== Transactions =====")
-        print(f"{'ID':<8} {'Type':<8} {'Amount':>10}  {'Category':<14} {'Date':<10}  {'Payment':<12} Description")
-        print("-" * 90)
+        print(f"{'ID':<8} {'Type':<8} {'Amount':>10}  {'Category':<14} {'Date':<10}  {'Balance':>12}  {'Payment':<12} Description")
+        print("-" * 104)
 
         for t in user_txs:
-            print(f"{t['transaction_id']:<8} {t['type']:<8} {t['amount']:>10}  "
-                  f"{t['category']:<14} {t['date']:<10}  {t['payment_method']:<12} {t['description']}")
+            d = day_of(t.date)
+            balance = index.money(index.balance_on(d)) if d is not None else ""
+            print(f"{t.transaction_id:<8} {t.type:<8} {t.amount:>10}  "
+                  f"{t.category:<14} {t.date:<10}  {balance:>12}  {t.payment_method:<12} {t.description}")
 
-        print("-" * 90)
+        print("-" * 104)
         total = self.compute_total(user_id)
         print(f"Income:  {total['income']}")
         print(f"Expense: {total['expense']}")
@@ -209,7 +277,7 @@ class TransactionManager:
                 print("❌ Please enter 'income' or 'expense' (or 'q' to quit).")
                 continue
 
-            amount = input_positive_float("Amount: ")
+            amount = input_positive_amount("Amount: ")
             category = input_non_empty("Category: ")
             input_date = input(f"Date: (Enter for {today_str()}): ").strip()
             date = input_date if input_date else today_str()
@@ -218,13 +286,13 @@ class TransactionManager:
             t = self.add_transaction(
                 user_id = user_id,
                 t_type = t_type,
-                amount = str(amount),
+                amount = amount,
                 category = category,
                 date = date,
                 description = description,
                 payment_method = payment_method
             )
-            print(f"✅ Saved {t_type} #{t['transaction_id']}!\n")
+            print(f"✅ Saved {t_type} #{t.transaction_id}!\n")
             added_count += 1
 
         print(f"✔️ Done. Added {added_count} transaction(s).\n")
@@ -239,47 +307,49 @@ class TransactionManager:
 
         self.print_all_for_user(user_id)
         tx_id = input("Enter transaction ID to edit (e.g., TXN003): ").strip()
-        tx = next((t for t in user_txs if t["transaction_id"] == tx_id), None)
+        tx = next((t for t in user_txs if t.transaction_id == tx_id), None)
         if not tx:
             print("❌ Transaction not found.")
             return
 
         print("\nPress Enter to keep the current value.\n")
         # Type
-        new_type = input(f"Type [income/expense] [{tx['type']}]: ").strip().lower()
+        new_type = input(f"Type [income/expense] [{tx.type}]: ").strip().lower()
         if new_type not in ("income", "expense", ""):
             print("⚠️ Invalid type. Keeping old.")
-            new_type = tx["type"]
+            new_type = tx.type
         else:
-            new_type = tx["type"] if new_type == "" else new_type
+            new_type = tx.type if new_type == "" else new_type
 
         # Amount
-        raw_amount = input(f"Amount [{tx['amount']}]: ").strip()
+        raw_amount = input(f"Amount [{tx.amount}]: ").strip()
         if raw_amount == "":
-            new_amount = tx["amount"]
+            new_amount = tx.amount
         else:
             try:
                 val = decimal(raw_amount)
+                to_minor(val, tx.decimals) # rejects Infinity, NaN and values too large to store
                 if val <= 0:
                     print("⚠️ Amount must be positive. Keeping old.")
-                    new_amount = tx["amount"]
+                    new_amount = tx.amount
                 else:
                     new_amount = val
-            except ValueError:
-                print("⚠️ Not a number. Keeping old.")
-                new_amount = tx["amount"]
+            except (ValueError, ArithmeticError):
+                print("⚠️ Not a valid amount. Keeping old.")
+                new_amount = tx.amount
 
         # Category
-        new_category = input(f"Category [{tx['category']}]: ").strip() or tx["category"]
+        new_category = input(f"Category [{tx.category}]: ").strip() or tx.category
         # Date
-        new_date = input(f"Date [YYYY/MM/DD] [{tx['date']}]: ").strip() or tx["date"]
+        new_date = input(f"Date [YYYY/MM/DD] [{tx.date}]: ").strip() or tx.date
         # Description
-        new_desc = input(f"Description [{tx['description']}]: ").strip() or tx["description"]
+        new_desc = input(f"Description [{tx.description}]: ").strip() or tx.description
         # Payment method
-        new_payment = input(f"Payment method [{tx['payment_method']}]: ").strip() or tx["payment_method"]
+        new_payment = input(f"Payment method [{tx.payment_method}]: ").strip() or tx.payment_method
 
         updated = self.update_transaction(
             transaction_id=tx_id,
+            user_id=user_id,
             updates={
                 "type": new_type,
                 "amount": new_amount,
@@ -305,7 +375,7 @@ class TransactionManager:
 
         self.print_all_for_user(user_id)
         tx_id = input("Enter transaction ID to delete: ").strip()
-        tx = next((t for t in user_txs if t["transaction_id"] == tx_id), None)
+        tx = next((t for t in user_txs if t.transaction_id == tx_id), None)
         if not tx:
             print("❌ Transaction not found.")
             return
@@ -315,11 +385,195 @@ class TransactionManager:
             print("❎ Deletion cancelled.\n")
             return
 
-        if self.delete_transaction(tx_id):
+        if self.delete_transaction(tx_id, user_id):
             print(f"🗑️ Deleted transaction {tx_id}.\n")
         else:
             print("❌ Delete failed.\n")
 
+    # ------------- Bulk edit / delete --------------
+    @staticmethod
+    def _id_number(transaction_id: str):
+        digits = transaction_id.strip().upper().removeprefix("TXN")
+        return int(digits) if digits.isdigit() else None
+
+    def _parse_id_selection(self, text: str):
+        """Turn "TXN010, TXN020-TXN045" into a predicate on transaction IDs (None if nothing valid)."""
+        ids, ranges = set(), []
+        for part in text.split(","):
+            part = part.strip()
+            if "-" in part:
+                low, high = (self._id_number(p) for p in part.split("-", 1))
+                if low is None or high is None:
+                    return None
+                ranges.append((min(low, high), max(low, high)))
+            elif part:
+                ids.add(part.upper())
+        if not ids and not ranges:
+            return None
+
+        def selected(t):
+            if t.transaction_id in ids:
+                return True
+            number = self._id_number(t.transaction_id)
+            return number is not None and any(low <= number <= high for low, high in ranges)
+        return selected
+
+    def bulk_edit_interactive(self, user_id: str):
+        """Pick many transactions by IDs, category, description or dates, then delete or recategorise them all at once."""
+        print("\n🧹 Bulk Edit / Delete")
+        print("Select transactions by:")
+        print("1. IDs or ID ranges (e.g. TXN010, TXN020-TXN045 - one import is one range)")
+        print("2. Category")
+        print("3. Description contains")
+        print("4. Date range")
+        how = input("👉🏼 Choose (1-4): ").strip()
+
+        predicate = None
+        if how == "1":
+            predicate = self._parse_id_selection(input("IDs: "))
+        elif how == "2":
+            wanted = input_non_empty("Category: ").casefold()
+            predicate = lambda t: t.category.casefold() == wanted
+        elif how == "3":
+            wanted = input_non_empty("Text: ").casefold()
+            predicate = lambda t: wanted in t.description.casefold()
+        elif how == "4":
+            try:
+                start = parse_date(input("From (dd/mm/YYYY): ").strip())
+                end = parse_date(input("To (dd/mm/YYYY): ").strip())
+            except ValueError:
+                print("❌ Invalid date.")
+                return
+            predicate = lambda t: (d := day_of(t.date)) is not None and start <= d <= end
+        if predicate is None:
+            print("❌ Invalid selection.")
+            return
+
+        matches = self.select_transactions(user_id, predicate=predicate)
+        if not matches:
+            print("ℹ️ No transactions match.")
+            return
+        print(f"\n{len(matches)} transaction(s) selected:")
+        for t in matches[:10]:
+            print(f"  {t.transaction_id:<8} {t.type:<8} {t.amount:>10}  {t.category:<14} {t.date:<10}  {t.description}")
+        if len(matches) > 10:
+            print(f"  ... and {len(matches) - 10} more")
+
+        print("\n1. Delete them")
+        print("2. Change category")
+        print("3. Change payment method")
+        print("4. Change type")
+        print("5. Cancel")
+        action = input("👉🏼 Choose (1-5): ").strip()
+        updates = None
+        if action == "2":
+            updates = {"category": input_non_empty("New category: ")}
+        elif action == "3":
+            updates = {"payment_method": input_non_empty("New payment method: ")}
+        elif action == "4":
+            new_type = input("New type [income/expense]: ").strip().lower()
+            if new_type not in ("income", "expense"):
+                print("❌ Invalid type.")
+                return
+            updates = {"type": new_type}
+        elif action != "1":
+            print("❎ Cancelled.\n")
+            return
+
+        verb = "Delete" if updates is None else "Update"
+        if input(f"{verb} {len(matches)} transaction(s) [y/n]: ").strip().lower() != "y":
+            print("❎ Cancelled.\n")
+            return
+        ids = [t.transaction_id for t in matches]
+        if updates is None:
+            print(f"🗑️ Deleted {self.bulk_delete(user_id, ids=ids)} transaction(s).\n")
+        else:
+            print(f"✏️ Updated {self.bulk_update(user_id, updates, ids=ids)} transaction(s).\n")
+
+    # ------------- Undo / redo --------------
+    def undo_interactive(self, user_id: str):
+        """Undo the user's most recent change (add, edit, delete, import, goal contribution) after confirmation."""
+        op = self.data_manager.oplog.peek_undo(user_id)
+        if op is None:
+            print("ℹ️ Nothing to undo.")
+            return
+        if input(f"Undo {op.describe()} [y/n]: ").strip().lower() != "y":
+            print("❎ Cancelled.\n")
+            return
+        self.data_manager.undo(user_id)
+        print(f"↩️ Undone: {op.describe()}\n")
+
+    def redo_interactive(self, user_id: str):
+        """Re-apply the most recently undone change."""
+        op = self.data_manager.redo(user_id)
+        if op is None:
+            print("ℹ️ Nothing to redo.")
+            return
+        print(f"↪️ Redone: {op.describe()}\n")
+
+    # ------------- Budgets --------------
+    def budgets_interactive(self, user_id: str):
+        """Show this month's budgets and set, change or remove a category's monthly limit."""
+        today = today_date()
+        budgets = self.data_manager.load_budgets(user_id)
+        index = self.data_manager.user_index(user_id)
+        print("\n📏 Monthly Budgets")
+        if budgets:
+            for category, limit in sorted(budgets.items()):
+                spent, _ = self.budget_usage(user_id, category, format_date(today))
+                print(f"  {category:<16} {index.money(spent):>10} / {index.money(limit)}")
+        else:
+            print("  (no budgets yet)")
+
+        category = input("Category to set (Enter to go back): ").strip()
+        if not category:
+            return
+        raw = input(f"Monthly limit for {category} (0 removes the budget): ").strip()
+        try:
+            limit = to_minor(raw, index.decimals)
+            if limit < 0:
+                raise ValueError(raw)
+        except (ValueError, ArithmeticError):
+            print("❌ Invalid amount.")
+            return
+        budgets = dict(budgets)
+        if limit == 0:
+            budgets.pop(category, None)
+            print(f"🗑️ Removed the {category} budget.")
+        else:
+            budgets[category] = limit
+            print(f"✅ {category}: {index.money(limit)} per month.")
+        self.data_manager.save_budgets(user_id, budgets)
+
+    # ------------- Recurring series detection --------------
+    def detect_recurring_interactive(self, user_id: str):
+        """Show repeating bills/income found in the user's history and save the chosen ones as recurring rules."""
+        from recurrence import RecurrenceDetector # only needed on this screen
+        detector = RecurrenceDetector(self.data_manager)
+        proposals = detector.propose(user_id)
+        if not proposals:
+            print("ℹ️ No new repeating series found.")
+            return
+
+        print("\n🔎 Repeating transactions found:")
+        for n, p in enumerate(proposals, start=1):
+            when = f"day {p['day']}" if p["frequency"] in ("monthly", "yearly") else f"weekday {p['day']}"
+            print(f"{n}. {p['type']:<8} {p['amount']:>10} {p['frequency']:<11} ({when}) {p['category']} "
+                  f"'{p['description']}' — {p['occurrences']} times, {p['regularity']:.0%} regular, last {p['last_date']}")
+        raw = input("Save which as recurring rules? (e.g. 1,3 or 'all', Enter for none): ").strip().lower()
+        if not raw:
+            return
+        if raw == "all":
+            chosen = proposals
+        else:
+            picks = [int(x) for x in raw.replace(" ", "").split(",") if x.isdigit()]
+            chosen = [proposals[i - 1] for i in picks if 1 <= i <= len(proposals)]
+        if chosen:
+            detector.accept(user_id, chosen)
+            print(f"✅ Saved {len(chosen)} recurring rule(s); forecasts now include them.")
+        else:
+            print("❌ No valid numbers.")
+
     # ----------- AF: Recurring transaction ------------
     def recurring_transaction(self, user_id: str):
         """Create one or many future-dated recurring transactions (monthly/yearly).
@@ -333,7 +587,7 @@ class TransactionManager:
                 break
             print("Please enter either 'income' or 'expense'.")
 
-        amount = input_positive_float("Amount: ")
+        amount = input_positive_amount("Amount: ")
         category = input_non_empty("Category: ")
         description = input("Description: ").strip()
         payment_method = input_non_empty("Payment Method: ")
@@ -377,11 +631,13 @@ class TransactionManager:
                     payment_method=payment_method,
                     date=format_date(date_obj),
                 )
-                print(f"✅ Saved {t_type} #{t['transaction_id']} on {format_date(date_obj)}")
+                print(f"✅ Saved {t_type} #{t.transaction_id} on {format_date(date_obj)}")
                 created += 1
+                last_date = date_obj
                 # Move to the next month
                 first_of_next = (date_obj.replace(day=28) + timedelta(days=4)).replace(day=1)
                 date_obj = next_monthly_date(first_of_next, day)
+            rule = {"frequency": "monthly", "day": day}
 
         else: #yearly occurrence
             while True:
@@ -408,21 +664,51 @@ class TransactionManager:
                     description=description,
                     payment_method=payment_method
                 )
-                print(f"✅ Saved {t_type} #{t['transaction_id']} on {format_date(date_obj)}")
+                print(f"✅ Saved {t_type} #{t.transaction_id} on {format_date(date_obj)}")
                 created += 1
+                last_date = date_obj
                 # Move to the next year
                 first_of_next = (date_obj.replace(day=28) + timedelta(days=4)).replace(day=1)
                 date_obj = next_yearly_date(first_of_next, day, month)
+            rule = {"frequency": "yearly", "day": day, "month": month}
+
+        # remember the rule so forecasts can extend the series past the occurrences created now
+        rule.update(type=t_type, amount=str(amount), category=category, description=description,
+                    payment_method=payment_method, last_date=format_date(last_date))
+        rules = self.data_manager.load_recurring(user_id)
+        rules.append(rule)
+        self.data_manager.save_recurring(user_id, rules)
 
         print(f"✔️ Done. Created {created} occurrence(s).\n")
 
 
     #---------------------------------- AF: saving goals -------------------------------------------
+    @staticmethod
+    def _goal_progress(goal: dict):
+        """(target, saved, remaining, progress %) of a goal from load_goals(), as Decimals."""
+        try:
+            target_dec = decimal(str(goal.get("target", "0")))
+        except Exception:
+            target_dec = decimal("0")
+        try:
+            saved_dec = decimal(str(goal.get("saved", "0")))
+        except Exception:
+            saved_dec = decimal("0")
+        remaining = max(decimal("0"), target_dec - saved_dec)
+        progress = decimal("0") if target_dec <= 0 else min(decimal("100"), (saved_dec / target_dec) * decimal("100"))
+        return target_dec, saved_dec, remaining, progress
+
+    @classmethod
+    def _goal_reached(cls, goal: dict) -> bool:
+        target_dec, _, remaining, _ = cls._goal_progress(goal)
+        return target_dec > 0 and remaining <= 0
+
     def savings_goal(self, user_id: str):
         """
         Create or update a savings goal for a specific user.
-        New goals always start with saved = "0".
-        Contributions happen ONLY via add_transaction() when category='savings'.
+        New goals start with nothing saved.
+        Contributions happen ONLY via add_transaction() when category='savings', which links
+        the transaction to the goal; the saved amount is always derived from those links.
         """
         print("\n🏆 Savings Goal")
 
@@ -437,32 +723,20 @@ class TransactionManager:
             return
 
         # Load existing goals for this user
-        goals = self.data_manager.load_goals(user_id) or []
-
-        # New goals start at 0; contributions are added only via add_transaction()
-        saved_now = decimal("0")
+        goals = self.data_manager.load_goals(user_id)
 
         # Check if goal already exists
         existing_goal = next((g for g in goals if g["name"].lower() == name.lower()), None)
         if existing_goal:
-            # Update target only; keep current saved as-is
+            # Update target only; progress still comes from the linked contributions
             existing_goal["target"] = str(target)
-            # Ensure the saved field exists
-            if "saved" not in existing_goal:
-                existing_goal["saved"] = "0"
-            saved_value = decimal(str(existing_goal.get("saved", "0")))
+            self.data_manager.save_goal(user_id, existing_goal)
+            goal = existing_goal
         else:
-            goals.append({
-                "name": name,
-                "target": str(target),
-                "saved": str(saved_now)
-            })
-            saved_value = saved_now
-
-        self.data_manager.save_goals(user_id, goals)
+            goal = self.data_manager.create_goal(user_id, name, target)
+            goal["saved"] = "0"
 
-        remaining = max(decimal("0"), target - saved_value)
-        pct = decimal("0") if target <= 0 else min(decimal("100"), (saved_value / target) * decimal("100"))
+        _, saved_value, remaining, pct = self._goal_progress(goal)
 
         print("\n=== Savings Goal Summary ===")
         print(f"Goal:       {name}")
@@ -476,15 +750,29 @@ class TransactionManager:
         print()
 
     def export_transactions_interactive(self, user_id: str):
-        """Prompt for a file path and export the user's transactions to CSV."""
+        """Prompt for a file path and optional filters, then stream the user's transactions to CSV.
+        A path ending in .gz is written gzip-compressed."""
         print("\n💾 Export Transactions to CSV")
-        path = input("Enter filename (e.g., data/exports/my_transactions.csv): ").strip()
+        path = input("Enter filename (e.g., data/exports/my_transactions.csv or .csv.gz): ").strip()
         if not path:
             print("❌ No file path provided.")
             return
-        tx_list = self.list_transactions(user_id)
-        self.data_manager.export_transactions_csv(user_id, tx_list, path)
-        print(f"✅ Exported {len(tx_list)} transactions to {path}\n")
+        print("Optional filters - press Enter to skip.")
+        try:
+            raw_start = input("From date (dd/mm/YYYY): ").strip()
+            raw_end = input("To date (dd/mm/YYYY): ").strip()
+            start = parse_date(raw_start) if raw_start else None
+            end = parse_date(raw_end) if raw_end else None
+        except ValueError:
+            print("❌ Invalid date format.")
+            return
+        category = input("Category: ").strip() or None
+        t_type = input("Type [income/expense]: ").strip().lower() or None
+        if t_type not in (None, "income", "expense"):
+            print("❌ Type must be 'income' or 'expense'.")
+            return
+        count = self.data_manager.stream_export_csv(user_id, path, start=start, end=end, category=category, t_type=t_type)
+        print(f"✅ Exported {count} transactions to {path}\n")
 
     def import_transactions_interactive(self, user_id: str):
         """Prompt for a CSV path and import transactions, skipping duplicates."""
@@ -510,7 +798,12 @@ class TransactionManager:
             print("6. 🏆 Savings Goal")
             print("7. 💾 Export to csv")
             print("8. 📥 Import from csv")
-            print("9. 🔙 Back")
+            print("9. 🧹 Bulk Edit / Delete")
+            print("10. ↩️ Undo Last Change")
+            print("11. ↪️ Redo")
+            print("12. 🔎 Detect Recurring Bills")
+            print("13. 📏 Budgets")
+            print("14. 🔙 Back")
 
             choice = input("Enter your choice: ").strip()
             if choice == "1":
@@ -522,7 +815,8 @@ class TransactionManager:
             elif choice == "4":
                 self.delete_transaction_interactive(user_id)
             elif choice == "5":
-                self.recurring_transaction(user_id)
+                with self.data_manager.oplog.record(user_id, "recurring"): # all occurrences undo together
+                    self.recurring_transaction(user_id)
             elif choice == "6":
                 self.savings_goal(user_id)
             elif choice == "7":
@@ -530,6 +824,16 @@ class TransactionManager:
             elif choice == "8":
                 self.import_transactions_interactive(user_id)
             elif choice == "9":
+                self.bulk_edit_interactive(user_id)
+            elif choice == "10":
+                self.undo_interactive(user_id)
+            elif choice == "11":
+                self.redo_interactive(user_id)
+            elif choice == "12":
+                self.detect_recurring_interactive(user_id)
+            elif choice == "13":
+                self.budgets_interactive(user_id)
+            elif choice == "14":
                 return
             else:
                 print("❌ Invalid choice.")
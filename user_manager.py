@@ -1,5 +1,4 @@
-import uuid
-from utils import is_valid_password, hash_password
+from utils import is_valid_password, hash_password, verify_password, needs_rehash
 import getpass # for secure password input
 
 class UserManager:
@@ -8,18 +7,49 @@ class UserManager:
     def __init__(self, data_manager):
         """Initialize the user manager and load users from storage via data_manager."""
         self.data_manager = data_manager
-        self.users = data_manager.load_users()  # uses load_users from data_manager to read users from users.json as dict {user_id: user_data}
+        self._users = None  # users.json is read lazily on first access (see the users property)
+        self._name_index = {}  # case-folded name -> user_id, kept in sync with self._users
+        self._dirty = False  # True when self._users has changes that are not on disk yet
         self.current_user = None
 
+    @property
+    def users(self):
+        """Return the {user_id: user_data} dict, loading it from storage on first access."""
+        # (Re)load when not loaded yet, or when another process changed users.json and we have nothing unsaved
+        if self._users is None or (not self._dirty and self.data_manager.users_changed()):
+            self._users = self.data_manager.load_users()  # uses load_users from data_manager to read users from users.json as dict {user_id: user_data}
+            self._build_name_index()
+            if self.current_user: # keep pointing at the fresh record of the logged-in user
+                self.current_user = self._users.get(self.current_user['user_id'], self.current_user)
+        return self._users
+
     # -----------------------------
-    # Private Helper Method
+    # Private Helper Methods
     # -----------------------------
     def _find_user_by_name(self, name): # Used to handle login, create, and switch user flows
         """Return the user dict matching a case-insensitive name, or None if not found."""
-        for user in self.users.values():
-            if user['name'].lower() == name.lower():
-                return user
-        return None
+        users = self.users  # make sure users (and the name index) are loaded
+        user_id = self._name_index.get(name.casefold())
+        return users.get(user_id) if user_id else None
+
+    def _build_name_index(self):
+        """Rebuild the case-folded name -> user_id index from self._users."""
+        self._name_index = {user['name'].casefold(): user_id for user_id, user in self._users.items()}
+
+    def _add_user(self, user):
+        """Register a new user in memory and in the name index; marks the users as changed."""
+        self.users[user['user_id']] = user
+        self._name_index[user['name'].casefold()] = user['user_id']
+        self._dirty = True
+
+    def _save_users(self):
+        """Write users to JSON/CSV only if something changed since the last save."""
+        if not self._dirty:
+            return False
+        self.data_manager.save_users(self.users) # also merges in users created by other sessions
+        self._build_name_index()
+        self._dirty = False
+        return True
 
     # -----------------------------
     # CREATE USER
@@ -46,6 +76,7 @@ class UserManager:
             print("❌ Passwords don't match or empty!")
 
         currency = input("Currency (default USD): ").strip().upper() or "USD"
+        import uuid # only needed here; importing it at startup costs more than the rest of this module
         user_id = str(uuid.uuid4())[:8]  # Generate unique user ID using uuid4 taking first 8 chars
 
         new_user = {  # Create dictionary for new user
@@ -55,8 +86,8 @@ class UserManager:
             "currency": currency
         }
 
-        self.users[user_id] = new_user
-        self.data_manager.save_users(self.users) # Save the updated users dictionary to JSON/CSV file
+        self._add_user(new_user)
+        self._save_users() # Save the updated users dictionary to JSON/CSV file
         print(f"✅ User '{name}' created successfully!")
 
     # -----------------------------
@@ -82,7 +113,12 @@ class UserManager:
                 print("↩️ Returning to main menu...")
                 return None
 
-            if user['password'] == hash_password(password):
+            if verify_password(password, user['password']):
+                if needs_rehash(user['password']): # Upgrade legacy SHA-256 / outdated work factor hashes transparently
+                    user['password'] = hash_password(password)
+                    self._dirty = True
+                    self._save_users()
+                self.data_manager.sessions.start(user['user_id']) # Remember the verified login for quick switching
                 self.current_user = user
                 print(f"✅ Welcome back, {user['name']}!")
                 return user
@@ -123,7 +159,7 @@ class UserManager:
                 print("↩️ Returning to user menu...")
                 return None
 
-            if self.current_user['password'] == hash_password(old_pass):
+            if verify_password(old_pass, self.current_user['password']):
                 break
             print("❌ Incorrect old password! Please try again.")
 
@@ -139,7 +175,8 @@ class UserManager:
 
         self.current_user['password'] = hash_password(new_pass)
         self.users[self.current_user['user_id']] = self.current_user
-        self.data_manager.save_users(self.users)
+        self._dirty = True
+        self._save_users()
         print("✅ Password updated successfully!")
 
     # -----------------------------
@@ -172,14 +209,19 @@ class UserManager:
             print(f"ℹ️ You are already logged in as '{selected['name']}'.")
             return None
         
-        password = getpass.getpass(f"Password for {selected['name']}: ").strip()
-
-        if selected['password'] != hash_password(password): # Verify the password
-            print("❌ Wrong password!")
-            return None
+        # Users who logged in recently (within the session TTL) switch back without re-entering a password
+        if self.data_manager.sessions.is_verified(selected['user_id']):
+            print(f"⚡ Resuming {selected['name']}'s session.")
+        else:
+            password = getpass.getpass(f"Password for {selected['name']}: ").strip()
+
+            if not verify_password(password, selected['password']): # Verify the password
+                print("❌ Wrong password!")
+                return None
+            self.data_manager.sessions.start(selected['user_id'])
 
-        # Auto-save before switching
-        self.data_manager.save_users(self.users)
+        # Auto-save before switching (no-op unless something changed)
+        self._save_users()
         self.current_user = selected # Updates the current user to the selected user.
         print(f"✅ Switched to {selected['name']}!")
         return selected
@@ -193,6 +235,7 @@ class UserManager:
             print("❌ No user is currently logged in.")
             return
 
-        self.data_manager.save_users(self.users)
+        self._save_users()
+        self.data_manager.sessions.end(self.current_user['user_id']) # Next login asks for the password again
         print(f"🔒 User '{self.current_user['name']}' logged out. Data saved automatically.")
         self.current_user = None
\ No newline at end of file
@@ -1,10 +1,13 @@
 import csv
 import os
 import re
+import hmac
+import json
+import time
 import hashlib
 import calendar
 from datetime import datetime, date
-from decimal import Decimal as decimal
+from decimal import Decimal as decimal, ROUND_HALF_UP
 
 def is_valid_password(password):
     """
@@ -19,9 +22,88 @@ def is_valid_password(password):
     pattern = r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$'
     return bool(re.match(pattern, password))
 
-def hash_password(password: str) -> str:
-    """Hashes a password using SHA-256."""
-    return hashlib.sha256(password.encode()).hexdigest() # Convert password into JSON/CSV readable hexadecimal string 64 chars long
+# -----------------------------
+# Password hashing (PBKDF2)
+# -----------------------------
+KDF_ALGORITHM = "pbkdf2_sha256"
+KDF_DEFAULT_ITERATIONS = 200_000
+KDF_CONFIG_FILE = "data/security.json"  # written by benchmarks/kdf_benchmark.py --save
+KDF_ITERATIONS_ENV = "PFM_KDF_ITERATIONS"
+
+_kdf_iterations = None  # cached work factor, resolved once per process
+
+def kdf_iterations() -> int:
+    """Return the configured PBKDF2 iteration count.
+    Order: PFM_KDF_ITERATIONS env var, then data/security.json, then KDF_DEFAULT_ITERATIONS.
+    The value is cached after the first call."""
+    global _kdf_iterations
+    if _kdf_iterations is None:
+        iterations = os.environ.get(KDF_ITERATIONS_ENV)
+        if not iterations and os.path.exists(KDF_CONFIG_FILE):
+            try:
+                with open(KDF_CONFIG_FILE, "r", encoding="utf-8") as f:
+                    iterations = json.load(f).get("kdf_iterations")
+            except (OSError, ValueError, AttributeError):
+                iterations = None
+        try:
+            _kdf_iterations = max(1, int(iterations)) if iterations else KDF_DEFAULT_ITERATIONS
+        except ValueError:
+            _kdf_iterations = KDF_DEFAULT_ITERATIONS
+    return _kdf_iterations
+
+def save_kdf_iterations(iterations: int) -> None:
+    """Persist the iteration count to data/security.json and use it for this process too."""
+    global _kdf_iterations
+    os.makedirs(os.path.dirname(KDF_CONFIG_FILE), exist_ok=True)
+    with open(KDF_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump({"kdf_algorithm": KDF_ALGORITHM, "kdf_iterations": int(iterations)}, f, indent=4)
+    _kdf_iterations = int(iterations)
+
+def hash_password(password: str, salt: str = None, iterations: int = None) -> str:
+    """Hash a password with salted PBKDF2-HMAC-SHA256.
+    Returns 'pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>' so the work factor travels with the hash."""
+    salt = salt or os.urandom(16).hex()  # per-user random salt
+    iterations = iterations or kdf_iterations()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations)
+    return f"{KDF_ALGORITHM}${iterations}${salt}${digest.hex()}"
+
+def _legacy_hash(password: str) -> str:
+    """Old unsalted SHA-256 hash, kept only to verify accounts created before PBKDF2."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored PBKDF2 hash or a legacy SHA-256 hash."""
+    if not stored:
+        return False
+    parts = stored.split("$")
+    if len(parts) == 4 and parts[0] == KDF_ALGORITHM:
+        try:
+            candidate = hash_password(password, salt=parts[2], iterations=int(parts[1]))
+        except ValueError:
+            return False
+        return hmac.compare_digest(candidate, stored)
+    return hmac.compare_digest(_legacy_hash(password), stored)
+
+def needs_rehash(stored: str) -> bool:
+    """True if a stored hash is legacy SHA-256 or uses a different work factor than configured."""
+    parts = (stored or "").split("$")
+    if len(parts) != 4 or parts[0] != KDF_ALGORITHM:
+        return True
+    return parts[1] != str(kdf_iterations())
+
+def benchmark_kdf_iterations(target_seconds: float = 0.25, sample_iterations: int = 20_000, rounds: int = 3) -> int:
+    """Measure PBKDF2 speed on this machine and return the iteration count
+    whose hashing time is closest to target_seconds (best of `rounds` samples)."""
+    salt = os.urandom(16)
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac("sha256", b"benchmark-password", salt, sample_iterations)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_iteration = max(best, 1e-9) / sample_iterations
+    iterations = int(target_seconds / per_iteration)
+    return max(10_000, iterations // 1000 * 1000)  # round down to a clean number, never below 10k
 
 def pause():
     input("\nPress Enter to continue...")
@@ -35,6 +117,25 @@ def input_non_empty(prompt: str) -> str:
             return text
         print("❌Please enter a non-empty string")
 
+def input_positive_amount(prompt: str) -> decimal:
+    """Prompt until a positive amount is entered and return it as an exact Decimal."""
+    while True:
+        raw = input(prompt).strip()
+        try:
+            val = decimal(raw)
+        except ArithmeticError:
+            print("❌Not a number. Try again.")
+            continue
+        if not val.is_finite() or val <= 0:
+            print("❌Please enter a positive number")
+            continue
+        try:
+            to_minor(val, max(CURRENCY_DECIMALS.values())) # must fit in minor units for every currency
+        except ArithmeticError:
+            print("❌Amount too large. Try again.")
+            continue
+        return val
+
 def input_positive_float(prompt: str) -> float:
     """Prompt until a positive decimal number is entered and return it."""
     while True:
@@ -48,6 +149,39 @@ def input_positive_float(prompt: str) -> float:
         except ValueError:
             print("❌Not a number. Try again.")
 
+# -----------------------------
+# Money in integer minor units
+# -----------------------------
+# Digits after the decimal point per ISO 4217 currency; everything else uses 2
+CURRENCY_DECIMALS = {
+    "JPY": 0, "KRW": 0, "VND": 0, "CLP": 0, "ISK": 0, "UGX": 0, "XAF": 0, "XOF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+}
+
+def currency_decimals(currency: str) -> int:
+    """Return how many minor-unit digits a currency uses ex: USD -> 2, JPY -> 0, KWD -> 3."""
+    return CURRENCY_DECIMALS.get((currency or "").upper(), 2)
+
+def to_minor(value, decimals: int = 2) -> int:
+    """Convert an amount (str, Decimal, int or float) into integer minor units, rounding half up.
+    Plain strings like '12.5' take a fast path without creating a Decimal.
+    Raises ValueError / ArithmeticError for values that are not numbers."""
+    if isinstance(value, str):
+        text = value.strip()
+        whole, _, frac = text.partition(".")
+        digits = whole[1:] if whole[:1] == "-" else whole
+        if digits.isdigit() and len(frac) <= decimals and (not frac or frac.isdigit()):
+            minor = int(digits) * 10 ** decimals + int(frac.ljust(decimals, "0") or 0)
+            return -minor if whole[:1] == "-" else minor
+    else:
+        text = str(value)
+    scaled = decimal(text).scaleb(decimals).quantize(decimal(1), rounding=ROUND_HALF_UP)
+    return int(scaled)
+
+def from_minor(minor: int, decimals: int = 2) -> decimal:
+    """Turn integer minor units back into a Decimal for display ex: (1250, 2) -> Decimal('12.50')."""
+    return decimal(minor).scaleb(-decimals)
+
 def today_str() -> str:
     """Return today's date as a formatted string (dd/mm/YYYY)."""
     return datetime.now().strftime("%d/%m/%Y")